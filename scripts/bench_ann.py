@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from src.rag.ann_bench import benchmark_ann
+
+
+def _synthetic(n: int, dim: int, seed: int) -> np.ndarray:
+    # clustered rows look more like real embeddings than uniform noise does
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, n // 500), dim)).astype(np.float32)
+    m = centers[rng.integers(0, centers.shape[0], n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Recall@k vs latency of the ANN index kinds against exact search.")
+    ap.add_argument("--index-dir", help="use this index's embeddings.npy (default: synthetic data)")
+    ap.add_argument("--n", type=int, default=200_000, help="synthetic rows")
+    ap.add_argument("--dim", type=int, default=384, help="synthetic dimension")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--kinds", default="flat,hnsw,ivfpq")
+    args = ap.parse_args()
+
+    if args.index_dir:
+        mat = np.load(Path(args.index_dir) / "embeddings.npy", mmap_mode="r")
+    else:
+        mat = _synthetic(args.n, args.dim, seed=0)
+    # queries: perturbed corpus rows, so every query has real near neighbours
+    rng = np.random.default_rng(1)
+    q = np.asarray(mat[rng.choice(mat.shape[0], args.queries, replace=False)], dtype=np.float32)
+    q = q + 0.1 * rng.normal(size=q.shape).astype(np.float32) / np.sqrt(q.shape[1])
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+
+    rows = benchmark_ann(mat, q, k=args.k, kinds=[k for k in args.kinds.split(",") if k])
+    print(f"rows={mat.shape[0]} dim={mat.shape[1]} queries={q.shape[0]} k={args.k}")
+    print(f"{'kind':<7} {'param':<14} {'build_s':>8} {'recall':>7} {'p50_ms':>8} {'p95_ms':>8}")
+    for r in rows:
+        print(f"{r['kind']:<7} {r['param'] or '-':<14} {r['build_s']:>8} {r['recall']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8}")
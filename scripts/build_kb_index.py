@@ -10,6 +10,7 @@ if str(ROOT) not in sys.path:
 from src.rag.ingest import build_index
 
 if __name__ == "__main__":
-    # Uses config.yaml paths by default
-    build_index(force="--force" in sys.argv)
+    # Uses config.yaml paths by default; updates an existing index in place (--force re-embeds everything)
+    force = "--force" in sys.argv
+    build_index(force=force, incremental=not force)
     print("✅ KB index built. Files saved to data/kb/index (or KB_INDEX_DIR env var).")
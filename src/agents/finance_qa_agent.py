@@ -10,11 +10,12 @@ Note: Keep math minimal; do not compute numerically here. Use Quant tools for co
 
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
 from src.agents.base_agent import BaseAgent
 from src.core.llm_client import LLMClient
 from src.core.schemas import AgentRequest, AgentResponse, RagResult
+from src.core.services import get_services
 from src.rag.retriever import Retriever
 
 
@@ -55,11 +56,14 @@ def _build_prompt(user_text: str, rag: RagResult) -> str:
 class FinanceQAAgent(BaseAgent):
     name = "FinanceQAAgent"
 
+    def __init__(self, retriever: Optional[Retriever] = None) -> None:
+        self.retriever = retriever
+
     def run(self, req: AgentRequest) -> AgentResponse:
         # RAG can be precomputed by the LangGraph tool node.
         rag = req.rag_result
         if rag is None:
-            retriever = Retriever()
+            retriever = self.retriever or get_services().retriever
             rag = retriever.retrieve(
                 query=req.user_text,
                 top_k=5,
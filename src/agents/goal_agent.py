@@ -52,7 +52,7 @@ class GoalAgent(BaseAgent):
                     confidence="low",
                 )
 
-            proj = tool_compute_goal_projection(goal)
+            proj = tool_compute_goal_projection(goal, monte_carlo=True, schedule=True)
 
             # Robust scenario formatting: tolerate different keys
             scenarios = proj.get("scenarios") or []
@@ -89,6 +89,33 @@ class GoalAgent(BaseAgent):
             if years is None:
                 years = 0.0
 
+            mc = proj.get("monte_carlo") or {}
+            mc_lines = ""
+            if mc:
+                fp = mc.get("final_percentiles") or {}
+                mc_lines = (
+                    "\n\n### Probability of reaching the target\n"
+                    f"- Success probability: **{float(mc.get('success_probability', 0.0)) * 100:.0f}%** "
+                    f"({int(mc.get('n_paths', 0))} simulated paths, {float(mc.get('volatility_annual', 0.0)) * 100:.0f}% annual volatility)\n"
+                    f"- Outcome range (10th / 50th / 90th percentile): "
+                    f"{float(fp.get('p10', 0.0)):.2f} / {float(fp.get('p50', 0.0)):.2f} / {float(fp.get('p90', 0.0)):.2f} {proj.get('currency', '')}"
+                )
+
+            sched_lines = ""
+            sched = proj.get("schedule") or []
+            if sched:
+                # milestones: years 1, 3, 5 and every 5th after, plus the horizon itself
+                keep = [r for i, r in enumerate(sched)
+                        if float(r["year"]) in (1.0, 3.0) or float(r["year"]) % 5 == 0 or i == len(sched) - 1]
+                sched_lines = (
+                    "\n\n### Path (base scenario)\n"
+                    "| Year | Balance | Contributed | Today's money |\n|---:|---:|---:|---:|\n"
+                    + "\n".join(
+                        f"| {float(r['year']):g} | {float(r['balance']):.2f} | {float(r['contributed']):.2f} | {float(r['real_value']):.2f} |"
+                        for r in keep
+                    )
+                )
+
             answer_md = (
                 "## Goal projection\n"
                 f"- Target: **{float(proj.get('target_amount', 0.0)):.2f} {proj.get('currency', '')}** in **{float(years):.1f} years**\n"
@@ -97,9 +124,12 @@ class GoalAgent(BaseAgent):
                 f"- Required monthly to reach target: **{float(proj.get('required_monthly_for_target', 0.0)):.2f} {proj.get('currency', '')}**\n\n"
                 "### Scenarios\n"
                 + ("\n".join(scen_lines) if scen_lines else "- (none)")
+                + sched_lines
+                + mc_lines
                 + "\n\n### Notes\n"
-                "- Computation is deterministic (no LLM math).\n"
+                "- Computation is deterministic (no LLM math; the simulation is seeded).\n"
                 "- Scenarios are +/- return bands around base return.\n"
+                "- Volatility for the simulation follows your risk tolerance.\n"
             )
 
             warnings = proj.get("warnings") or []
@@ -5,6 +5,7 @@ from typing import Optional
 
 from src.agents.base_agent import BaseAgent
 from src.core.schemas import AgentRequest, AgentResponse, ErrorEnvelope
+from src.core.services import get_services
 from src.utils.market_data import MarketDataService
 
 _TICKER_RE = re.compile(r"\b[A-Z]{1,6}(?:\.[A-Z]{1,3})?\b")
@@ -21,6 +22,9 @@ def _extract_symbol(text: str) -> Optional[str]:
 class MarketAgent(BaseAgent):
     name = "market_agent"
 
+    def __init__(self, market_data: Optional[MarketDataService] = None) -> None:
+        self.market_data = market_data
+
     def run(self, req: AgentRequest) -> AgentResponse:
         try:
             symbol = None
@@ -40,7 +44,7 @@ class MarketAgent(BaseAgent):
                     confidence="low",
                 )
 
-            mkt = MarketDataService()
+            mkt = self.market_data or get_services().market_data
             q = mkt.get_quote(symbol)
 
             answer_md = (
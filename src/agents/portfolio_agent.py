@@ -4,6 +4,7 @@ from typing import Any, Dict, Optional
 
 from src.agents.base_agent import BaseAgent
 from src.core.schemas import AgentRequest, AgentResponse, ErrorEnvelope
+from src.core.services import get_services
 from src.utils.market_data import MarketDataService
 from src.tools.quant_tools import tool_compute_portfolio_metrics
 
@@ -23,6 +24,9 @@ def _extract_portfolio(req: AgentRequest) -> Optional[Dict[str, Any]]:
 class PortfolioAgent(BaseAgent):
     name = "portfolio_agent"
 
+    def __init__(self, market_data: Optional[MarketDataService] = None) -> None:
+        self.market_data = market_data
+
     def run(self, req: AgentRequest) -> AgentResponse:
         try:
             portfolio = _extract_portfolio(req)
@@ -36,20 +40,37 @@ class PortfolioAgent(BaseAgent):
                     confidence="low",
                 )
 
-            mkt = MarketDataService()
-            prices: Dict[str, float] = {}
+            mkt = self.market_data or get_services().market_data
+            symbols = []
             for h in portfolio.get("holdings", []):
                 sym = (h.get("symbol") or "").strip()
-                if not sym or sym.upper() == "CASH":
-                    continue
-                try:
-                    q = mkt.get_quote(sym)
-                    if q and getattr(q, "last_price", None) is not None:
-                        prices[sym] = float(q.last_price)
-                except Exception:
-                    continue
+                if sym and sym.upper() != "CASH":
+                    symbols.append(sym)
+
+            # Single batched lookup instead of one provider call per holding.
+            batch = mkt.get_quotes(symbols)
+            prices: Dict[str, float] = {}
+            for sym in symbols:
+                q = batch.quotes.get(sym.upper())
+                if q and getattr(q, "last_price", None) is not None:
+                    prices[sym] = float(q.last_price)
+
+            metrics = tool_compute_portfolio_metrics(portfolio, prices=prices, risk=bool(prices), market_data=mkt)
 
-            metrics = tool_compute_portfolio_metrics(portfolio, prices=prices)
+            risk = metrics.get("risk") or {}
+            risk_lines = ""
+            if risk:
+                conf = f"{risk['confidence'] * 100:.0f}%"
+                beta = f"{risk['beta']:.2f} vs {risk['benchmark']}" if risk.get("beta") is not None else "n/a"
+                contrib = ", ".join(f"{c['symbol']} {c['pct_of_risk'] * 100:.0f}%" for c in risk["contributions"][:3])
+                risk_lines = (
+                    f"\n### Risk ({risk['observations']} days of history)\n"
+                    f"- Volatility (annualized): **{risk['volatility_annual'] * 100:.1f}%**\n"
+                    f"- Beta: **{beta}**\n"
+                    f"- 1-day VaR / CVaR at {conf} (historical): **{risk['var_historical'] * 100:.2f}% / {risk['cvar_historical'] * 100:.2f}%**\n"
+                    f"- 1-day VaR / CVaR at {conf} (parametric): **{risk['var_parametric'] * 100:.2f}% / {risk['cvar_parametric'] * 100:.2f}%**\n"
+                    f"- Largest risk contributors: {contrib or '(none)'}\n"
+                )
 
             top = (metrics.get("top_holdings") or [])[:5]
             top_lines = [f"- **{t['symbol']}**: {t['weight']*100:.1f}% (value {t['value']:.2f})" for t in top]
@@ -63,7 +84,9 @@ class PortfolioAgent(BaseAgent):
                 f"- Diversification (effective N): **{metrics['diversification_effective_n']:.2f}**\n\n"
                 "### Top holdings\n"
                 + ("\n".join(top_lines) if top_lines else "- (none)")
-                + "\n\n### Notes\n"
+                + "\n"
+                + risk_lines
+                + "\n### Notes\n"
                 "- Numbers are computed deterministically (no LLM math).\n"
                 "- If prices were missing for some symbols, add valid tickers or enable a provider.\n"
             )
@@ -74,7 +97,7 @@ class PortfolioAgent(BaseAgent):
             return AgentResponse(
                 agent_name=self.name,
                 answer_md=answer_md,
-                data={"prices_used": prices, "metrics": metrics},
+                data={"prices_used": prices, "price_errors": batch.errors, "metrics": metrics},
                 citations=[],
                 warnings=warnings,
                 confidence=confidence,
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 from src.agents.base_agent import BaseAgent
-from src.core.schemas import AgentRequest, AgentResponse, ErrorEnvelope
-from src.tools.quant_tools import tool_compute_portfolio_metrics, tool_compute_goal_projection
+from src.core.schemas import AgentRequest, AgentResponse, ErrorEnvelope, PriceSeries
+from src.tools.quant_tools import (
+    tool_compute_goal_projection, tool_compute_market_indicators, tool_compute_portfolio_metrics, tool_optimize_portfolio,
+    tool_rebalance_sim,
+)
 
 
 class QuantAgent(BaseAgent):
@@ -42,9 +45,45 @@ class QuantAgent(BaseAgent):
                     confidence="high",
                 )
 
+            if kind == "indicators":
+                series = PriceSeries(**(payload.get("series") or {}))
+                result = tool_compute_market_indicators(
+                    series, interval=payload.get("interval") or "1d", **(payload.get("params") or {})
+                )
+                return AgentResponse(
+                    agent_name=self.name,
+                    answer_md="(Quant) Market indicators computed.",
+                    data=result,
+                    citations=[],
+                    warnings=result.get("warnings") or [],
+                    confidence=result.get("confidence") or "high",
+                )
+
+            if kind == "rebalance":
+                result = tool_rebalance_sim(payload.get("rebalance") or {})
+                return AgentResponse(
+                    agent_name=self.name,
+                    answer_md="(Quant) Rebalancing simulation computed.",
+                    data=result,
+                    citations=[],
+                    warnings=result.get("warnings") or [],
+                    confidence="high",
+                )
+
+            if kind == "optimize":
+                result = tool_optimize_portfolio(payload.get("optimize") or {})
+                return AgentResponse(
+                    agent_name=self.name,
+                    answer_md="(Quant) Target allocation optimized.",
+                    data=result,
+                    citations=[],
+                    warnings=result.get("warnings") or [],
+                    confidence="high" if result.get("converged") else "medium",
+                )
+
             return AgentResponse(
                 agent_name=self.name,
-                answer_md="QuantAgent expects payload.kind in {'portfolio','goal'}.",
+                answer_md="QuantAgent expects payload.kind in {'portfolio','goal','indicators','rebalance','optimize'}.",
                 data={},
                 citations=[],
                 warnings=["BAD_INPUT_KIND"],
@@ -5,6 +5,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from src.agents.base_agent import BaseAgent
 from src.core.config import SETTINGS
 from src.core.schemas import AgentRequest, AgentResponse, ErrorEnvelope
+from src.core.services import get_services
 from src.rag.retriever import Retriever
 from src.rag.web_search import WebSearchClient
 from src.utils.answer_format import format_citations_md
@@ -142,8 +143,8 @@ def _choose_confidence(citations: List[Dict[str, Any]], llm_used: bool) -> str:
 class TaxAgent(BaseAgent):
     name = "TaxAgent"
 
-    def __init__(self) -> None:
-        self.retriever = Retriever()
+    def __init__(self, retriever: Optional[Retriever] = None) -> None:
+        self.retriever = retriever if retriever is not None else get_services().retriever
         self.web_search = WebSearchClient()
 
     def _retrieve(self, query: str) -> Tuple[List[Dict[str, Any]], List[str]]:
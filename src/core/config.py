@@ -25,11 +25,32 @@ class Settings:
     rag_top_k: int
     rag_use_mmr: bool
     rag_min_score: float
+    rag_index_backend: str
+    rag_index_dtype: str
+    rag_ann_nprobe: int
+    rag_ann_ef_search: int
+    rag_ann_hnsw_min_chunks: int
+    rag_ann_ivfpq_min_chunks: int
 
     market_primary: str
     market_fallback: str
     market_retries: int
     market_timeout_seconds: int
+    market_max_workers: int
+    market_deadline_seconds: float
+    market_backoff_base_seconds: float
+    market_backoff_max_seconds: float
+    market_retry_budget_seconds: float
+    market_breaker_failure_threshold: int
+    market_breaker_reset_seconds: float
+    market_health_window: int
+    market_disk_cache_path: str
+    market_disk_cache_max_bytes: int
+    market_history_store_dir: str
+
+    quant_risk_benchmark: str
+    quant_risk_window_days: int
+    quant_risk_confidence: float
 
 
 def _deep_get(d: Dict[str, Any], path: str, default=None):
@@ -86,11 +107,32 @@ def load_settings(config_path: str = "config.yaml") -> Settings:
     rag_top_k = int(os.getenv("RAG_TOP_K", _deep_get(cfg, "rag.top_k", 5)))
     rag_use_mmr = str(os.getenv("RAG_USE_MMR", _deep_get(cfg, "rag.use_mmr", True))).lower() in ("1", "true", "yes")
     rag_min_score = float(os.getenv("RAG_MIN_SCORE", _deep_get(cfg, "rag.min_score", 0.2)))
+    rag_index_backend = str(_env_or_cfg("RAG_INDEX_BACKEND", "rag.index_backend", "auto")).strip().lower()
+    rag_index_dtype = str(_env_or_cfg("RAG_INDEX_DTYPE", "rag.index_dtype", "float32")).strip().lower()
+    rag_ann_nprobe = int(_env_or_cfg("RAG_ANN_NPROBE", "rag.ann_nprobe", 16))
+    rag_ann_ef_search = int(_env_or_cfg("RAG_ANN_EF_SEARCH", "rag.ann_ef_search", 64))
+    rag_ann_hnsw_min_chunks = int(_env_or_cfg("RAG_ANN_HNSW_MIN_CHUNKS", "rag.ann_hnsw_min_chunks", 50000))
+    rag_ann_ivfpq_min_chunks = int(_env_or_cfg("RAG_ANN_IVFPQ_MIN_CHUNKS", "rag.ann_ivfpq_min_chunks", 1000000))
 
     market_primary = _env_or_cfg("MARKET_PRIMARY", "market_data.primary", "alphavantage")
     market_fallback = _env_or_cfg("MARKET_FALLBACK", "market_data.fallback", "yfinance")
     market_retries = int(_env_or_cfg("MARKET_RETRIES", "market_data.retries", 3))
     market_timeout_seconds = int(_env_or_cfg("MARKET_TIMEOUT_SECONDS", "market_data.timeout_seconds", 20))
+    market_max_workers = int(_env_or_cfg("MARKET_MAX_WORKERS", "market_data.max_workers", 8))
+    market_deadline_seconds = float(_env_or_cfg("MARKET_DEADLINE_SECONDS", "market_data.request_deadline_seconds", 30))
+    market_backoff_base_seconds = float(_env_or_cfg("MARKET_BACKOFF_BASE_SECONDS", "market_data.backoff_base_seconds", 0.8))
+    market_backoff_max_seconds = float(_env_or_cfg("MARKET_BACKOFF_MAX_SECONDS", "market_data.backoff_max_seconds", 8))
+    market_retry_budget_seconds = float(_env_or_cfg("MARKET_RETRY_BUDGET_SECONDS", "market_data.retry_budget_seconds", 10))
+    market_breaker_failure_threshold = int(_env_or_cfg("MARKET_BREAKER_FAILURES", "market_data.breaker_failure_threshold", 5))
+    market_breaker_reset_seconds = float(_env_or_cfg("MARKET_BREAKER_RESET_SECONDS", "market_data.breaker_reset_seconds", 60))
+    market_health_window = int(_env_or_cfg("MARKET_HEALTH_WINDOW", "market_data.health_window", 100))
+    market_disk_cache_path = str(_env_or_cfg("MARKET_DISK_CACHE_PATH", "market_data.disk_cache_path", "") or "")
+    market_history_store_dir = str(_env_or_cfg("MARKET_HISTORY_STORE_DIR", "market_data.history_store_dir", "") or "")
+    market_disk_cache_max_bytes = int(float(_env_or_cfg("MARKET_DISK_CACHE_MAX_MB", "market_data.disk_cache_max_mb", 256)) * 1024 * 1024)
+
+    quant_risk_benchmark = str(_env_or_cfg("QUANT_RISK_BENCHMARK", "quant.risk_benchmark", "SPY") or "")
+    quant_risk_window_days = int(_env_or_cfg("QUANT_RISK_WINDOW_DAYS", "quant.risk_window_days", 252))
+    quant_risk_confidence = float(_env_or_cfg("QUANT_RISK_CONFIDENCE", "quant.risk_confidence", 0.95))
 
     if isinstance(market_primary, str):
         market_primary = market_primary.strip().lower()
@@ -110,10 +152,30 @@ def load_settings(config_path: str = "config.yaml") -> Settings:
         rag_top_k=rag_top_k,
         rag_use_mmr=rag_use_mmr,
         rag_min_score=rag_min_score,
+        rag_index_backend=rag_index_backend,
+        rag_index_dtype=rag_index_dtype,
+        rag_ann_nprobe=rag_ann_nprobe,
+        rag_ann_ef_search=rag_ann_ef_search,
+        rag_ann_hnsw_min_chunks=rag_ann_hnsw_min_chunks,
+        rag_ann_ivfpq_min_chunks=rag_ann_ivfpq_min_chunks,
         market_primary=market_primary,
         market_fallback=market_fallback,
         market_retries=market_retries,
         market_timeout_seconds=market_timeout_seconds,
+        market_max_workers=market_max_workers,
+        market_deadline_seconds=market_deadline_seconds,
+        market_backoff_base_seconds=market_backoff_base_seconds,
+        market_backoff_max_seconds=market_backoff_max_seconds,
+        market_retry_budget_seconds=market_retry_budget_seconds,
+        market_breaker_failure_threshold=market_breaker_failure_threshold,
+        market_breaker_reset_seconds=market_breaker_reset_seconds,
+        market_health_window=market_health_window,
+        market_disk_cache_path=market_disk_cache_path,
+        market_disk_cache_max_bytes=market_disk_cache_max_bytes,
+        market_history_store_dir=market_history_store_dir,
+        quant_risk_benchmark=quant_risk_benchmark,
+        quant_risk_window_days=quant_risk_window_days,
+        quant_risk_confidence=quant_risk_confidence,
     )
 
 
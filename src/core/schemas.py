@@ -5,7 +5,8 @@ from decimal import Decimal
 from enum import Enum
 from typing import Any, Dict, List, Literal, Optional, Tuple
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, Field, field_serializer, field_validator
 from pydantic.config import ConfigDict
 
 
@@ -95,6 +96,66 @@ class PriceSeries(BaseModel):
     from_cache: bool = False
 
 
+class ArrayPriceSeries(BaseModel):
+    """
+    PriceSeries backed by NumPy columns: `dates` datetime64[D], `close` float64.
+    - wraps provider DataFrames / history-store arrays without copying the closes
+    - lists only appear when serialized (model_dump / JSON) or via to_price_series()
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    symbol: str
+    dates: np.ndarray
+    close: np.ndarray
+    as_of: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    provider: Optional[str] = None
+    from_cache: bool = False
+
+    @field_validator("dates", mode="before")
+    @classmethod
+    def _as_dates(cls, v: Any) -> np.ndarray:
+        # no copy when already datetime64[D]
+        return np.asarray(v, dtype="datetime64[D]")
+
+    @field_validator("close", mode="before")
+    @classmethod
+    def _as_close(cls, v: Any) -> np.ndarray:
+        return np.asarray(v, dtype=np.float64)
+
+    @field_serializer("dates")
+    def _dates_out(self, v: np.ndarray) -> List[str]:
+        return np.datetime_as_string(v, unit="D").tolist()
+
+    @field_serializer("close")
+    def _close_out(self, v: np.ndarray) -> List[float]:
+        return v.tolist()
+
+    def __len__(self) -> int:
+        return int(self.close.shape[0])
+
+    @classmethod
+    def from_frame(cls, symbol: str, frame: Any, *, column: str = "Close", **kw: Any) -> "ArrayPriceSeries":
+        """Wrap a DatetimeIndex'd DataFrame (e.g. yfinance history); the close column is not copied."""
+        idx = frame.index
+        if getattr(idx, "tz", None) is not None:
+            idx = idx.tz_localize(None)  # exchange-local wall dates, not UTC
+        return cls(
+            symbol=symbol,
+            dates=np.asarray(idx.values, dtype="datetime64[D]"),
+            close=frame[column].to_numpy(dtype=np.float64, copy=False),
+            **kw,
+        )
+
+    def to_frame(self) -> Any:
+        import pandas as pd
+
+        return pd.DataFrame({"date": self.dates.astype("datetime64[ns]"), "close": self.close})
+
+    def to_price_series(self) -> PriceSeries:
+        return PriceSeries(**self.model_dump())
+
+
 # -------------------------
 # RAG
 # -------------------------
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import atexit
+import threading
+from typing import Callable, Optional
+
+from src.rag.retriever import Retriever
+from src.utils.logging import get_logger
+from src.utils.market_data import MarketDataService
+
+logger = get_logger("services")
+
+
+class ServiceRegistry:
+    """
+    Heavy, shareable objects built once per process and handed to graph nodes, agents and pages.
+    - lazy: first access builds the service (thread-safe, exactly once)
+    - warmup(): build eagerly at app start (opens the HTTP session, loads the vector index)
+    - shutdown(): close whatever was built; the default registry runs it at interpreter exit
+    - prebuilt instances or factories can be injected (tests, alternate configs)
+    """
+
+    def __init__(
+        self,
+        *,
+        market_data: Optional[MarketDataService] = None,
+        retriever: Optional[Retriever] = None,
+        market_data_factory: Callable[[], MarketDataService] = MarketDataService,
+        retriever_factory: Callable[[], Retriever] = Retriever,
+    ) -> None:
+        self._market_data = market_data
+        self._retriever = retriever
+        self._market_data_factory = market_data_factory
+        self._retriever_factory = retriever_factory
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    @property
+    def market_data(self) -> MarketDataService:
+        if self._market_data is None:
+            with self._lock:
+                if self._market_data is None:
+                    self._market_data = self._market_data_factory()
+        return self._market_data
+
+    @property
+    def retriever(self) -> Retriever:
+        if self._retriever is None:
+            with self._lock:
+                if self._retriever is None:
+                    self._retriever = self._retriever_factory()
+        return self._retriever
+
+    def warmup(self) -> None:
+        """Build everything now so the first user request doesn't pay for it. Failures are logged, not raised."""
+        if self._warmed:
+            return
+        self._warmed = True
+        _ = self.market_data
+        try:
+            self.retriever.load()
+        except Exception as e:
+            # no index yet is a normal state (agents fall back to "Not sourced from KB")
+            logger.warning(f"warmup_retriever_failed err={type(e).__name__}:{e}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            svc, self._market_data = self._market_data, None
+            self._retriever = None
+            self._warmed = False
+        if svc is not None:
+            try:
+                svc.close()
+            except Exception as e:
+                logger.warning(f"shutdown_market_data_failed err={type(e).__name__}:{e}")
+
+
+_SERVICES: Optional[ServiceRegistry] = None
+_SERVICES_LOCK = threading.Lock()
+
+
+def get_services() -> ServiceRegistry:
+    """Process-wide registry (closed automatically at interpreter exit)."""
+    global _SERVICES
+    with _SERVICES_LOCK:
+        if _SERVICES is None:
+            _SERVICES = ServiceRegistry()
+            atexit.register(_SERVICES.shutdown)
+        return _SERVICES
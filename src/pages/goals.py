@@ -1,16 +1,14 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from decimal import Decimal
 import uuid
 from typing import Optional
 
 from src.agents.goal_agent import GoalAgent
 from src.core.schemas import AgentRequest, AgentResponse
-
-def _monthly_rate(r_annual: float) -> float:
-    return float((Decimal(1) + Decimal(str(r_annual))) ** (Decimal(1) / Decimal(12)) - Decimal(1))
-
+from src.tools.quant_tools import tool_goal_schedule_csv
+from src.utils.quant_engine import future_value_array, projection_schedule
 
 def _future_value_series(
     *,
@@ -19,26 +17,26 @@ def _future_value_series(
     years: int,
     expected_return_annual: float,
     stepup_annual_pct: float,
+    inflation_annual: float = 0.0,
 ) -> pd.DataFrame:
-    """Illustrative monthly series using the same compounding/step-up style as quant_engine."""
-    n_months = int(years * 12)
-    mr = Decimal(str(_monthly_rate(expected_return_annual)))
-    step = Decimal(str(stepup_annual_pct))
-    bal = Decimal(str(current))
-    m = Decimal(str(monthly))
-
-    rows = []
-    for i in range(1, n_months + 1):
-        bal = bal * (Decimal(1) + mr)
-        bal = bal + m
-        # step-up at every 12 months (after contribution)
-        if i % 12 == 0 and step > 0:
-            m = m * (Decimal(1) + step)
-        rows.append({"month": i, "value": float(bal)})
-
-    df = pd.DataFrame(rows)
-    df["year"] = (df["month"] / 12.0)
-    return df
+    """
+    Monthly path from quant_engine's projection schedule (balance, contributions, real value), plus the
+    +/-3% return band from the same closed form (one broadcast call, microseconds per rerun).
+    """
+    cols = projection_schedule(current, monthly, int(years) * 12, expected_return_annual, stepup_annual_pct,
+                               inflation_annual)
+    band = future_value_array(current, monthly, cols["period"][None, :],
+                              np.array([[max(0.0, expected_return_annual - 0.03)], [expected_return_annual + 0.03]]),
+                              stepup_annual_pct)
+    return pd.DataFrame({
+        "month": cols["period"],
+        "year": cols["year"],
+        "value": cols["balance"],
+        "paid_in": cols["contributed"] + current,
+        "real_value": cols["real_value"],
+        "low": band[0],
+        "high": band[1],
+    })
 
 
 def render():
@@ -60,17 +58,18 @@ def render():
         inflation_annual = st.number_input("Inflation (annual)", min_value=0.0, max_value=1.0, value=0.05, step=0.01)
         stepup_annual_pct = st.number_input("Step-up (annual %)", min_value=0.0, max_value=1.0, value=0.0, step=0.01)
 
-        if st.button("Compute projection", type="primary"):
-            goal_payload = {
-                "currency": currency,
-                "target_amount": str(target_amount),
-                "years": str(years),
-                "current_savings": str(current_savings),
-                "monthly_contribution": str(monthly_contribution),
-                "expected_return_annual": str(expected_return_annual),
-                "inflation_annual": str(inflation_annual),
-                "stepup_annual_pct": str(stepup_annual_pct),
-            }
+        goal_payload = {
+            "currency": currency,
+            "target_amount": str(target_amount),
+            "years": str(years),
+            "current_savings": str(current_savings),
+            "monthly_contribution": str(monthly_contribution),
+            "expected_return_annual": str(expected_return_annual),
+            "inflation_annual": str(inflation_annual),
+            "stepup_annual_pct": str(stepup_annual_pct),
+        }
+        # the agent (Decimal projection + Monte Carlo) only reruns when the inputs actually changed
+        if st.button("Compute projection", type="primary") and goal_payload != st.session_state.get("_goal_inputs"):
             try:
                 req = AgentRequest(
                     request_id=str(uuid.uuid4()),
@@ -92,17 +91,39 @@ def render():
             st.markdown(resp.answer_md)
             st.caption(f"Answered by: {resp.agent_name}")
 
-        goal_inputs = st.session_state.get("_goal_inputs")
-        if goal_inputs:
+        # the chart follows the inputs live (closed-form schedule + surface lookups), no agent rerun
+        try:
+            df = _future_value_series(
+                current=float(current_savings),
+                monthly=float(monthly_contribution),
+                years=int(years),
+                expected_return_annual=float(expected_return_annual),
+                stepup_annual_pct=float(stepup_annual_pct),
+                inflation_annual=float(inflation_annual),
+            )
+            st.metric("Projected at horizon", f"{float(df['value'].iloc[-1]):,.2f} {currency}",
+                      delta=f"{float(df['value'].iloc[-1]) - float(target_amount):,.2f} vs target")
+            fig = px.line(df, x="year", y=["value", "low", "high", "paid_in", "real_value"],
+                          title="Projection (illustrative, monthly compounding)")
+            fig.add_hline(y=float(target_amount), line_dash="dot", annotation_text="Target")
+            st.plotly_chart(fig, use_container_width=True)
+        except Exception:
+            st.caption("Projection chart unavailable for current inputs.")
+
+        granularity = st.radio("Schedule export", options=["monthly", "daily"], horizontal=True)
+        # the CSV (a daily schedule runs to tens of thousands of rows) is only built on request, once per inputs
+        export_key = (tuple(goal_payload.items()), granularity)
+        if st.button("Prepare schedule CSV") and st.session_state.get("_goal_csv_key") != export_key:
             try:
-                df = _future_value_series(
-                    current=float(goal_inputs["current_savings"]),
-                    monthly=float(goal_inputs["monthly_contribution"]),
-                    years=int(float(goal_inputs["years"])),
-                    expected_return_annual=float(goal_inputs["expected_return_annual"]),
-                    stepup_annual_pct=float(goal_inputs["stepup_annual_pct"]),
-                )
-                fig = px.line(df, x="year", y="value", title="Projection (illustrative, monthly compounding)")
-                st.plotly_chart(fig, use_container_width=True)
+                st.session_state["_goal_csv"] = "".join(tool_goal_schedule_csv(goal_payload, granularity=granularity))
+                st.session_state["_goal_csv_key"] = export_key
             except Exception:
-                st.caption("Projection chart unavailable for current inputs.")
+                st.session_state.pop("_goal_csv_key", None)
+                st.caption("Schedule export unavailable for current inputs.")
+        if st.session_state.get("_goal_csv_key") == export_key:
+            st.download_button(
+                "Download schedule (CSV)",
+                data=st.session_state["_goal_csv"],
+                file_name=f"goal_schedule_{granularity}.csv",
+                mime="text/csv",
+            )
@@ -8,7 +8,9 @@ from typing import Optional
 
 from src.agents.market_agent import MarketAgent
 from src.core.schemas import AgentRequest, AgentResponse
-from src.utils.market_data import MarketDataService
+from src.core.services import get_services
+from src.utils.quant_indicators import indicator_arrays
+from src.utils.provider_health import get_scoreboard
 from src.web_app.ui_helpers import _freshness_badge, _badge
 
 def render():
@@ -20,6 +22,7 @@ def render():
         symbol = st.text_input("Ticker", value="AAPL")
         period = st.selectbox("Period", ["1mo", "3mo", "6mo", "1y", "2y"], index=0)
         interval = st.selectbox("Interval", ["1d", "1wk"], index=0)
+        overlays = st.multiselect("Overlays", ["sma_20", "sma_50", "ema_20"], default=["sma_20"])
         force = st.checkbox("Force refresh", value=False)
 
         if st.button("Fetch", type="primary"):
@@ -35,12 +38,20 @@ def render():
                 resp = MarketAgent().run(req)
                 st.session_state["_market_resp"] = resp
 
-                svc = MarketDataService()
+                svc = get_services().market_data
                 series = svc.get_history_close(symbol, period=period, interval=interval, force_refresh=force)
                 st.session_state["_market_series"] = series
+                st.session_state["_market_interval"] = interval
             except Exception as e:
                 st.error(f"Market lookup failed: {e}")
 
+        health = get_scoreboard().snapshot()
+        if health:
+            with st.expander("Provider health", expanded=False):
+                df_health = pd.DataFrame.from_dict(health, orient="index")
+                df_health.index.name = "provider"
+                st.dataframe(df_health, use_container_width=True)
+
     with col2:
         resp: Optional[AgentResponse] = st.session_state.get("_market_resp")
         if resp:
@@ -64,11 +75,19 @@ def render():
             _badge(label, kind)
 
         series = st.session_state.get("_market_series")
-        if series:
-            s = series.model_dump() if hasattr(series, "model_dump") else dict(series)
-            df = pd.DataFrame({"date": s.get("dates", []), "close": s.get("close", [])})
-            if not df.empty:
-                df["date"] = pd.to_datetime(df["date"], errors="coerce")
-                df = df.dropna(subset=["date"])
-                fig = px.line(df, x="date", y="close", title=f"{s.get('symbol', '')} close")
+        if series is not None and len(series):
+            # cached per (symbol, series, params): widget reruns don't recompute
+            ind = indicator_arrays(series, interval=st.session_state.get("_market_interval", "1d"))
+            if ind["close"].size:
+                df = pd.DataFrame({k: ind[k] for k in ["date", "close", *overlays] if k in ind})
+                df["date"] = df["date"].astype("datetime64[ns]")
+                fig = px.line(df, x="date", y=[c for c in df.columns if c != "date"], title=f"{series.symbol} close")
                 st.plotly_chart(fig, use_container_width=True)
+
+                def _fmt(x, scale=1.0, suffix=""):
+                    return f"{x * scale:.1f}{suffix}" if x == x else "n/a"
+
+                m1, m2, m3 = st.columns(3)
+                m1.metric("RSI (14)", _fmt(float(ind["rsi"][-1])))
+                m2.metric("Volatility (ann.)", _fmt(float(ind["volatility"][-1]), 100, "%"))
+                m3.metric("Max drawdown", _fmt(float(ind["drawdown"].min()), 100, "%"))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.rag.index_store import VectorIndex, _top_indices, build_ann
+from src.utils.logging import get_logger
+
+logger = get_logger("rag.ann_bench")
+
+
+def _exact_top(mat: Any, queries: np.ndarray, k: int) -> List[np.ndarray]:
+    out: List[np.ndarray] = []
+    for q in queries:
+        out.append(_top_indices(np.asarray(mat @ q), k))
+    return out
+
+
+def _measure(index: VectorIndex, queries: np.ndarray, truth: List[np.ndarray], k: int,
+             **search_kw: Any) -> Dict[str, float]:
+    hits, lat = 0, np.empty(queries.shape[0])
+    for j, q in enumerate(queries):
+        t = time.perf_counter()
+        idx, _ = index.search(q, k, **search_kw)
+        lat[j] = time.perf_counter() - t
+        hits += int(np.intersect1d(idx, truth[j]).shape[0])
+    return {
+        "recall": round(hits / max(1, k * queries.shape[0]), 4),
+        "p50_ms": round(float(np.percentile(lat, 50)) * 1e3, 3),
+        "p95_ms": round(float(np.percentile(lat, 95)) * 1e3, 3),
+    }
+
+
+def benchmark_ann(
+    mat: Any,
+    queries: Any,
+    *,
+    k: int = 10,
+    kinds: Sequence[str] = ("flat", "hnsw", "ivfpq"),
+    nprobes: Sequence[int] = (1, 4, 16, 64),
+    ef_searches: Sequence[int] = (16, 32, 64, 128, 256),
+    indexes: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Recall@k and per-query latency of each ANN kind against the exact (numpy) top-k over `mat`.
+
+    `mat`: unit rows (e.g. an index's memory-mapped embeddings.npy); `queries`: unit query vectors.
+    One row per setting swept: nprobe for ivfpq, efSearch for hnsw, a single row for flat and for the
+    numpy scan itself. Pass prebuilt FAISS `indexes` by kind to skip building them here.
+    """
+    queries = np.ascontiguousarray(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+    truth = _exact_top(mat, queries, k)
+    rows: List[Dict[str, Any]] = []
+
+    exact = VectorIndex(mat, None)
+    rows.append({"kind": "numpy", "param": None, "build_s": 0.0, **_measure(exact, queries, truth, k)})
+
+    arr = np.ascontiguousarray(mat, dtype=np.float32)
+    for kind in kinds:
+        t = time.perf_counter()
+        ann = (indexes or {}).get(kind)
+        if ann is None:
+            ann, params = build_ann(kind, arr)
+            if params["kind"] != kind:
+                continue
+        build_s = round(time.perf_counter() - t, 3)
+        index = VectorIndex(mat, None, ann=ann, ann_kind=kind)
+        if kind == "ivfpq":
+            sweep = [("nprobe", p, {"nprobe": p}) for p in nprobes]
+        elif kind == "hnsw":
+            sweep = [("ef_search", e, {"ef_search": e}) for e in ef_searches]
+        else:
+            sweep = [(None, None, {})]
+        for name, value, kw in sweep:
+            row = {"kind": kind, "param": f"{name}={value}" if name else None, "build_s": build_s,
+                   **_measure(index, queries, truth, k, **kw)}
+            logger.info("ann_bench %s", row)
+            rows.append(row)
+    return rows
@@ -0,0 +1,455 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.config import SETTINGS
+from src.utils.logging import get_logger
+
+logger = get_logger("rag.index_store")
+
+# Memory-mapped index layout (format 2). Everything a query touches is opened with mmap, so start-up
+# does not scale with the index and every worker process shares the same pages through the OS cache.
+# Data files live in a generation directory (gen-000001/, ...) that is never modified once written; an
+# update writes the next generation and then swaps INDEX.json with os.replace, so readers see either the
+# old index or the new one, and existing mmaps stay valid. The generation just replaced is kept until the
+# commit after, for readers that read the old INDEX.json but haven't opened its files yet (indexes built
+# before generations existed keep their files next to INDEX.json).
+#   INDEX.json            manifest: layout, generation, per-doc hashes for incremental updates
+#   embeddings.npy        L2-normalized float32 vectors, one row per chunk
+#   embeddings.f16.npy    optional float16 copy   | scored instead of the float32 rows,
+#   embeddings.i8.npy     optional int8 copy      | shortlist re-ranked in float32
+#   embeddings.scale.npy  per-row scale of the int8 copy
+#   vectors.faiss         optional FAISS index over the same rows (row id = chunk position):
+#                         flat (exact), hnsw (graph over full vectors) or ivfpq (compressed, re-ranked in float32)
+#   metas.bin/.idx.npy    UTF-8 JSON metadata per chunk + int64 offsets (n + 1)
+#   texts.bin/.idx.npy    UTF-8 chunk text + int64 offsets (n + 1)
+
+INDEX_MANIFEST = "INDEX.json"
+FORMAT_VERSION = 2
+INDEX_DTYPES = ("float32", "float16", "int8")
+ANN_KINDS = ("flat", "hnsw", "ivfpq")
+
+# quantized rows: shortlist this many times the requested size by approximate score, then re-rank in float32
+RERANK_OVERSAMPLE = 2
+# PQ codes are much coarser than float16/int8 rows, so ivfpq shortlists wider before the same re-rank
+PQ_RERANK_OVERSAMPLE = 10
+_SCORE_BLOCK_ROWS = 65536
+
+
+# -----------------------------
+# Offset tables
+# -----------------------------
+
+
+def write_table(index_path: Path, name: str, records: Sequence[bytes]) -> None:
+    """Write `records` back to back into <name>.bin with their offsets in <name>.idx.npy."""
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    if records:
+        offsets[1:] = np.cumsum([len(r) for r in records])
+    with open(index_path / f"{name}.bin", "wb") as f:
+        for r in records:
+            f.write(r)
+    np.save(index_path / f"{name}.idx.npy", offsets)
+
+
+class OffsetTable:
+    """Read-only view of a table written by write_table; record i is a slice of the mapped file."""
+
+    def __init__(self, index_path: Path, name: str) -> None:
+        self.offsets = np.load(index_path / f"{name}.idx.npy", mmap_mode="r")
+        data_path = index_path / f"{name}.bin"
+        # np.memmap refuses empty files
+        self.data = np.memmap(data_path, dtype=np.uint8, mode="r") if data_path.stat().st_size else np.empty(0, np.uint8)
+
+    def __len__(self) -> int:
+        return int(self.offsets.shape[0]) - 1
+
+    def get(self, i: int) -> bytes:
+        return self.data[int(self.offsets[i]):int(self.offsets[i + 1])].tobytes()
+
+
+class ChunkStore:
+    """Chunk metadata and text by position, decoded on access."""
+
+    def __init__(self, index_path: Path) -> None:
+        self.metas = OffsetTable(index_path, "metas")
+        self.texts = OffsetTable(index_path, "texts")
+
+    def __len__(self) -> int:
+        return len(self.metas)
+
+    def meta(self, i: int) -> Dict[str, Any]:
+        return json.loads(self.metas.get(i).decode("utf-8"))
+
+    def text(self, i: int) -> str:
+        return self.texts.get(i).decode("utf-8")
+
+
+class _ListChunks:
+    """ChunkStore over a legacy SIMPLE_INDEX metas.json (parsed up front, text not stored)."""
+
+    def __init__(self, metas: List[Dict[str, Any]]) -> None:
+        self._metas = metas
+
+    def __len__(self) -> int:
+        return len(self._metas)
+
+    def meta(self, i: int) -> Dict[str, Any]:
+        return self._metas[i] if i < len(self._metas) else {}
+
+    def text(self, i: int) -> str:
+        return str(self.meta(i).get("text") or "")
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+
+
+def _normalized(vecs: Any) -> np.ndarray:
+    arr = np.asarray(vecs, dtype=np.float32)
+    if arr.ndim != 2:
+        arr = arr.reshape(len(arr), -1)
+    # L2 normalize for cosine similarity via dot product; rows that already are unit (copied over by an
+    # incremental update) are left bit-for-bit alone, so repeated updates don't drift
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    return arr / np.where(np.abs(norms - 1.0) < 1e-6, 1.0, norms + 1e-12)
+
+
+def resolve_ann(backend: str, count: int) -> Optional[str]:
+    """ANN kind for a rag.index_backend value: None (numpy only) or one of ANN_KINDS."""
+    b = (backend or "auto").strip().lower()
+    if b == "simple":
+        return None
+    if b in ("faiss", "flat"):  # "faiss" was the flat LangChain store before ANN kinds existed
+        return "flat"
+    if b in ("hnsw", "ivfpq"):
+        return b
+    if b == "auto":
+        if count >= SETTINGS.rag_ann_ivfpq_min_chunks:
+            return "ivfpq"
+        if count >= SETTINGS.rag_ann_hnsw_min_chunks:
+            return "hnsw"
+        return "flat"
+    raise ValueError(f"Unsupported rag.index_backend={backend!r}. Use auto|flat|hnsw|ivfpq|simple.")
+
+
+def _ivfpq_params(count: int, dim: int) -> Tuple[int, int]:
+    """(nlist, m): ~4*sqrt(n) lists with >= 39 training points each; 4-dim sub-vectors (m divides dim)."""
+    nlist = max(1, min(int(4 * np.sqrt(count)), count // 39, 65536))
+    m = max((d for d in range(1, dim // 4 + 1) if dim % d == 0), default=1)
+    return nlist, m
+
+
+def build_ann(kind: str, arr: np.ndarray, *, seed: int = 0) -> Tuple[Any, Dict[str, Any]]:
+    """FAISS inner-product index of `kind` over the unit rows of `arr` (ids = row positions) + its build params."""
+    import faiss  # type: ignore
+
+    n, dim = int(arr.shape[0]), int(arr.shape[1])
+    if kind == "ivfpq" and n < 256 * 4:
+        # 8-bit PQ needs a few hundred points per codebook; a corpus this small is cheap to search exactly
+        logger.warning("ivfpq needs >= 1024 chunks (have %s); building hnsw instead.", n)
+        kind = "hnsw"
+    if kind == "flat":
+        index, params = faiss.IndexFlatIP(dim), {}
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+        params = {"M": 32, "ef_construction": 200}
+    elif kind == "ivfpq":
+        nlist, m = _ivfpq_params(n, dim)
+        index = faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, nlist, m, 8, faiss.METRIC_INNER_PRODUCT)
+        # k-means and the PQ codebooks only need a sample: 64 points per list (>= 64k) is plenty
+        sample, cap = arr, max(nlist * 64, 65536)
+        if n > cap:
+            rows = np.sort(np.random.default_rng(seed).choice(n, cap, replace=False))
+            sample = np.ascontiguousarray(arr[rows])
+        index.train(sample)
+        params = {"nlist": nlist, "m": m, "nbits": 8}
+    else:
+        raise ValueError(f"Unsupported ANN kind={kind!r}. Use flat|hnsw|ivfpq.")
+    index.add(arr)
+    return index, {"kind": kind, **params}
+
+
+_DATA_FILES = (
+    "embeddings.npy", "embeddings.f16.npy", "embeddings.i8.npy", "embeddings.scale.npy", "vectors.faiss",
+    "metas.bin", "metas.idx.npy", "texts.bin", "texts.idx.npy",
+)
+
+
+def data_dir(index_path: Path, manifest: Dict[str, Any]) -> Path:
+    return index_path / str(manifest.get("generation") or "")
+
+
+def _next_generation(index_path: Path) -> str:
+    gens = [int(p.name[4:]) for p in index_path.glob("gen-*") if p.name[4:].isdigit()]
+    prev = read_manifest(index_path)
+    if prev and str(prev.get("generation") or "")[4:].isdigit():
+        gens.append(int(str(prev["generation"])[4:]))
+    return f"gen-{max(gens, default=0) + 1:06d}"
+
+
+def _fsync_dir_files(path: Path) -> None:
+    for p in path.iterdir():
+        try:
+            with open(p, "rb") as f:
+                os.fsync(f.fileno())
+        except OSError:  # e.g. read-only handles on Windows
+            pass
+
+
+def _commit(index_path: Path, manifest: Dict[str, Any]) -> None:
+    """Atomically point INDEX.json at the new generation, then drop the generations before the one it replaced."""
+    prev = read_manifest(index_path)
+    prev_gen = str(prev.get("generation") or "") if prev else None
+    tmp = index_path / f".{INDEX_MANIFEST}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, index_path / INDEX_MANIFEST)
+    # open readers keep their mmaps of removed files (POSIX); where removal fails it is retried next commit
+    for p in index_path.glob("gen-*"):
+        if p.name not in (manifest["generation"], prev_gen):
+            shutil.rmtree(p, ignore_errors=True)
+    if prev_gen == "":
+        return  # the replaced index is the pre-generation layout: its files are the ones next to INDEX.json
+    for n in _DATA_FILES:
+        try:
+            (index_path / n).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def write_index(
+    index_path: Path,
+    vecs: Any,
+    texts: Sequence[str],
+    metas: Sequence[Dict[str, Any]],
+    *,
+    dtype: str = "float32",
+    ann: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Persist a format-2 index into a new generation of `index_path`, commit it and return its manifest.
+
+    `dtype` picks an optional quantized copy (float16 | int8 with per-row scale); `ann` (flat | hnsw | ivfpq)
+    adds a FAISS inner-product index, skipped with a warning when faiss is not installed. `extra` is merged
+    into the manifest (ingest keeps its per-doc state there).
+    """
+    if dtype not in INDEX_DTYPES:
+        raise ValueError(f"Unsupported index dtype={dtype!r}. Use float32|float16|int8.")
+    if len(texts) != len(metas):
+        raise ValueError("texts and metas must have one entry per chunk")
+    arr = _normalized(vecs)
+    if arr.shape[0] != len(texts):
+        raise ValueError("need one embedding per chunk")
+
+    generation = _next_generation(index_path)
+    out = index_path / generation
+    shutil.rmtree(out, ignore_errors=True)  # leftovers of an update that died before its commit
+    out.mkdir(parents=True)
+    np.save(out / "embeddings.npy", arr)
+    if dtype == "float16":
+        np.save(out / "embeddings.f16.npy", arr.astype(np.float16))
+    elif dtype == "int8":
+        scale = np.abs(arr).max(axis=1) / 127.0
+        scale[scale == 0] = 1.0
+        np.save(out / "embeddings.i8.npy", np.rint(arr / scale[:, None]).astype(np.int8))
+        np.save(out / "embeddings.scale.npy", scale.astype(np.float32))
+    write_table(out, "metas", [json.dumps(m, ensure_ascii=False).encode("utf-8") for m in metas])
+    write_table(out, "texts", [(t or "").encode("utf-8") for t in texts])
+
+    ann_kind, ann_params = None, {}
+    if ann:
+        if ann not in ANN_KINDS:
+            raise ValueError(f"Unsupported ANN kind={ann!r}. Use flat|hnsw|ivfpq.")
+        try:
+            import faiss  # type: ignore
+
+            index, ann_params = build_ann(ann, arr)
+            faiss.write_index(index, str(out / "vectors.faiss"))
+            ann_kind = ann_params.pop("kind")
+        except ImportError as e:
+            logger.warning("FAISS unavailable (%s). Index will be scored with numpy.", e)
+    _fsync_dir_files(out)
+
+    manifest = {
+        **(extra or {}),
+        "format": FORMAT_VERSION,
+        "generation": generation,
+        "count": int(arr.shape[0]),
+        "dim": int(arr.shape[1]),
+        "dtype": dtype,
+        "ann": ann_kind,
+        "ann_params": ann_params,
+    }
+    _commit(index_path, manifest)
+    return manifest
+
+
+def read_manifest(index_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        info = json.loads((index_path / INDEX_MANIFEST).read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    return info if isinstance(info, dict) and int(info.get("format") or 0) == FORMAT_VERSION else None
+
+
+# -----------------------------
+# Reading and scoring
+# -----------------------------
+
+
+def _top_indices(scores: Any, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first: argpartition, then a sort of just those k."""
+    n = int(scores.shape[0])
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def _quantized_scores(qmat: Any, qv: np.ndarray, scale: Optional[Any]) -> np.ndarray:
+    """qmat @ qv for a float16/int8 matrix, upcasting one block of rows at a time (bounded temporaries)."""
+    n = int(qmat.shape[0])
+    out = np.empty(n, dtype=np.float32)
+    for start in range(0, n, _SCORE_BLOCK_ROWS):
+        stop = min(n, start + _SCORE_BLOCK_ROWS)
+        out[start:stop] = np.asarray(qmat[start:stop], dtype=np.float32) @ qv
+    if scale is not None:
+        out *= scale
+    return out
+
+
+class VectorIndex:
+    """Vectors + chunks of one index directory, opened read-only (mmap where the layout allows)."""
+
+    def __init__(
+        self,
+        mat: Any,
+        chunks: Any,
+        *,
+        qmat: Any = None,
+        qscale: Any = None,
+        ann: Any = None,
+        ann_kind: Optional[str] = None,
+        manifest: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.mat = mat
+        self.chunks = chunks
+        self.qmat = qmat
+        self.qscale = qscale
+        self.ann = ann
+        self.ann_kind = ann_kind if ann is not None else None
+        self.manifest = manifest or {}
+        self.nprobe = SETTINGS.rag_ann_nprobe
+        self.ef_search = SETTINGS.rag_ann_ef_search
+
+    @property
+    def count(self) -> int:
+        return int(self.mat.shape[0])
+
+    def vectors(self, idx: np.ndarray) -> np.ndarray:
+        return np.asarray(self.mat[idx], dtype=np.float32)
+
+    def _rerank(self, cand: np.ndarray, qv: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        cand = np.sort(cand)  # in file order for the memmap
+        exact = self.vectors(cand) @ qv
+        order = _top_indices(exact, k)
+        return cand[order], exact[order]
+
+    def _ann_search(self, qv: np.ndarray, k: int, nprobe: Optional[int],
+                    ef_search: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        import faiss  # type: ignore
+
+        params, want = None, k
+        if self.ann_kind == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=max(int(ef_search or self.ef_search), k))
+        elif self.ann_kind == "ivfpq":
+            params = faiss.SearchParametersIVF(nprobe=int(nprobe or self.nprobe))
+            want = min(k * PQ_RERANK_OVERSAMPLE, self.count)
+        # per-call parameters: the shared index itself is never mutated, so concurrent queries are safe
+        sims, idx = self.ann.search(np.ascontiguousarray(qv[None, :], dtype=np.float32), want, params=params)
+        keep = idx[0] >= 0
+        idx, sims = idx[0][keep].astype(np.int64), sims[0][keep]
+        if self.ann_kind == "ivfpq":
+            return self._rerank(idx, qv, k)
+        return idx, sims
+
+    def search(self, qv: np.ndarray, k: int, *, nprobe: Optional[int] = None,
+               ef_search: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, cosine similarities) of the k best rows for unit query `qv`, best first.
+
+        `nprobe` (ivfpq) / `ef_search` (hnsw) override rag.ann_nprobe / rag.ann_ef_search for this call.
+        """
+        k = min(int(k), self.count)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if self.ann is not None:
+            return self._ann_search(qv, k, nprobe, ef_search)
+        if self.qmat is not None:
+            approx = _quantized_scores(self.qmat, qv, self.qscale)
+            return self._rerank(_top_indices(approx, k * RERANK_OVERSAMPLE), qv, k)
+        sims = np.asarray(self.mat @ qv)  # cosine sim because rows are normalized
+        top = _top_indices(sims, k)
+        return top, sims[top]
+
+
+def _open_ann(path: Path) -> Any:
+    try:
+        import faiss  # type: ignore
+
+        return faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except Exception as e:
+        logger.warning("Could not open %s (%s); scoring with numpy.", path, e)
+        return None
+
+
+def _open_generation(index_path: Path, manifest: Dict[str, Any]) -> VectorIndex:
+    base = data_dir(index_path, manifest)
+    dtype = str(manifest.get("dtype") or "float32")
+    mat = np.load(base / "embeddings.npy", mmap_mode="r")
+    qmat = qscale = None
+    if dtype == "float16":
+        qmat = np.load(base / "embeddings.f16.npy", mmap_mode="r")
+    elif dtype == "int8":
+        qmat = np.load(base / "embeddings.i8.npy", mmap_mode="r")
+        qscale = np.load(base / "embeddings.scale.npy", mmap_mode="r")
+    ann_kind = manifest.get("ann")
+    ann = _open_ann(base / "vectors.faiss") if ann_kind else None
+    return VectorIndex(mat, ChunkStore(base), qmat=qmat, qscale=qscale, ann=ann, ann_kind=ann_kind,
+                       manifest=manifest)
+
+
+def open_index(index_path: Path) -> Optional[VectorIndex]:
+    """Open a format-2 index, or a legacy SIMPLE_INDEX; None when `index_path` holds neither."""
+    manifest = read_manifest(index_path)
+    if manifest is not None:
+        try:
+            return _open_generation(index_path, manifest)
+        except FileNotFoundError:
+            # more commits landed between reading INDEX.json and opening its files: follow the new manifest
+            manifest = read_manifest(index_path)
+            if manifest is None:
+                raise
+            return _open_generation(index_path, manifest)
+
+    if (index_path / "SIMPLE_INDEX").exists() and (index_path / "embeddings.npy").exists():
+        mat = np.load(index_path / "embeddings.npy")
+        # metas are stored as a list of dicts
+        metas_path = index_path / "metas.json"
+        metas = json.loads(metas_path.read_text(encoding="utf-8")) if metas_path.exists() else []
+        return VectorIndex(mat, _ListChunks(metas))
+    return None
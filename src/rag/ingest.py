@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
+import numpy as np
+
 from src.core.config import SETTINGS
 from src.utils.logging import get_logger
 from src.utils.kb_loader import load_manifest
 from src.core.langchain_factory import get_embeddings
+from src.rag.index_store import INDEX_MANIFEST, open_index, read_manifest, resolve_ann, write_index
 
 logger = get_logger("rag.ingest")
 
@@ -39,6 +44,21 @@ def _split_text(text: str, *, chunk_size_chars: int, overlap_chars: int) -> List
         return chunks
 
 
+def _embedder_key(embeddings: Any) -> str:
+    """Identity of the embedding model: vectors from different models/dims must never be mixed."""
+    cls = type(embeddings)
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    return f"{cls.__module__}.{cls.__qualname__}:{model or ''}:{getattr(embeddings, 'dim', '') or ''}"
+
+
+def _sha256(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8", errors="ignore"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
 def build_index(
     manifest_path: Optional[str] = None,
     docs_dir: Optional[str] = None,
@@ -47,10 +67,21 @@ def build_index(
     chunk_size_chars: int = 1400,
     overlap_chars: int = 200,
     force: bool = False,
+    incremental: bool = False,
+    backend: Optional[str] = None,
+    dtype: Optional[str] = None,
 ) -> str:
-    """Build a local vector index using LangChain's VectorStore.
+    """Build the local vector index (memory-mapped layout, see src/rag/index_store.py).
 
     Persists under KB_INDEX_DIR (default data/kb/index).
+    `backend` (default rag.index_backend): auto | flat | hnsw | ivfpq adds a FAISS index when faiss is
+    installed ("auto" picks by chunk count), "simple" scores with numpy only.
+    `dtype` (default rag.index_dtype): float32 | float16 | int8 scoring copy.
+    `incremental`: bring an existing index up to date with the manifest instead of keeping it as is.
+    Docs whose updated_at, size and mtime match the last build are reused without being read; the
+    others are hashed (content + chunk params) and only chunks whose text was not embedded before are
+    sent to the embedder. Docs missing from the manifest are dropped. A change of chunk params or
+    embedder re-embeds everything. The new index is committed atomically (readers never see a mix).
 
     This function keeps the existing public API used by tests and the app.
     """
@@ -61,23 +92,16 @@ def build_index(
     index_path = Path(index_dir)
     index_path.mkdir(parents=True, exist_ok=True)
 
-    # If already built and not forcing, keep it.
-    if not force:
-        # FAISS uses index.faiss + index.pkl by default; keep checks broad.
-        if any((index_path / n).exists() for n in ("index.faiss", "index.pkl", "chroma.sqlite3", "SIMPLE_INDEX")):
+    # If already built and not forcing (or updating), keep it.
+    if not force and not incremental:
+        # Older builds left LangChain's index.faiss + index.pkl or a SIMPLE_INDEX; keep checks broad.
+        if any((index_path / n).exists() for n in (INDEX_MANIFEST, "index.faiss", "index.pkl", "chroma.sqlite3", "SIMPLE_INDEX")):
             return str(index_path)
 
     rows = load_manifest(manifest_path)
     if not rows:
         raise RuntimeError("Knowledge base manifest is empty.")
 
-    try:
-        from langchain_core.documents import Document
-    except Exception as e:
-        raise ImportError("Missing dependency: langchain-core") from e
-
-    documents: List[Document] = []
-
     docs_dir_path = Path(docs_dir)
     docs_dir_norm = docs_dir_path.as_posix().rstrip("/")
 
@@ -92,7 +116,8 @@ def build_index(
         We normalize separators and avoid duplicating docs_dir.
         """
         lp = (local_path or "").strip().replace("\\", "/")
-        lp = lp.lstrip("./")
+        while lp.startswith("./"):
+            lp = lp[2:]
         if not lp:
             return Path("")
 
@@ -106,6 +131,27 @@ def build_index(
 
         # Otherwise treat it as relative to docs_dir.
         return docs_dir_path / lp
+
+    embeddings = get_embeddings()
+    backend = (backend or SETTINGS.rag_index_backend).strip().lower()
+    dtype = (dtype or SETTINGS.rag_index_dtype).strip().lower()
+    params = {"chunk_size_chars": int(chunk_size_chars), "overlap_chars": int(overlap_chars),
+              "embedder": _embedder_key(embeddings)}
+    params_key = json.dumps(params, sort_keys=True)
+
+    prev = read_manifest(index_path) if incremental and not force else None
+    if prev is not None and prev.get("params") != params:
+        logger.info("Chunk params or embedder changed; re-embedding the whole KB.")
+        prev = None
+    old = open_index(index_path) if prev is not None else None
+    old_docs: Dict[str, Dict[str, Any]] = (prev or {}).get("docs") or {}
+    old_by_text: Optional[Dict[str, int]] = None  # chunk text hash -> old row, built on first changed doc
+
+    texts: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    sources: List[int] = []  # old row to copy the vector from, or -1 to embed
+    docs: Dict[str, Dict[str, Any]] = {}
+    kept = changed = 0
     for r in rows:
         local_path = (r.local_path or "").strip()
         if not local_path:
@@ -114,56 +160,76 @@ def build_index(
         if not p.exists():
             logger.warning("KB doc not found: %s", p)
             continue
-        text = p.read_text(encoding="utf-8", errors="ignore")
-        for j, chunk in enumerate(_split_text(text, chunk_size_chars=chunk_size_chars, overlap_chars=overlap_chars)):
-            meta: Dict[str, Any] = {
-                "doc_id": r.doc_id,
-                "chunk_id": f"{r.doc_id}:{j}",
-                "title": r.title,
-                "category": r.category,
-                "sub_category": r.sub_category,
-                "url": r.source_url,
-                "local_path": str(p),
-            }
-            documents.append(Document(page_content=chunk, metadata=meta))
-
-    if not documents:
-        raise RuntimeError("No documents found to index. Check manifest paths and docs_dir.")
-
-    embeddings = get_embeddings()
-
-    # Prefer FAISS; fall back to a simple persisted cosine index if deps aren't available.
-    try:
-        from langchain_community.vectorstores import FAISS  # type: ignore
-        vs = FAISS.from_documents(documents, embeddings)
-        vs.save_local(str(index_path))
-        logger.info("Built FAISS index: %s (docs=%s)", index_path, len(documents))
-        return str(index_path)
-    except Exception as e:
-        logger.warning("FAISS unavailable (%s). Falling back to simple persisted index.", e)
-
-        # Simple persisted index: embeddings.npy + metas.json
-        import json
-        import numpy as np
-
-        texts = [d.page_content for d in documents]
-        metas = []
-        for d in documents:
-            meta = dict(d.metadata or {})
-            text = d.page_content or ""
-            meta["snippet"] = (text[:280] + "…") if len(text) > 280 else text
+        st = p.stat()
+        hint = {"updated_at": r.updated_at or "", "size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)}
+        base_meta: Dict[str, Any] = {
+            "doc_id": r.doc_id,
+            "title": r.title,
+            "category": r.category,
+            "sub_category": r.sub_category,
+            "url": r.source_url,
+            "local_path": str(p),
+        }
+        prev_doc = old_docs.get(r.doc_id) if old is not None else None
+        if prev_doc is not None and all(prev_doc.get(k) == v for k, v in hint.items()):
+            doc_hash = str(prev_doc["hash"])  # trusted without reading the file
+        else:
+            doc_hash = _sha256(params_key, p.read_text(encoding="utf-8", errors="ignore"))
+
+        start = len(texts)
+        if prev_doc is not None and prev_doc.get("hash") == doc_hash:
+            first = int(prev_doc["start"])
+            doc_rows = list(range(first, first + int(prev_doc["count"])))
+            doc_texts = [old.chunks.text(i) for i in doc_rows]
+            kept += 1
+        else:
+            text = p.read_text(encoding="utf-8", errors="ignore")
+            doc_texts = _split_text(text, chunk_size_chars=chunk_size_chars, overlap_chars=overlap_chars)
+            doc_rows = [-1] * len(doc_texts)
+            if old is not None:
+                if old_by_text is None:
+                    old_by_text = {_sha256(old.chunks.text(i)): i for i in range(len(old.chunks))}
+                doc_rows = [old_by_text.get(_sha256(t), -1) for t in doc_texts]
+            changed += 1
+        for j, chunk in enumerate(doc_texts):
+            meta = {**base_meta, "chunk_id": f"{r.doc_id}:{j}"}
+            meta["snippet"] = (chunk[:280] + "…") if len(chunk) > 280 else chunk
             metas.append(meta)
+        texts.extend(doc_texts)
+        sources.extend(doc_rows)
+        docs[r.doc_id] = {"hash": doc_hash, **hint, "start": start, "count": len(doc_texts),
+                          "row": _sha256(json.dumps(base_meta, sort_keys=True))}
+
+    if not texts:
+        raise RuntimeError("No documents found to index. Check manifest paths and docs_dir.")
 
-        vecs = embeddings.embed_documents(texts)
-        arr = np.asarray(vecs, dtype=np.float32)
-        # L2 normalize for cosine similarity via dot product
-        norms = np.linalg.norm(arr, axis=1, keepdims=True) + 1e-12
-        arr = arr / norms
-
-        import numpy as np
-        np.save(index_path / "embeddings.npy", arr)
-        (index_path / "metas.json").write_text(json.dumps(metas, ensure_ascii=False), encoding="utf-8")
-        (index_path / "SIMPLE_INDEX").write_text("1", encoding="utf-8")
-        logger.info("Built simple index: %s (docs=%s)", index_path, len(documents))
+    ann = resolve_ann(backend, len(texts))
+    src = np.asarray(sources, dtype=np.int64)
+    new_rows = np.flatnonzero(src < 0)
+    if (old is not None and new_rows.size == 0 and docs == old_docs and src.shape[0] == old.count
+            and np.array_equal(src, np.arange(old.count)) and prev.get("dtype") == dtype
+            and prev.get("ann") == ann):
+        logger.info("KB index up to date: %s (docs=%s)", index_path, len(docs))
         return str(index_path)
 
+    vecs = None
+    if new_rows.size:
+        vecs = np.asarray(embeddings.embed_documents([texts[k] for k in new_rows.tolist()]), dtype=np.float32)
+    dim = int(vecs.shape[1]) if vecs is not None else int(old.mat.shape[1])
+    arr = np.empty((src.shape[0], dim), dtype=np.float32)
+    if vecs is not None:
+        arr[new_rows] = vecs
+    reused = np.flatnonzero(src >= 0)
+    if reused.size:
+        arr[reused] = old.mat[src[reused]]
+
+    manifest = write_index(index_path, arr, texts, metas, dtype=dtype, ann=ann, extra={"params": params, "docs": docs})
+    # the retriever prefers INDEX.json, so older layouts in the same dir are just dead weight
+    for n in ("index.faiss", "index.pkl", "SIMPLE_INDEX", "metas.json"):
+        (index_path / n).unlink(missing_ok=True)
+    removed = len(set(old_docs) - set(docs))
+    logger.info(
+        "Built index: %s (docs=%s kept=%s changed/added=%s removed=%s, chunks=%s embedded=%s, dtype=%s, ann=%s)",
+        index_path, len(docs), kept, changed, removed, len(texts), int(new_rows.size), dtype, manifest["ann"],
+    )
+    return str(index_path)
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-import json
 import os
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from src.core.schemas import RagChunk, RagResult
 from src.core.langchain_factory import get_embeddings
+from src.rag.index_store import INDEX_MANIFEST, VectorIndex, open_index, read_manifest
 from src.utils.logging import get_logger
 
 logger = get_logger("rag.retriever")
@@ -29,21 +30,96 @@ def _as_similarity(score: float) -> float:
     return min(1.0, max(0.0, s))
 
 
+def _mmr_select(rel: Any, vecs: Any, k: int, lam: float) -> List[int]:
+    """
+    Greedy MMR over a shortlist: positions (into `rel`/`vecs`) maximizing
+    lam * sim(q, d) - (1 - lam) * max sim(d, selected). The shortlist similarity matrix is one matmul;
+    a running max-similarity vector makes each pick a single argmax. Ties go to the earlier position,
+    so a shortlist sorted by relevance starts from its best hit.
+    """
+    import numpy as np
+
+    n = int(rel.shape[0])
+    k = min(int(k), n)
+    if k <= 0:
+        return []
+    rel = np.asarray(rel, dtype=np.float64)
+    S = np.asarray(vecs, dtype=np.float32) @ np.asarray(vecs, dtype=np.float32).T
+    taken = np.zeros(n, dtype=bool)
+    first = int(np.argmax(rel))
+    selected = [first]
+    taken[first] = True
+    max_sim = S[first].astype(np.float64)
+    for _ in range(k - 1):
+        score = lam * rel - (1.0 - lam) * max_sim
+        score[taken] = -np.inf
+        best = int(np.argmax(score))
+        selected.append(best)
+        taken[best] = True
+        np.maximum(max_sim, S[best], out=max_sim)
+    return selected
+
+
 class Retriever:
     def __init__(self, index_dir: Optional[str] = None) -> None:
         self.index_dir = Path(index_dir or _default_index_dir())
         self._embeddings = get_embeddings()
 
         # Backends (lazy)
-        self._vs: Any = None  # LangChain vectorstore (FAISS)
-        self._mat = None      # numpy matrix for SIMPLE_INDEX
-        self._metas: List[Dict[str, Any]] = []
+        self._vs: Any = None  # LangChain vectorstore (legacy FAISS index.faiss + index.pkl)
+        self._index: Optional[VectorIndex] = None  # memory-mapped layout (or a legacy SIMPLE_INDEX)
+        self._manifest_stamp: Optional[Tuple[int, int]] = None  # INDEX.json (mtime_ns, size) when opened
+        self._load_lock = threading.Lock()
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = (self.index_dir / INDEX_MANIFEST).stat()
+        except OSError:
+            return None
+        return int(st.st_mtime_ns), int(st.st_size)
+
+    def _refresh(self) -> None:
+        # an incremental build committed a new generation: swap it in (queries in flight keep the old one)
+        with self._load_lock:
+            stamp = self._stamp()
+            if stamp is None or stamp == self._manifest_stamp:
+                return
+            try:
+                index = open_index(self.index_dir)
+            except Exception as e:
+                logger.warning("Failed to reopen index in %s: %s", self.index_dir, e)
+                index = None
+            # retried when the next commit lands, not on every query
+            self._manifest_stamp = stamp
+            if index is not None:
+                # a legacy LangChain store loaded earlier is superseded by the committed index
+                self._index, self._vs = index, None
+                logger.info("Reloaded index %s (generation %s)", self.index_dir, index.manifest.get("generation"))
 
     def load(self) -> None:
-        if self._vs is not None or self._mat is not None:
+        if self._vs is not None or self._index is not None:
+            if self._stamp() != self._manifest_stamp:
+                self._refresh()
             return
+        # one retriever is shared process-wide (ServiceRegistry): concurrent first requests load once
+        with self._load_lock:
+            if self._vs is not None or self._index is not None:
+                return
+            self._load()
+
+    def _load(self) -> None:
+        # every layout records the INDEX.json it saw (None: absent), so a later commit is picked up by load()
+        self._manifest_stamp = self._stamp()
 
-        # 1) Try FAISS saved by LangChain
+        # 1) Memory-mapped layout (INDEX.json): nothing is read up front beyond the headers
+        if read_manifest(self.index_dir) is not None:
+            try:
+                self._index = open_index(self.index_dir)
+                return
+            except Exception as e:
+                logger.warning("Failed to open index in %s: %s", self.index_dir, e)
+
+        # 2) Try FAISS saved by LangChain
         try:
             from langchain_community.vectorstores import FAISS  # type: ignore
 
@@ -56,18 +132,10 @@ class Retriever:
         except Exception as e:
             logger.info("FAISS index not available in %s (%s).", self.index_dir, e)
 
-        # 2) Try SIMPLE_INDEX (numpy cosine)
+        # 3) Legacy SIMPLE_INDEX (numpy cosine, metas.json)
         try:
-            import numpy as np
-
-            if (self.index_dir / "SIMPLE_INDEX").exists() and (self.index_dir / "embeddings.npy").exists():
-                self._mat = np.load(self.index_dir / "embeddings.npy")
-                # metas are stored as a list of dicts
-                metas_path = self.index_dir / "metas.json"
-                if metas_path.exists():
-                    self._metas = json.loads(metas_path.read_text(encoding="utf-8"))
-                else:
-                    self._metas = [{} for _ in range(int(self._mat.shape[0]))]
+            self._index = open_index(self.index_dir)
+            if self._index is not None:
                 return
         except Exception as e:
             logger.warning("Failed to load SIMPLE_INDEX from %s: %s", self.index_dir, e)
@@ -79,13 +147,15 @@ class Retriever:
 
     def retrieve(
         self,
-        *,
         query: str,
+        *,
         top_k: int = 5,
         use_mmr: bool = True,
         mmr_lambda: float = 0.5,
         min_score: float = 0.2,
+        fetch_k: Optional[int] = None,
     ) -> RagResult:
+        """`fetch_k`: shortlist size that MMR chooses from (default top_k*3; hundreds is fine for wide recall)."""
         self.load()
         q = (query or "").strip()
         if not q:
@@ -99,7 +169,7 @@ class Retriever:
                     results = self._vs.max_marginal_relevance_search_with_score(
                         q,
                         k=int(top_k),
-                        fetch_k=max(20, int(top_k) * 4),
+                        fetch_k=int(fetch_k) if fetch_k else max(20, int(top_k) * 4),
                         lambda_mult=float(mmr_lambda),
                     )
                 elif hasattr(self._vs, "similarity_search_with_score"):
@@ -135,53 +205,29 @@ class Retriever:
                 )
             return RagResult(query=query, chunks=chunks)
 
-        # SIMPLE_INDEX backend
+        # Memory-mapped / SIMPLE_INDEX backend
         import numpy as np
 
-        mat = self._mat
-        if mat is None:
+        index = self._index
+        if index is None:
             return RagResult(query=query, chunks=[])
 
         qv = np.asarray(self._embeddings.embed_query(q), dtype=np.float32)
         qv = qv / (np.linalg.norm(qv) + 1e-12)
-        sims = mat @ qv  # cosine sim because rows are normalized
-        top_idx = np.argsort(-sims)[: int(top_k) * 3]  # extra for filtering/MMR
+        top_idx, top_sims = index.search(qv, int(fetch_k or int(top_k) * 3))  # extra for filtering/MMR
 
-        # Optional crude MMR: greedily pick diverse chunks
-        selected: List[int] = []
+        # MMR: greedily pick diverse chunks from the shortlist
         if use_mmr:
-            lam = float(mmr_lambda)
-            cand = list(map(int, top_idx))
-            while cand and len(selected) < int(top_k):
-                if not selected:
-                    best = cand.pop(0)
-                    selected.append(best)
-                    continue
-                # score = lam*sim(q, d) - (1-lam)*max_sim(d, selected)
-                best_i = None
-                best_score = -1e9
-                for i in cand:
-                    rel = float(sims[i])
-                    div = max(float(mat[i] @ mat[j]) for j in selected)
-                    score = lam * rel - (1.0 - lam) * div
-                    if score > best_score:
-                        best_score = score
-                        best_i = i
-                if best_i is None:
-                    break
-                cand.remove(best_i)
-                selected.append(best_i)
+            picks = _mmr_select(top_sims, index.vectors(top_idx), int(top_k), float(mmr_lambda))
         else:
-            selected = list(map(int, top_idx[: int(top_k)]))
+            picks = list(range(min(int(top_k), int(top_idx.shape[0]))))
 
         chunks: List[RagChunk] = []
-        for i in selected:
-            sim = float(sims[i])
+        for p in picks:
+            i, sim = int(top_idx[p]), float(top_sims[p])
             if sim < float(min_score):
                 continue
-            meta = self._metas[i] if i < len(self._metas) else {}
-            text = str(meta.get("text") or "")  # not stored
-            # For SIMPLE_INDEX we didn't persist page_content; keep snippet empty unless present.
+            meta = index.chunks.meta(i)
             snippet = str(meta.get("snippet") or "")
             chunks.append(
                 RagChunk(
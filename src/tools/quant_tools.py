@@ -1,15 +1,47 @@
 from __future__ import annotations
 
-from typing import Dict, Any, Optional
-from src.utils.quant_engine import compute_portfolio_metrics, compute_goal_projection
-from src.utils.quant_models import PortfolioInput, GoalInput
+import io
+from typing import Dict, Any, Iterator, List, Optional
 
-def tool_compute_portfolio_metrics(payload: Dict[str, Any], prices: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+import numpy as np
+
+from src.utils.quant_batch import compute_goal_projections_batch, compute_portfolio_metrics_batch
+from src.utils.quant_engine import (
+    SCHEDULE_COLUMNS, compute_portfolio_metrics, compute_goal_projection, iter_goal_schedule,
+)
+from src.utils.quant_indicators import IndicatorParams, compute_market_indicators
+from src.utils.quant_models import PortfolioInput, GoalInput, OptimizationSpec, RebalancePolicy
+from src.utils.quant_optimize import optimize_portfolio
+from src.utils.quant_rebalance import run_rebalance_sim
+from src.utils.quant_risk import portfolio_risk
+
+def tool_compute_portfolio_metrics(
+    payload: Dict[str, Any],
+    prices: Optional[Dict[str, float]] = None,
+    *,
+    risk: bool = False,
+    market_data: Any = None,
+    audit: bool = False,
+) -> Dict[str, Any]:
+    """
+    Portfolio metrics; `risk=True` adds history-based volatility / beta / VaR / risk contributions,
+    `audit=True` computes values and weights in Decimal.
+    """
     p = PortfolioInput(**payload)
-    out = compute_portfolio_metrics(p, prices=prices)
+    out = compute_portfolio_metrics(p, prices=prices, audit=audit)
+    if risk:
+        if market_data is None:
+            from src.core.services import get_services
+
+            market_data = get_services().market_data
+        try:
+            out.risk = portfolio_risk(p, prices or {}, market_data)
+        except Exception as e:
+            # the snapshot stays useful without history (offline provider, unknown tickers)
+            out.warnings.append(f"Risk analytics unavailable: {type(e).__name__}: {e}")
     return out.model_dump()
 
-def tool_compute_goal_projection(payload: Dict[str, Any]) -> Dict[str, Any]:
+def _goal_input(payload: Dict[str, Any]) -> GoalInput:
     p = dict(payload or {})
 
     # map common aliases -> canonical fields expected by GoalInput (quant schema)
@@ -31,6 +63,96 @@ def tool_compute_goal_projection(payload: Dict[str, Any]) -> Dict[str, Any]:
     if "risk_tolerance" not in p and "risk_profile" in p:
         p["risk_tolerance"] = p["risk_profile"]
 
-    g = GoalInput(**p)
-    out = compute_goal_projection(g)
+    return GoalInput(**p)
+
+def tool_compute_goal_projection(
+    payload: Dict[str, Any],
+    *,
+    monte_carlo: bool = False,
+    n_paths: int = 10_000,
+    seed: int = 0,
+    schedule: bool = False,
+) -> Dict[str, Any]:
+    """
+    Goal projection; `monte_carlo=True` adds success probability + percentile bands (seeded),
+    `schedule=True` adds the year-end rows of the base path.
+    """
+    g = _goal_input(payload)
+    out = compute_goal_projection(g, monte_carlo=monte_carlo, n_paths=n_paths, seed=seed, schedule=schedule)
+    return out.model_dump()
+
+def tool_goal_schedule_csv(payload: Dict[str, Any], *, granularity: str = "monthly", block: int = 4096) -> Iterator[str]:
+    """CSV text of the base projection path (SCHEDULE_COLUMNS), header first, then one chunk per block."""
+    g = _goal_input(payload)
+    yield ",".join(SCHEDULE_COLUMNS) + "\n"
+    for b in iter_goal_schedule(g, granularity=granularity, block=block):
+        buf = io.StringIO()
+        np.savetxt(buf, np.column_stack([b[c] for c in SCHEDULE_COLUMNS]), delimiter=",",
+                   fmt=["%d", "%.6f", "%.2f", "%.2f", "%.2f", "%.2f"])
+        yield buf.getvalue()
+
+def tool_compute_market_indicators(series: Any, *, interval: str = "1d", **params: Any) -> Dict[str, Any]:
+    """MARKET_INDICATORS over a (Array)PriceSeries; `params` are IndicatorParams fields (sma_windows, rsi_window, ...)."""
+    p = {k: tuple(v) if isinstance(v, list) else v for k, v in params.items()}
+    out = compute_market_indicators(series, IndicatorParams(**p), interval=interval)
+    return out.model_dump()
+
+def tool_rebalance_sim(payload: Dict[str, Any], *, market_data: Any = None) -> Dict[str, Any]:
+    """
+    REBALANCE_SIM. payload: policies (list of RebalancePolicy dicts), targets {symbol: weight} or portfolio
+    (PortfolioInput dict), optional period / interval. Uses the shared MarketDataService unless one is given.
+    """
+    if market_data is None:
+        from src.core.services import get_services
+
+        market_data = get_services().market_data
+    p = dict(payload or {})
+    policies = [RebalancePolicy(**x) for x in (p.get("policies") or [{}])]
+    portfolio = PortfolioInput(**p["portfolio"]) if p.get("portfolio") else None
+    sim = run_rebalance_sim(
+        market_data,
+        policies,
+        targets=p.get("targets"),
+        portfolio=portfolio,
+        period=p.get("period") or "10y",
+        interval=p.get("interval") or "1d",
+    )
+    return sim.to_quant_result().model_dump()
+
+def tool_optimize_portfolio(payload: Dict[str, Any], *, market_data: Any = None) -> Dict[str, Any]:
+    """
+    Allocation optimizer. payload: OptimizationSpec fields (objective, bounds, sectors, sector_bounds, ...),
+    plus symbols and/or portfolio (PortfolioInput dict), optional prices, window, interval, frontier_points.
+    """
+    if market_data is None:
+        from src.core.services import get_services
+
+        market_data = get_services().market_data
+    p = dict(payload or {})
+    spec = OptimizationSpec(**{k: v for k, v in p.items() if k in OptimizationSpec.model_fields})
+    out = optimize_portfolio(
+        market_data,
+        spec,
+        symbols=p.get("symbols"),
+        portfolio=PortfolioInput(**p["portfolio"]) if p.get("portfolio") else None,
+        prices=p.get("prices"),
+        window=int(p.get("window") or 252),
+        interval=p.get("interval") or "1d",
+        frontier_points=int(p.get("frontier_points") or 0),
+    )
     return out.model_dump()
+
+def tool_compute_goal_projections_batch(goals: Any, *, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Columnar goals (DataFrame / dict of arrays, GoalInput column names) -> one projection dict per row."""
+    return compute_goal_projections_batch(goals, workers=workers)
+
+def tool_compute_portfolio_metrics_batch(
+    holdings: Any,
+    prices: Optional[Dict[str, float]] = None,
+    *,
+    portfolios: Any = None,
+    workers: Optional[int] = None,
+    audit: bool = False,
+) -> List[Dict[str, Any]]:
+    """Long holdings table (+ optional per-portfolio cash/currency) -> one metrics dict per portfolio."""
+    return compute_portfolio_metrics_batch(holdings, prices, portfolios=portfolios, workers=workers, audit=audit)
@@ -1,65 +1,289 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import itertools
 import threading
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from src.utils.disk_cache import DiskCache
+
+_MIN_STRIPE_ITEMS = 32
+
+# persistent-tier TTL: seconds, or a function of the loaded value (decided once the value is known)
+L2Ttl = Union[int, Callable[[Any], int], None]
 
 
 @dataclass
 class CacheEntry:
     value: Any
     expires_at: float  # epoch seconds
+    seq: int = 0  # matches the entry's slot in the expiry heap (stale heap slots are skipped)
+
+
+@dataclass
+class _Stripe:
+    """One shard of the cache: its own lock, LRU order, expiry heap, in-flight loads and counters."""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    store: "OrderedDict[str, CacheEntry]" = field(default_factory=OrderedDict)
+    heap: List[Tuple[float, int, str]] = field(default_factory=list)
+    inflight: Dict[str, Future] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    l2_hits: int = 0
 
 
 class TTLCache:
     """
     Simple in-memory TTL cache.
-    - Thread-safe
+    - Thread-safe, lock-striped: keys hash onto `stripes` shards so sessions don't serialize on one lock
     - Stores arbitrary Python objects
+    - Expired entries are dropped from a per-stripe expiry heap; when full, the least recently used entry goes
+      (both amortised O(log n) on the write path, no full sort)
+    - Single-flight loads via get_or_compute / aget_or_compute (one loader per key, others wait up to
+      `wait_timeout_seconds`, then load themselves)
+    - Values are shared, not copied: every caller gets the same object, so treat them as read-only
+      (hand out copies, as MarketDataService does for quotes and series)
+    - `stats()` reports hits, misses, evictions and expirations
+    - Optional persistent `l2` (DiskCache): read-through on a miss, write-through on set
     """
 
-    def __init__(self, default_ttl_seconds: int = 1800, max_items: int = 2048) -> None:
+    def __init__(self, default_ttl_seconds: int = 1800, max_items: int = 2048, *, stripes: int = 16,
+                 clock: Callable[[], float] = time.time, l2: Optional["DiskCache"] = None,
+                 wait_timeout_seconds: Optional[float] = 60.0) -> None:
         self.default_ttl_seconds = int(default_ttl_seconds)
+        self.wait_timeout_seconds = None if wait_timeout_seconds is None else float(wait_timeout_seconds)
         self.max_items = int(max_items)
-        self._lock = threading.Lock()
-        self._store: Dict[str, CacheEntry] = {}
+        # at least _MIN_STRIPE_ITEMS per stripe: smaller shards fill unevenly and evict while the cache is half empty
+        n = max(1, min(int(stripes), self.max_items // _MIN_STRIPE_ITEMS))
+        self._stripes = [_Stripe() for _ in range(n)]
+        # capacity is enforced per stripe; keys hash evenly enough that the total stays ~max_items
+        self._stripe_capacity = max(1, -(-self.max_items // n))
+        self._clock = clock
+        self._seq = itertools.count()
+        self.l2 = l2
 
     def _now(self) -> float:
-        return time.time()
+        return self._clock()
+
+    def _stripe(self, key: str) -> _Stripe:
+        return self._stripes[hash(key) % len(self._stripes)]
 
     def get(self, key: str) -> Optional[Tuple[Any, int]]:
         """
         Returns (value, remaining_ttl_seconds) if present and not expired, else None.
         """
-        with self._lock:
-            entry = self._store.get(key)
-            if not entry:
-                return None
-            if entry.expires_at <= self._now():
-                self._store.pop(key, None)
-                return None
-            remaining = max(0, int(entry.expires_at - self._now()))
-            return entry.value, remaining
-
-    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
-        ttl = self.default_ttl_seconds if ttl_seconds is None else int(ttl_seconds)
-        expires_at = self._now() + max(1, ttl)
-
-        with self._lock:
-            # simple eviction: if over capacity, drop oldest-expiring entries
-            if len(self._store) >= self.max_items:
-                # sort by expires_at and remove 10%
-                items = sorted(self._store.items(), key=lambda kv: kv[1].expires_at)
-                for k, _ in items[: max(1, self.max_items // 10)]:
-                    self._store.pop(k, None)
+        st = self._stripe(key)
+        with st.lock:
+            hit = self._lookup(st, key, self._now())
+        if hit is None and self.l2 is not None:
+            hit = self._promote(key, self.l2.get(key))
+        return hit
 
-            self._store[key] = CacheEntry(value=value, expires_at=expires_at)
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None, *,
+            l2_ttl_seconds: Optional[int] = None) -> None:
+        """Store in memory and, if configured, in L2 (`l2_ttl_seconds` lets L2 keep it longer)."""
+        ttl = self.default_ttl_seconds if ttl_seconds is None else int(ttl_seconds)
+        now = self._now()
+        st = self._stripe(key)
+        with st.lock:
+            self._store(st, key, value, now + max(1, ttl), now)
+        if self.l2 is not None:
+            self.l2.set(key, value, ttl if l2_ttl_seconds is None else l2_ttl_seconds)
 
     def delete(self, key: str) -> None:
-        with self._lock:
-            self._store.pop(key, None)
+        st = self._stripe(key)
+        with st.lock:
+            st.store.pop(key, None)
+        if self.l2 is not None:
+            self.l2.delete(key)
 
     def clear(self) -> None:
-        with self._lock:
-            self._store.clear()
+        for st in self._stripes:
+            with st.lock:
+                st.store.clear()
+                st.heap.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+
+    def __len__(self) -> int:
+        return sum(len(st.store) for st in self._stripes)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters summed over all stripes (hit_rate is None before the first lookup)."""
+        out = {"size": 0, "hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "l2_hits": 0}
+        for st in self._stripes:
+            with st.lock:
+                out["size"] += len(st.store)
+                out["hits"] += st.hits
+                out["misses"] += st.misses
+                out["evictions"] += st.evictions
+                out["expirations"] += st.expirations
+                out["l2_hits"] += st.l2_hits
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else None
+        return out
+
+    def get_or_compute(self, key: str, loader: Callable[[], Any], ttl_seconds: Optional[int] = None,
+                       *, refresh: bool = False, l2_ttl_seconds: L2Ttl = None) -> Tuple[Any, int, bool]:
+        """
+        Returns (value, remaining_ttl_seconds, from_cache).
+        On a miss exactly one caller runs `loader`; concurrent callers for the same key wait for
+        its result (or its exception). A waiter still waiting after `wait_timeout_seconds` stops waiting
+        and runs `loader` itself. Only callers whose loader ran get from_cache=False.
+        The value returned is the cached object itself: don't mutate it.
+        `refresh=True` skips cached values (memory and L2) but still joins a load already in flight.
+        `l2_ttl_seconds` may be a callable taking the loaded value, for values whose shelf life depends on them.
+        """
+        fut, leader = self._join_or_lead(key, refresh)
+        if fut is None:
+            return leader  # type: ignore[return-value]
+        if not leader:
+            try:
+                value, remaining = fut.result(timeout=self.wait_timeout_seconds)
+            except FutureTimeout:
+                return self._finish(key, None, value=loader(), ttl_seconds=ttl_seconds, l2_ttl_seconds=l2_ttl_seconds)
+            return value, remaining, True
+        try:
+            hit = self.l2.get(key) if (self.l2 is not None and not refresh) else None
+            if hit is not None:
+                return self._finish_from_l2(key, fut, hit)
+            value = loader()
+        except BaseException as e:
+            self._finish(key, fut, exc=e)
+            raise
+        return self._finish(key, fut, value=value, ttl_seconds=ttl_seconds, l2_ttl_seconds=l2_ttl_seconds)
+
+    async def aget_or_compute(self, key: str, loader: Callable[[], Awaitable[Any]], ttl_seconds: Optional[int] = None,
+                              *, refresh: bool = False, l2_ttl_seconds: L2Ttl = None) -> Tuple[Any, int, bool]:
+        """Async get_or_compute; shares in-flight loads with threaded callers and waits without blocking."""
+        fut, leader = self._join_or_lead(key, refresh)
+        if fut is None:
+            return leader  # type: ignore[return-value]
+        if not leader:
+            try:
+                # shielded: a timed-out or cancelled waiter must not cancel the leader's shared future
+                value, remaining = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)),
+                                                          self.wait_timeout_seconds)
+            except asyncio.TimeoutError:
+                value = await loader()
+                return self._finish(key, None, value=value, ttl_seconds=ttl_seconds, l2_ttl_seconds=l2_ttl_seconds)
+            return value, remaining, True
+        try:
+            hit = await asyncio.to_thread(self.l2.get, key) if (self.l2 is not None and not refresh) else None
+            if hit is not None:
+                return self._finish_from_l2(key, fut, hit)
+            value = await loader()
+        except BaseException as e:
+            self._finish(key, fut, exc=e)
+            raise
+        return self._finish(key, fut, value=value, ttl_seconds=ttl_seconds, l2_ttl_seconds=l2_ttl_seconds)
+
+    # -----------------------------
+    # Internals (_lookup/_store/_purge_expired expect st.lock held)
+    # -----------------------------
+    def _lookup(self, st: _Stripe, key: str, now: float) -> Optional[Tuple[Any, int]]:
+        entry = st.store.get(key)
+        if entry is None:
+            st.misses += 1
+            return None
+        if entry.expires_at <= now:
+            del st.store[key]
+            st.expirations += 1
+            st.misses += 1
+            return None
+        st.store.move_to_end(key)
+        st.hits += 1
+        return entry.value, max(0, int(entry.expires_at - now))
+
+    def _store(self, st: _Stripe, key: str, value: Any, expires_at: float, now: float) -> None:
+        if key in st.store:
+            del st.store[key]
+        else:
+            self._purge_expired(st, now)
+            while len(st.store) >= self._stripe_capacity:
+                st.store.popitem(last=False)
+                st.evictions += 1
+        seq = next(self._seq)
+        st.store[key] = CacheEntry(value=value, expires_at=expires_at, seq=seq)
+        heapq.heappush(st.heap, (expires_at, seq, key))
+        # lazy deletion leaves stale slots behind (overwrites, LRU evictions); rebuild once they dominate
+        if len(st.heap) > 2 * len(st.store) + 64:
+            st.heap = [(e.expires_at, e.seq, k) for k, e in st.store.items()]
+            heapq.heapify(st.heap)
+
+    @staticmethod
+    def _purge_expired(st: _Stripe, now: float) -> None:
+        heap = st.heap
+        while heap and heap[0][0] <= now:
+            _, seq, key = heapq.heappop(heap)
+            entry = st.store.get(key)
+            if entry is not None and entry.seq == seq:
+                del st.store[key]
+                st.expirations += 1
+
+    def _join_or_lead(self, key: str, refresh: bool) -> Tuple[Optional[Future], Any]:
+        """(None, hit) on a cache hit, else (future, is_leader)."""
+        st = self._stripe(key)
+        with st.lock:
+            if not refresh:
+                hit = self._lookup(st, key, self._now())
+                if hit is not None:
+                    return None, (hit[0], hit[1], True)
+            fut = st.inflight.get(key)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            st.inflight[key] = fut
+            return fut, True
+
+    def _promote(self, key: str, hit: Optional[Tuple[Any, int]]) -> Optional[Tuple[Any, int]]:
+        """Copy an L2 hit into memory (never longer than the in-memory default TTL)."""
+        if hit is None:
+            return None
+        value, remaining = hit
+        ttl = max(1, min(remaining, self.default_ttl_seconds))
+        now = self._now()
+        st = self._stripe(key)
+        with st.lock:
+            self._store(st, key, value, now + ttl, now)
+            st.l2_hits += 1
+        return value, ttl
+
+    def _finish_from_l2(self, key: str, fut: Future, hit: Tuple[Any, int]) -> Tuple[Any, int, bool]:
+        value, ttl = self._promote(key, hit)  # type: ignore[misc]
+        st = self._stripe(key)
+        with st.lock:
+            st.inflight.pop(key, None)
+        fut.set_result((value, ttl))
+        return value, ttl, True
+
+    def _finish(self, key: str, fut: Optional[Future], *, value: Any = None, ttl_seconds: Optional[int] = None,
+                exc: Optional[BaseException] = None, l2_ttl_seconds: L2Ttl = None) -> Tuple[Any, int, bool]:
+        """Publish a loaded value (fut=None: a waiter that timed out and loaded it itself)."""
+        st = self._stripe(key)
+        if exc is not None:
+            with st.lock:
+                st.inflight.pop(key, None)
+            fut.set_exception(exc)
+            return None, 0, False
+        ttl = max(1, self.default_ttl_seconds if ttl_seconds is None else int(ttl_seconds))
+        now = self._now()
+        # publish to the store before releasing waiters so late arrivals hit the cache
+        with st.lock:
+            self._store(st, key, value, now + ttl, now)
+            if fut is not None:
+                st.inflight.pop(key, None)
+        if fut is not None:
+            fut.set_result((value, ttl))
+        if self.l2 is not None:
+            l2_ttl = l2_ttl_seconds(value) if callable(l2_ttl_seconds) else l2_ttl_seconds
+            self.l2.set(key, value, ttl if l2_ttl is None else l2_ttl)
+        return value, ttl, False
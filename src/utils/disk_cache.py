@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.core.config import SETTINGS
+from src.utils.logging import get_logger
+
+logger = get_logger("disk_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(expires_at);
+"""
+
+
+class DiskCache:
+    """
+    Persistent key/value tier (SQLite) behind the in-memory TTLCache.
+    - values are pickled; every row carries its own expires_at
+    - size-bounded: over `max_bytes`, expired rows go first, then least recently used
+    - WAL journal, so several processes (Streamlit workers, CLI) can share one file
+    - best effort: sqlite errors are logged and treated as misses, never raised to callers
+    """
+
+    def __init__(self, path: str, *, max_bytes: int = 256 * 1024 * 1024,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.max_bytes = max(1, int(max_bytes))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._approx_bytes = 0  # refreshed from the table on connect and on every eviction pass
+
+    def _connect(self) -> sqlite3.Connection:
+        # opened lazily so constructing a service never touches the filesystem
+        if self._conn is None:
+            parent = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(parent, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._approx_bytes = self._total_bytes(conn)
+        return self._conn
+
+    @staticmethod
+    def _total_bytes(conn: sqlite3.Connection) -> int:
+        return int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0])
+
+    def get(self, key: str) -> Optional[Tuple[Any, int]]:
+        """Returns (value, remaining_ttl_seconds) if present and not expired, else None."""
+        now = self._clock()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                blob, expires_at = row
+                if expires_at <= now:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return pickle.loads(blob), max(0, int(expires_at - now))
+        except Exception as e:
+            logger.warning(f"disk_cache_get_failed key={key} err={type(e).__name__}:{e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        now = self._clock()
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, now + max(1, int(ttl_seconds)), len(blob), now),
+                )
+                self._approx_bytes += len(blob)
+                if self._approx_bytes > self.max_bytes:
+                    self._evict(conn, now)
+        except Exception as e:
+            logger.warning(f"disk_cache_set_failed key={key} err={type(e).__name__}:{e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except Exception as e:
+            logger.warning(f"disk_cache_delete_failed key={key} err={type(e).__name__}:{e}")
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM cache")
+                self._approx_bytes = 0
+        except Exception as e:
+            logger.warning(f"disk_cache_clear_failed err={type(e).__name__}:{e}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self._lock:
+                conn = self._connect()
+                rows, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            return {"rows": int(rows), "bytes": int(size), "max_bytes": self.max_bytes}
+        except Exception as e:
+            logger.warning(f"disk_cache_stats_failed err={type(e).__name__}:{e}")
+            return {"rows": 0, "bytes": 0, "max_bytes": self.max_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Trim to 90% of max_bytes: expired rows first, then least recently used."""
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        total = self._total_bytes(conn)
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while total > target:
+            rows = conn.execute("SELECT key, size FROM cache ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                break
+            drop = []
+            for key, size in rows:
+                drop.append((key,))
+                total -= size
+                if total <= target:
+                    break
+            conn.executemany("DELETE FROM cache WHERE key = ?", drop)
+            evicted += len(drop)
+        self._approx_bytes = max(0, total)
+        if evicted:
+            logger.info(f"disk_cache_evicted rows={evicted} bytes={total} max_bytes={self.max_bytes}")
+
+
+_DISK_CACHE: Optional[DiskCache] = None
+_DISK_CACHE_LOCK = threading.Lock()
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """Process-wide L2 for market data, or None when market_data.disk_cache_path is empty."""
+    global _DISK_CACHE
+    if not SETTINGS.market_disk_cache_path:
+        return None
+    with _DISK_CACHE_LOCK:
+        if _DISK_CACHE is None:
+            _DISK_CACHE = DiskCache(SETTINGS.market_disk_cache_path, max_bytes=SETTINGS.market_disk_cache_max_bytes)
+        return _DISK_CACHE
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import SETTINGS
+from src.utils.logging import get_logger
+
+logger = get_logger("history_store")
+
+# Intervals that can be derived from stored daily closes (anything else goes straight to a provider).
+DAILY_INTERVALS = ("1d", "1wk", "1mo")
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_COVERS_MAX = "max"
+# generation files no meta.json points at (another process's write that lost the meta.json race, or a
+# crashed one) are swept after this long; younger ones may still be about to become the live generation
+_ORPHAN_AGE_SECONDS = 3600
+
+
+def _shift_months(d: date, months: int) -> date:
+    y, m = divmod(d.year * 12 + (d.month - 1) - months, 12)
+    m += 1
+    last_day = (date(y + (m == 12), m % 12 + 1, 1) - timedelta(days=1)).day
+    return date(y, m, min(d.day, last_day))
+
+
+def period_start(period: str, today: date) -> Optional[date]:
+    """
+    First calendar date a yfinance-style period ("5d", "1mo", "2y", "ytd", "max") needs, or None for "max".
+    "Nd" means N trading days, so its calendar start is padded for weekends/holidays.
+    """
+    p = (period or "").strip().lower()
+    if p in ("", _COVERS_MAX):
+        return None
+    if p == "ytd":
+        return date(today.year, 1, 1)
+    m = _PERIOD_RE.match(p)
+    if not m:
+        raise ValueError(f"unsupported period: {period}")
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == "d":
+        return today - timedelta(days=n * 7 // 5 + 5)
+    if unit == "wk":
+        return today - timedelta(weeks=n)
+    if unit == "mo":
+        return _shift_months(today, n)
+    return _shift_months(today, 12 * n)
+
+
+def resample_last(dates: np.ndarray, close: np.ndarray, interval: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Daily closes -> last close per week (labelled by its Monday) or per month (labelled by the 1st).
+    `dates` must be sorted datetime64[D].
+    """
+    if interval == "1d" or dates.size == 0:
+        return dates, close
+    if interval == "1wk":
+        days = dates.astype("int64")
+        # 1970-01-01 was a Thursday: (days + 3) % 7 is the weekday with Monday = 0
+        keys = (days - (days + 3) % 7).astype("datetime64[D]")
+    elif interval == "1mo":
+        keys = dates.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        raise ValueError(f"cannot derive interval {interval} from daily history")
+    last = np.flatnonzero(np.append(keys[1:] != keys[:-1], True))
+    return keys[last], close[last]
+
+
+@dataclass
+class DailyHistory:
+    dates: np.ndarray  # datetime64[D], ascending, unique
+    close: np.ndarray  # float64
+    provider: Optional[str]
+    covers_from: Optional[str]  # ISO date the stored data is complete from, or "max"
+    updated_at: datetime
+
+
+@dataclass(frozen=True)
+class FetchPlan:
+    """What to ask a provider for: a full `period` download, or only the tail since `start`."""
+    period: str
+    start: Optional[date] = None
+    covers_from: Optional[str] = None
+
+
+class HistoryStore:
+    """
+    Columnar daily close history per symbol, persisted as .npy.
+    - <root>/<SYMBOL>/meta.json points at dates-<gen>.npy (datetime64[D]) and close-<gen>.npy (float64)
+    - a write lands new generation files first, then swaps meta.json atomically, so readers never
+      see a dates/close pair from different writes
+    - `plan` says which rows are missing (full backfill or just the tail since the last stored day);
+      `query` answers any period by slicing and 1wk/1mo by resampling the daily closes
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, symbol: str) -> Path:
+        return self.root / re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper())
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        key = symbol.upper()
+        with self._locks_guard:
+            lk = self._locks.get(key)
+            if lk is None:
+                lk = self._locks[key] = threading.Lock()
+            return lk
+
+    def load(self, symbol: str) -> Optional[DailyHistory]:
+        d = self._dir(symbol)
+        for _ in range(2):  # a concurrent writer may delete the generation we just read about
+            try:
+                meta = json.loads((d / "meta.json").read_text(encoding="utf-8"))
+                # memory-mapped: queries slice the file pages instead of reading whole columns
+                dates = np.asarray(np.load(d / meta["dates"], mmap_mode="r"))
+                close = np.asarray(np.load(d / meta["close"], mmap_mode="r"))
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.warning(f"history_store_load_failed symbol={symbol} err={type(e).__name__}:{e}")
+                return None
+            return DailyHistory(
+                dates=dates,
+                close=close,
+                provider=meta.get("provider"),
+                covers_from=meta.get("covers_from"),
+                updated_at=datetime.fromisoformat(meta["updated_at"]),
+            )
+        return None
+
+    def plan(self, symbol: str, period: str, today: date) -> Optional[FetchPlan]:
+        """None when stored rows already answer `period` up to `today`."""
+        start = period_start(period, today)
+        covers = start.isoformat() if start is not None else _COVERS_MAX
+        h = self.load(symbol)
+        if h is None or h.dates.size == 0:
+            return FetchPlan(period=period, covers_from=covers)
+        if h.covers_from != _COVERS_MAX and (start is None or h.covers_from is None or start.isoformat() < h.covers_from):
+            # asked further back than we hold: one full download of the requested window
+            return FetchPlan(period=period, covers_from=covers)
+        last = h.dates[-1].astype(object)
+        if last < today:
+            # re-fetch the last stored day too: it may have been an intraday close
+            return FetchPlan(period=period, start=last, covers_from=h.covers_from)
+        return None
+
+    def merge(self, symbol: str, dates: Any, close: Any, *, provider: Optional[str],
+              covers_from: Optional[str]) -> DailyHistory:
+        """Upsert rows by date (new values win) and persist a new generation. Accepts arrays or lists."""
+        new_d = np.asarray(dates, dtype="datetime64[D]")
+        new_c = np.asarray(close, dtype=np.float64)
+        # a NaN refetch (partial/recent day) must not replace a stored close: drop it before the upsert
+        ok = np.isfinite(new_c)
+        new_d, new_c = new_d[ok], new_c[ok]
+        with self._lock(symbol):
+            old = self.load(symbol)
+            if old is not None:
+                all_d = np.concatenate([old.dates, new_d])
+                all_c = np.concatenate([old.close, new_c])
+                covers_from = _earliest_cover(old.covers_from, covers_from)
+            else:
+                all_d, all_c = new_d, new_c
+            order = np.argsort(all_d, kind="stable")
+            all_d, all_c = all_d[order], all_c[order]
+            # stable sort keeps new rows after old ones on equal dates: keep the last of each run
+            keep = np.append(all_d[1:] != all_d[:-1], True)
+            h = DailyHistory(
+                dates=all_d[keep],
+                close=all_c[keep],
+                provider=provider or (old.provider if old else None),
+                covers_from=covers_from,
+                updated_at=datetime.now(timezone.utc),
+            )
+            self._write(symbol, h)
+        return h
+
+    def query(self, symbol: str, period: str, interval: str, today: date) -> Optional[Tuple[np.ndarray, np.ndarray, DailyHistory]]:
+        h = self.load(symbol)
+        if h is None:
+            return None
+        dates, close = h.dates, h.close
+        p = (period or "").strip().lower()
+        m = _PERIOD_RE.match(p)
+        if m and m.group(2) == "d":
+            n = int(m.group(1))
+            dates, close = dates[-n:], close[-n:]
+        else:
+            start = period_start(p, today)
+            if start is not None:
+                i = int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+                dates, close = dates[i:], close[i:]
+        dates, close = resample_last(dates, close, interval)
+        return dates, close, h
+
+    def _write(self, symbol: str, h: DailyHistory) -> None:
+        d = self._dir(symbol)
+        d.mkdir(parents=True, exist_ok=True)
+        gen = uuid.uuid4().hex[:12]
+        dates_name, close_name = f"dates-{gen}.npy", f"close-{gen}.npy"
+        np.save(d / dates_name, h.dates)
+        np.save(d / close_name, h.close)
+        meta = {
+            "dates": dates_name,
+            "close": close_name,
+            "rows": int(h.dates.size),
+            "first": str(h.dates[0]) if h.dates.size else None,
+            "last": str(h.dates[-1]) if h.dates.size else None,
+            "provider": h.provider,
+            "covers_from": h.covers_from,
+            "updated_at": h.updated_at.isoformat(),
+        }
+        try:
+            prev = json.loads((d / "meta.json").read_text(encoding="utf-8"))
+        except Exception:
+            prev = {}
+        tmp = d / f"meta.json.{gen}.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, d / "meta.json")
+        # _lock is per process: other processes may be writing this symbol too, so only the generation
+        # this write replaced is removed right away (no meta.json can point at it again)
+        replaced = {prev.get("dates"), prev.get("close")} - {dates_name, close_name}
+        cutoff = time.time() - _ORPHAN_AGE_SECONDS
+        for f in d.glob("*.npy"):
+            if f.name in (dates_name, close_name):
+                continue
+            try:
+                if f.name in replaced or f.stat().st_mtime < cutoff:
+                    f.unlink()
+            except OSError:
+                pass
+
+
+def _earliest_cover(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    if _COVERS_MAX in (a, b):
+        return _COVERS_MAX
+    vals = [v for v in (a, b) if v]
+    return min(vals) if vals else None
+
+
+def get_history_store() -> Optional[HistoryStore]:
+    """Store configured by market_data.history_store_dir, or None when disabled ("")."""
+    root = SETTINGS.market_history_store_dir
+    return HistoryStore(root) if root else None
@@ -1,20 +1,32 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
 import time
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
 
 import requests
 
 from src.core.config import SETTINGS
-from src.core.schemas import MarketQuote, PriceSeries
+from src.core.schemas import ArrayPriceSeries, MarketQuote
 from src.utils.cache import TTLCache
+from src.utils.disk_cache import get_disk_cache
+from src.utils.history_store import DAILY_INTERVALS, HistoryStore, get_history_store
 from src.utils.logging import get_logger
+from src.utils.provider_health import ProviderScoreboard, get_scoreboard
+from src.utils.retry import RetryPolicy, RetryStats
 
 logger = get_logger("market_data")
 
+T = TypeVar("T")
+
+# Stooq accepts comma-joined symbols; keep URLs to a sane length.
+_STOOQ_BATCH_SIZE = 50
+
 
 class MarketDataError(Exception):
     pass
@@ -32,55 +44,148 @@ class RateLimited(MarketDataError):
     pass
 
 
+class DeadlineExceeded(MarketDataError):
+    pass
+
+
+class CircuitOpen(ProviderUnavailable):
+    pass
+
+
+def _is_retryable(e: BaseException) -> bool:
+    """Transient errors only: symbol/config problems and rate-limit notes are not retried."""
+    if isinstance(e, (SymbolNotFound, ProviderUnavailable, RateLimited, DeadlineExceeded)):  # incl. CircuitOpen
+        return False
+    if isinstance(e, requests.HTTPError):
+        code = getattr(e.response, "status_code", None)
+        return code in (429, 500, 502, 503, 504)
+    return True
+
+
 @dataclass
 class _ProviderResult:
     quote: MarketQuote
     ttl_seconds: int
 
 
+@dataclass
+class QuoteBatch:
+    """Result of `MarketDataService.get_quotes`, keyed by normalized (upper-case) symbol."""
+    quotes: Dict[str, MarketQuote] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    partial: bool = False  # True when the request deadline cut some symbols off
+
+
+def _seconds_until_utc_midnight(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def _history_l2_ttl(series: ArrayPriceSeries, interval: str, ttl: int, now: Optional[datetime] = None) -> int:
+    """
+    Persistent-tier TTL for a history series: kept until UTC midnight only when it is daily-or-longer
+    and its last bar covers a closed period. Intraday series and a still-moving bar keep `ttl`.
+    """
+    if interval not in DAILY_INTERVALS or series.dates.size == 0:
+        return ttl
+    now = now or datetime.now(timezone.utc)
+    last: date = series.dates[-1].item()
+    if interval == "1wk":
+        last += timedelta(days=6 - last.weekday())  # bars may be dated at either end of the week
+    elif interval == "1mo":
+        last = (last.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if last >= now.date():
+        return ttl
+    return max(ttl, _seconds_until_utc_midnight(now))
+
+
+def _cached_quote(q: MarketQuote, remaining: int) -> MarketQuote:
+    # cached objects are shared across callers/threads: hand out a copy rather than mutate
+    return q.model_copy(update={"from_cache": True, "ttl_seconds": remaining})
+
+
 class MarketDataService:
     """
     Stage 5:
     - Quote lookup via primary provider with fallback
-    - TTL caching
-    - Retries with backoff for transient errors
+    - TTL caching (in-memory, optional persistent SQLite L2 shared across processes)
+    - Retries with jittered backoff for transient errors (shared RetryPolicy, per-request budget)
+    - Batched multi-symbol quotes (one provider round-trip for the cache misses)
+    - Bounded concurrent fan-out for providers without a batch endpoint, under a per-request deadline
+    - Per-provider circuit breakers + health scoreboard: healthy provider tried first, open circuits skipped
     """
 
-    def __init__(self, cache: Optional[TTLCache] = None) -> None:
-        self.cache = cache or TTLCache(default_ttl_seconds=SETTINGS.cache_ttl_seconds)
+    def __init__(self, cache: Optional[TTLCache] = None, scoreboard: Optional[ProviderScoreboard] = None,
+                 history_store: Optional[HistoryStore] = None) -> None:
+        self.cache = cache if cache is not None else TTLCache(
+            default_ttl_seconds=SETTINGS.cache_ttl_seconds,
+            l2=get_disk_cache(),
+            wait_timeout_seconds=float(SETTINGS.market_deadline_seconds or 30),
+        )
+        self.scoreboard = scoreboard or get_scoreboard()
+        self.history_store = history_store if history_store is not None else get_history_store()
         self.session = requests.Session()
 
         self.primary = (SETTINGS.market_primary or "yfinance").lower()
         self.fallback = (SETTINGS.market_fallback or "alphavantage").lower()
         self.retries = int(SETTINGS.market_retries or 3)
         self.timeout = int(SETTINGS.market_timeout_seconds or 20)
+        self.max_workers = max(1, int(SETTINGS.market_max_workers or 8))
+        self.deadline_seconds = float(SETTINGS.market_deadline_seconds or 30)
+
+        self.retry_policy = RetryPolicy(
+            max_attempts=self.retries,
+            base_delay=float(SETTINGS.market_backoff_base_seconds),
+            max_delay=float(SETTINGS.market_backoff_max_seconds),
+            budget_seconds=float(SETTINGS.market_retry_budget_seconds),
+            retry_on=_is_retryable,
+        )
+        self.backoff_seconds_total = 0.0  # time spent in retry backoff over the service lifetime
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Release the HTTP session and worker pool (running calls are not waited for)."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        self.session.close()
+
+    def provider_health(self) -> Dict[str, Dict[str, object]]:
+        """Scoreboard snapshot per provider: circuit state, calls, error rate, latency p50/p95 (ms)."""
+        return self.scoreboard.snapshot()
 
     def get_quote(self, symbol: str, *, force_refresh: bool = False, ttl_seconds: Optional[int] = None) -> MarketQuote:
+        """
+        Single quote, cached.
+        Concurrent misses for the same symbol are coalesced: one caller hits the providers,
+        the others wait for its result (see TTLCache.get_or_compute).
+        """
         sym = symbol.strip().upper()
         if not sym:
             raise ValueError("symbol is empty")
 
-        cache_key = f"quote:{sym}"
-        if not force_refresh:
-            cached = self.cache.get(cache_key)
-            if cached:
-                val, remaining = cached
-                q: MarketQuote = val
-                q.from_cache = True
-                q.ttl_seconds = remaining
-                return q
-
         ttl = int(ttl_seconds or SETTINGS.cache_ttl_seconds)
+        q, remaining, from_cache = self.cache.get_or_compute(
+            f"quote:{sym}", lambda: self._fetch_quote(sym, ttl), ttl, refresh=force_refresh
+        )
+        return _cached_quote(q, remaining) if from_cache else q.model_copy()
 
-        # Try primary then fallback
+    def _fetch_quote(self, sym: str, ttl: int) -> MarketQuote:
+        # Healthiest provider first (primary, then fallback, unless one is failing)
         last_err: Optional[Exception] = None
-        for provider in [self.primary, self.fallback]:
+        for provider in self._providers():
+            if not self.scoreboard.allow(provider):
+                last_err = CircuitOpen(f"circuit open for {provider}")
+                continue
             try:
-                res = self._quote_via(provider, sym, ttl)
-                # Cache
+                res = self._observed(provider, lambda: self._quote_via(provider, sym, ttl))
                 res.quote.from_cache = False
                 res.quote.ttl_seconds = ttl
-                self.cache.set(cache_key, res.quote, ttl_seconds=ttl)
                 return res.quote
             except SymbolNotFound as e:
                 # symbol issues: don't fallback to avoid misleading
@@ -91,33 +196,206 @@ class MarketDataService:
 
         raise MarketDataError(f"All providers failed for {sym}. Last error: {last_err}")
 
+    async def aget_quote(self, symbol: str, *, force_refresh: bool = False,
+                         ttl_seconds: Optional[int] = None) -> MarketQuote:
+        """
+        Async variant of get_quote.
+        Provider calls run in a worker thread, but backoff between attempts is awaited,
+        so a quote waiting on a retry does not hold a thread. Shares in-flight loads with get_quote.
+        """
+        sym = symbol.strip().upper()
+        if not sym:
+            raise ValueError("symbol is empty")
+
+        ttl = int(ttl_seconds or SETTINGS.cache_ttl_seconds)
+        q, remaining, from_cache = await self.cache.aget_or_compute(
+            f"quote:{sym}", lambda: self._afetch_quote(sym, ttl), ttl, refresh=force_refresh
+        )
+        return _cached_quote(q, remaining) if from_cache else q.model_copy()
+
+    async def _afetch_quote(self, sym: str, ttl: int) -> MarketQuote:
+        last_err: Optional[Exception] = None
+        for provider in self._providers():
+            if not self.scoreboard.allow(provider):
+                last_err = CircuitOpen(f"circuit open for {provider}")
+                continue
+            stats = RetryStats()
+            t0 = time.monotonic()
+            try:
+                try:
+                    res = await self.retry_policy.acall(
+                        lambda: asyncio.to_thread(self._quote_attempt, provider, sym, ttl), stats=stats
+                    )
+                except Exception as e:
+                    self.scoreboard.record(provider, time.monotonic() - t0, ok=isinstance(e, SymbolNotFound))
+                    raise
+                except BaseException:
+                    self.scoreboard.release(provider)
+                    raise
+                self.scoreboard.record(provider, time.monotonic() - t0, ok=True)
+                res.quote.from_cache = False
+                res.quote.ttl_seconds = ttl
+                return res.quote
+            except SymbolNotFound:
+                raise
+            except Exception as e:
+                last_err = e
+                logger.warning(f"provider_failed provider={provider} symbol={sym} err={type(e).__name__}:{e}")
+            finally:
+                self._record_backoff(provider, stats)
+
+        raise MarketDataError(f"All providers failed for {sym}. Last error: {last_err}")
+
+    def get_quotes(self, symbols: Iterable[str], *, force_refresh: bool = False,
+                   ttl_seconds: Optional[int] = None, deadline_seconds: Optional[float] = None) -> QuoteBatch:
+        """
+        Bulk quote lookup.
+        Cache hits are served directly; the misses are fetched in one batched call per provider,
+        and only the symbols the primary could not price are retried on the fallback.
+        Per-symbol failures are reported in `QuoteBatch.errors` instead of raising.
+
+        The whole request is bounded by `deadline_seconds` (config: market_data.request_deadline_seconds);
+        symbols still in flight at the deadline are reported as errors and `partial` is set.
+        """
+        batch = QuoteBatch()
+        pending: List[str] = []
+        for raw in symbols:
+            sym = (raw or "").strip().upper()
+            if not sym or sym in batch.quotes or sym in pending:
+                continue
+            if not force_refresh:
+                cached = self.cache.get(f"quote:{sym}")
+                if cached:
+                    batch.quotes[sym] = _cached_quote(*cached)
+                    continue
+            pending.append(sym)
+
+        if not pending:
+            return batch
+
+        ttl = int(ttl_seconds or SETTINGS.cache_ttl_seconds)
+        budget = self.deadline_seconds if deadline_seconds is None else float(deadline_seconds)
+        deadline = time.monotonic() + budget
+        for provider in self._providers():
+            if not pending:
+                break
+            if time.monotonic() >= deadline:
+                batch.partial = True
+                for sym in pending:
+                    batch.errors.setdefault(sym, f"DeadlineExceeded: no quote within {budget:.1f}s")
+                break
+            if not self.scoreboard.allow(provider):
+                for sym in pending:
+                    batch.errors[sym] = f"CircuitOpen: circuit open for {provider}"
+                continue
+            try:
+                results, errors = self._observed(
+                    provider, lambda: self._quotes_via(provider, pending, ttl, deadline=deadline), batch=True
+                )
+            except Exception as e:
+                logger.warning(f"provider_failed_batch provider={provider} symbols={len(pending)} err={type(e).__name__}:{e}")
+                batch.partial = batch.partial or isinstance(e, DeadlineExceeded)
+                for sym in pending:
+                    batch.errors[sym] = f"{type(e).__name__}: {e}"
+                continue
+
+            retry: List[str] = []
+            for sym in pending:
+                res = results.get(sym)
+                if res is not None:
+                    res.quote.from_cache = False
+                    res.quote.ttl_seconds = ttl
+                    self.cache.set(f"quote:{sym}", res.quote, ttl_seconds=ttl)
+                    batch.quotes[sym] = res.quote
+                    batch.errors.pop(sym, None)
+                    continue
+                err = errors.get(sym) or MarketDataError(f"{provider} returned no quote for {sym}")
+                batch.errors[sym] = f"{type(err).__name__}: {err}"
+                batch.partial = batch.partial or isinstance(err, DeadlineExceeded)
+                # symbol issues: don't fallback to avoid misleading
+                if not isinstance(err, SymbolNotFound):
+                    retry.append(sym)
+            pending = retry
+
+        return batch
+
     def get_history_close(self, symbol: str, *, period: str = "1mo", interval: str = "1d",
-                          force_refresh: bool = False, ttl_seconds: Optional[int] = None) -> PriceSeries:
+                          force_refresh: bool = False, ttl_seconds: Optional[int] = None) -> ArrayPriceSeries:
         """
         Simple close-price series for charts.
-        Uses same provider selection as quote.
+        Uses same provider selection as quote; concurrent misses are coalesced like get_quote.
+        Daily/weekly/monthly series are answered from the local history store, which only
+        downloads the days it doesn't hold yet (1wk/1mo are resampled from daily closes).
         """
         sym = symbol.strip().upper()
         if not sym:
             raise ValueError("symbol is empty")
 
-        cache_key = f"history:{sym}:{period}:{interval}"
-        if not force_refresh:
-            cached = self.cache.get(cache_key)
-            if cached:
-                val, _ = cached
-                s: PriceSeries = val
-                s.from_cache = True
-                return s
-
         ttl = int(ttl_seconds or SETTINGS.cache_ttl_seconds)
+        # closed bars don't change, so the persistent tier keeps a completed series until the next daily bar is due
+        series, _, from_cache = self.cache.get_or_compute(
+            f"history:{sym}:{period}:{interval}",
+            lambda: self._fetch_history(sym, period=period, interval=interval),
+            ttl,
+            refresh=force_refresh,
+            l2_ttl_seconds=lambda s: _history_l2_ttl(s, interval, ttl),
+        )
+        # shallow copy: the cached series is shared, its (read-only by contract) columns are not duplicated
+        return series.model_copy(update={"from_cache": from_cache})
+
+    def _fetch_history(self, sym: str, *, period: str, interval: str) -> ArrayPriceSeries:
+        if self.history_store is not None and interval in DAILY_INTERVALS:
+            return self._history_from_store(sym, period=period, interval=interval)
+        return self._fetch_history_remote(sym, period=period, interval=interval)
+
+    def _history_from_store(self, sym: str, *, period: str, interval: str) -> ArrayPriceSeries:
+        store = self.history_store
+        assert store is not None
+        today = datetime.now(timezone.utc).date()
+        plan = store.plan(sym, period, today)
+        if plan is not None:
+            try:
+                fresh = self._fetch_history_remote(sym, period=plan.period, interval="1d", start=plan.start)
+                store.merge(sym, fresh.dates, fresh.close, provider=fresh.provider, covers_from=plan.covers_from)
+            except Exception as e:
+                if plan.start is None:
+                    raise
+                # tail refresh failed (or nothing new, e.g. weekend): stored rows still answer the query
+                logger.info(f"history_tail_skipped symbol={sym} since={plan.start} err={type(e).__name__}:{e}")
+
+        out = store.query(sym, period, interval, today)
+        if out is None:
+            raise MarketDataError(f"No stored history for {sym}")
+        dates, close, h = out
+        # slices of the stored columns: no per-row conversion here
+        return ArrayPriceSeries(
+            symbol=sym,
+            dates=dates,
+            close=close,
+            as_of=h.updated_at,
+            provider=h.provider,
+            from_cache=False,
+        )
+
+    def _fetch_history_remote(self, sym: str, *, period: str, interval: str,
+                              start: Optional[date] = None) -> ArrayPriceSeries:
         last_err: Optional[Exception] = None
-        for provider in [self.primary, self.fallback]:
+        for provider in self._providers():
+            if not self.scoreboard.allow(provider):
+                last_err = CircuitOpen(f"circuit open for {provider}")
+                continue
             try:
-                series = self._history_via(provider, sym, period=period, interval=interval)
+                series = self._observed(
+                    provider, lambda: self._history_via(provider, sym, period=period, interval=interval, start=start)
+                )
                 series.from_cache = False
-                self.cache.set(cache_key, series, ttl_seconds=ttl)
                 return series
+            except SymbolNotFound:
+                if start is not None:
+                    raise  # nothing since `start` is an answer, not a provider failure
+                # full download: try the next provider like any other miss
+                last_err = MarketDataError(f"{provider} has no history for {sym}")
+                logger.warning(f"provider_failed_history provider={provider} symbol={sym} err=SymbolNotFound")
             except Exception as e:
                 last_err = e
                 logger.warning(f"provider_failed_history provider={provider} symbol={sym} err={type(e).__name__}:{e}")
@@ -127,7 +405,37 @@ class MarketDataService:
     # -----------------------------
     # Provider selection
     # -----------------------------
+    def _providers(self) -> List[str]:
+        """Configured providers, healthiest first (ties keep primary before fallback)."""
+        return self.scoreboard.rank([self.primary, self.fallback])
+
+    def _observed(self, provider: str, fn: Callable[[], T], *, batch: bool = False) -> T:
+        """
+        Run a provider call and feed latency/outcome to the scoreboard.
+        An unknown symbol is a healthy answer; a batch counts as failed only if nothing came back priced.
+        """
+        t0 = time.monotonic()
+        try:
+            out = fn()
+        except Exception as e:
+            self.scoreboard.record(provider, time.monotonic() - t0, ok=isinstance(e, SymbolNotFound))
+            raise
+        except BaseException:
+            # cancelled/interrupted: says nothing about the provider, but must not pin the half-open trial
+            self.scoreboard.release(provider)
+            raise
+        ok = True
+        if batch:
+            results, errors = out  # type: ignore[misc]
+            ok = bool(results) or all(isinstance(err, SymbolNotFound) for err in errors.values())
+        self.scoreboard.record(provider, time.monotonic() - t0, ok=ok)
+        return out
+
     def _quote_via(self, provider: str, symbol: str, ttl: int) -> _ProviderResult:
+        return self._with_retries(provider, lambda: self._quote_attempt(provider, symbol, ttl))
+
+    def _quote_attempt(self, provider: str, symbol: str, ttl: int) -> _ProviderResult:
+        """Single provider call, no retries."""
         if provider == "alphavantage":
             return self._quote_alphavantage(symbol, ttl)
         if provider == "yfinance":
@@ -136,14 +444,95 @@ class MarketDataService:
             return self._quote_stooq(symbol, ttl)
         raise ProviderUnavailable(f"Unknown provider: {provider}")
 
-    def _history_via(self, provider: str, symbol: str, period: str, interval: str) -> PriceSeries:
+    def _quotes_via(self, provider: str, symbols: List[str], ttl: int, *,
+                    deadline: Optional[float] = None) -> Tuple[Dict[str, _ProviderResult], Dict[str, Exception]]:
+        """Batched quotes: returns (results, per-symbol errors) keyed by symbol."""
+        if provider == "yfinance":
+            return self._call_with_deadline(
+                lambda: self._with_retries(provider, lambda: self._quotes_yfinance(symbols, ttl), deadline=deadline),
+                deadline,
+            )
+        if provider == "stooq":
+            return self._call_with_deadline(
+                lambda: self._with_retries(provider, lambda: self._quotes_stooq(symbols, ttl), deadline=deadline),
+                deadline,
+            )
+        if provider == "alphavantage":
+            # No batch endpoint on the free tier; fan out per symbol.
+            return self._quotes_each(provider, symbols, ttl, deadline=deadline)
+        raise ProviderUnavailable(f"Unknown provider: {provider}")
+
+    def _quotes_each(self, provider: str, symbols: List[str], ttl: int, *,
+                     deadline: Optional[float] = None) -> Tuple[Dict[str, _ProviderResult], Dict[str, Exception]]:
+        """Concurrent per-symbol quotes through the bounded pool; stragglers become DeadlineExceeded."""
+        results: Dict[str, _ProviderResult] = {}
+        errors: Dict[str, Exception] = {}
+        if not symbols:
+            return results, errors
+
+        pool = self._get_executor()
+        futures = {pool.submit(self._quote_via, provider, sym, ttl): sym for sym in symbols}
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        done, not_done = wait(futures, timeout=timeout)
+
+        for fut in done:
+            sym = futures[fut]
+            try:
+                results[sym] = fut.result()
+            except Exception as e:
+                errors[sym] = e
+        for fut in not_done:
+            fut.cancel()
+            sym = futures[fut]
+            errors[sym] = DeadlineExceeded(f"{provider} quote for {sym} not done before deadline")
+        return results, errors
+
+    def _call_with_deadline(self, fn: Callable[[], T], deadline: Optional[float]) -> T:
+        if deadline is None:
+            return fn()
+        fut = self._get_executor().submit(fn)
+        try:
+            return fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            fut.cancel()
+            raise DeadlineExceeded("provider call not done before deadline")
+
+    def _with_retries(self, provider: str, fn: Callable[[], T], *, deadline: Optional[float] = None) -> T:
+        stats = RetryStats()
+        try:
+            return self.retry_policy.call(fn, stats=stats, deadline=deadline)
+        finally:
+            self._record_backoff(provider, stats)
+
+    def _record_backoff(self, provider: str, stats: RetryStats) -> None:
+        if stats.backoff_seconds <= 0:
+            return
+        with self._stats_lock:
+            self.backoff_seconds_total += stats.backoff_seconds
+        logger.info(
+            f"retry_backoff provider={provider} attempts={stats.attempts} "
+            f"backoff_s={stats.backoff_seconds:.2f} last_err={type(stats.last_error).__name__}"
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="market-data")
+            return self._executor
+
+    def _history_via(self, provider: str, symbol: str, period: str, interval: str,
+                     start: Optional[date] = None) -> ArrayPriceSeries:
+        return self._with_retries(provider, lambda: self._history_attempt(provider, symbol, period, interval, start))
+
+    def _history_attempt(self, provider: str, symbol: str, period: str, interval: str,
+                         start: Optional[date] = None) -> ArrayPriceSeries:
         if provider == "alphavantage":
             # AlphaVantage free tier is limited for history; prefer yfinance/stooq for charts.
-            return self._history_yfinance(symbol, period=period, interval=interval)
+            return self._history_yfinance(symbol, period=period, interval=interval, start=start)
         if provider == "yfinance":
-            return self._history_yfinance(symbol, period=period, interval=interval)
+            return self._history_yfinance(symbol, period=period, interval=interval, start=start)
         if provider == "stooq":
-            return self._history_stooq(symbol)
+            return self._history_stooq(symbol, start=start)
         raise ProviderUnavailable(f"Unknown provider: {provider}")
 
     # -----------------------------
@@ -157,7 +546,7 @@ class MarketDataService:
         url = "https://www.alphavantage.co/query"
         params = {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": api_key}
 
-        data = self._request_json_with_retries(url, params=params)
+        data = self._request_json(url, params=params)
 
         if "Note" in data:
             # rate limit
@@ -195,79 +584,103 @@ class MarketDataService:
         except Exception as e:
             raise ProviderUnavailable("yfinance not installed. pip install yfinance") from e
 
-        # Retry around yfinance calls
-        last_err: Optional[Exception] = None
-        for attempt in range(1, self.retries + 1):
-            try:
-                t = yf.Ticker(symbol)
-                # fast_info is light; fallback to history if needed
-                info = getattr(t, "fast_info", None) or {}
-                price = info.get("last_price") or info.get("lastPrice") or info.get("regularMarketPrice")
-                if price is None:
-                    hist = t.history(period="1d", interval="1d")
-                    if hist is None or hist.empty:
-                        raise SymbolNotFound(f"No data for {symbol}")
-                    price = float(hist["Close"].iloc[-1])
+        t = yf.Ticker(symbol)
+        # fast_info is light; fallback to history if needed
+        info = getattr(t, "fast_info", None) or {}
+        price = info.get("last_price") or info.get("lastPrice") or info.get("regularMarketPrice")
+        if price is None:
+            hist = t.history(period="1d", interval="1d")
+            if hist is None or hist.empty:
+                raise SymbolNotFound(f"No data for {symbol}")
+            price = float(hist["Close"].iloc[-1])
 
-                quote = MarketQuote(
-                    symbol=symbol,
-                    price=float(price),
-                    currency=info.get("currency") or "USD",
-                    as_of=datetime.utcnow(),
-                    provider="yfinance",
-                    from_cache=False,
-                    ttl_seconds=ttl,
-                )
-                return _ProviderResult(quote=quote, ttl_seconds=ttl)
-            except Exception as e:
-                last_err = e
-                sleep_s = min(8.0, 0.8 * (2 ** (attempt - 1)))
-                time.sleep(sleep_s)
+        quote = MarketQuote(
+            symbol=symbol,
+            price=float(price),
+            currency=info.get("currency") or "USD",
+            as_of=datetime.utcnow(),
+            provider="yfinance",
+            from_cache=False,
+            ttl_seconds=ttl,
+        )
+        return _ProviderResult(quote=quote, ttl_seconds=ttl)
 
-        raise MarketDataError(f"yfinance failed for {symbol}: {last_err}")
+    def _quotes_yfinance(self, symbols: List[str],
+                         ttl: int) -> Tuple[Dict[str, _ProviderResult], Dict[str, Exception]]:
+        try:
+            import yfinance as yf
+        except Exception as e:
+            raise ProviderUnavailable("yfinance not installed. pip install yfinance") from e
 
-    def _history_yfinance(self, symbol: str, period: str, interval: str) -> PriceSeries:
+        # One download for all symbols; last non-empty daily close is the quote.
+        hist = yf.download(
+            tickers=" ".join(symbols),
+            period="5d",
+            interval="1d",
+            group_by="column",
+            auto_adjust=False,
+            progress=False,
+            threads=False,
+        )
+        if hist is None or hist.empty:
+            raise MarketDataError(f"yfinance batch returned no data for {len(symbols)} symbols")
+
+        close = hist["Close"]
+        if not hasattr(close, "columns"):
+            # single ticker on older yfinance: flat columns
+            close = close.to_frame(name=symbols[0])
+
+        results: Dict[str, _ProviderResult] = {}
+        errors: Dict[str, Exception] = {}
+        for sym in symbols:
+            col = close[sym].dropna() if sym in close.columns else None
+            if col is None or col.empty:
+                errors[sym] = SymbolNotFound(f"No data for {sym}")
+                continue
+            quote = MarketQuote(
+                symbol=sym,
+                price=float(col.iloc[-1]),
+                currency="USD",
+                as_of=datetime.utcnow(),
+                provider="yfinance",
+                from_cache=False,
+                ttl_seconds=ttl,
+            )
+            results[sym] = _ProviderResult(quote=quote, ttl_seconds=ttl)
+        return results, errors
+
+    def _history_yfinance(self, symbol: str, period: str, interval: str, start: Optional[date] = None) -> ArrayPriceSeries:
         try:
             import yfinance as yf
         except Exception as e:
             raise ProviderUnavailable("yfinance not installed. pip install yfinance") from e
 
-        last_err: Optional[Exception] = None
-        for attempt in range(1, self.retries + 1):
-            try:
-                t = yf.Ticker(symbol)
-                hist = t.history(period=period, interval=interval)
-                if hist is None or hist.empty:
-                    raise SymbolNotFound(f"No history for {symbol}")
-
-                dates = [d.to_pydatetime().date().isoformat() for d in hist.index]
-                close = [float(x) for x in hist["Close"].tolist()]
-                return PriceSeries(
-                    symbol=symbol,
-                    dates=dates,
-                    close=close,
-                    as_of=datetime.utcnow(),
-                    provider="yfinance",
-                    from_cache=False,
-                )
-            except Exception as e:
-                last_err = e
-                sleep_s = min(8.0, 0.8 * (2 ** (attempt - 1)))
-                time.sleep(sleep_s)
+        t = yf.Ticker(symbol)
+        if start is not None:
+            hist = t.history(start=start.isoformat(), interval=interval)
+        else:
+            hist = t.history(period=period, interval=interval)
+        if hist is None or hist.empty:
+            raise SymbolNotFound(f"No history for {symbol}")
 
-        raise MarketDataError(f"yfinance history failed for {symbol}: {last_err}")
+        return ArrayPriceSeries.from_frame(symbol, hist, as_of=datetime.utcnow(), provider="yfinance", from_cache=False)
 
     # -----------------------------
     # Providers: Stooq (free CSV) - backup
     # -----------------------------
-    def _quote_stooq(self, symbol: str, ttl: int) -> _ProviderResult:
+    @staticmethod
+    def _stooq_symbol(symbol: str) -> str:
         # Stooq uses symbols like aapl.us. We'll try to be helpful.
         sym = symbol.lower()
         if "." not in sym:
             sym = f"{sym}.us"
+        return sym
+
+    def _quote_stooq(self, symbol: str, ttl: int) -> _ProviderResult:
+        sym = self._stooq_symbol(symbol)
         url = f"https://stooq.com/q/l/?s={sym}&f=sd2t2ohlcv&h&e=csv"
 
-        text = self._request_text_with_retries(url)
+        text = self._request_text(url)
         # CSV header: Symbol,Date,Time,Open,High,Low,Close,Volume
         lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
         if len(lines) < 2:
@@ -289,13 +702,49 @@ class MarketDataService:
         )
         return _ProviderResult(quote=quote, ttl_seconds=ttl)
 
-    def _history_stooq(self, symbol: str) -> PriceSeries:
-        # Daily history CSV
-        sym = symbol.lower()
-        if "." not in sym:
-            sym = f"{sym}.us"
+    def _quotes_stooq(self, symbols: List[str],
+                      ttl: int) -> Tuple[Dict[str, _ProviderResult], Dict[str, Exception]]:
+        results: Dict[str, _ProviderResult] = {}
+        errors: Dict[str, Exception] = {}
+        for i in range(0, len(symbols), _STOOQ_BATCH_SIZE):
+            chunk = {self._stooq_symbol(s): s for s in symbols[i : i + _STOOQ_BATCH_SIZE]}
+            url = f"https://stooq.com/q/l/?s={','.join(chunk)}&f=sd2t2ohlcv&h&e=csv"
+            text = self._request_text(url)
+
+            # CSV header: Symbol,Date,Time,Open,High,Low,Close,Volume (one row per symbol)
+            lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+            for ln in lines[1:]:
+                parts = ln.split(",")
+                sym = chunk.get(parts[0].lower()) if parts else None
+                if sym is None or len(parts) < 8 or "N/D" in (parts[1], parts[6]):
+                    continue
+                try:
+                    close = float(parts[6])
+                except ValueError:
+                    continue
+                quote = MarketQuote(
+                    symbol=sym,
+                    price=close,
+                    currency="USD",
+                    as_of=datetime.utcnow(),
+                    provider="stooq",
+                    from_cache=False,
+                    ttl_seconds=ttl,
+                )
+                results[sym] = _ProviderResult(quote=quote, ttl_seconds=ttl)
+
+            for sym in chunk.values():
+                if sym not in results:
+                    errors[sym] = SymbolNotFound(f"Stooq no data for {sym}")
+        return results, errors
+
+    def _history_stooq(self, symbol: str, start: Optional[date] = None) -> ArrayPriceSeries:
+        # Daily history CSV (always full history unless a start date narrows it)
+        sym = self._stooq_symbol(symbol)
         url = f"https://stooq.com/q/d/l/?s={sym}&i=d"
-        text = self._request_text_with_retries(url)
+        if start is not None:
+            url += f"&d1={start.strftime('%Y%m%d')}&d2={datetime.now(timezone.utc).strftime('%Y%m%d')}"
+        text = self._request_text(url)
         lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
         if len(lines) < 2:
             raise SymbolNotFound(f"Stooq returned no history for {symbol}")
@@ -313,7 +762,7 @@ class MarketDataService:
         if not dates:
             raise SymbolNotFound(f"Stooq returned empty history for {symbol}")
 
-        return PriceSeries(
+        return ArrayPriceSeries(
             symbol=symbol,
             dates=dates,
             close=close,
@@ -323,49 +772,15 @@ class MarketDataService:
         )
 
     # -----------------------------
-    # HTTP helpers with retries
+    # HTTP helpers (single attempt; retries come from self.retry_policy)
     # -----------------------------
-    def _request_json_with_retries(self, url: str, *, params: dict) -> dict:
-        last_err: Optional[Exception] = None
-        for attempt in range(1, self.retries + 1):
-            try:
-                r = self.session.get(url, params=params, timeout=self.timeout)
-                # AlphaVantage sometimes returns 200 with error JSON
-                r.raise_for_status()
-                return r.json()
-            except requests.HTTPError as e:
-                last_err = e
-                code = getattr(e.response, "status_code", None)
-                if code in (429, 500, 502, 503, 504):
-                    time.sleep(min(8.0, 0.8 * (2 ** (attempt - 1))))
-                    continue
-                raise
-            except (requests.Timeout, requests.ConnectionError) as e:
-                last_err = e
-                time.sleep(min(8.0, 0.8 * (2 ** (attempt - 1))))
-            except Exception as e:
-                last_err = e
-                time.sleep(min(8.0, 0.8 * (2 ** (attempt - 1))))
-        raise MarketDataError(f"HTTP JSON request failed: {last_err}")
-
-    def _request_text_with_retries(self, url: str) -> str:
-        last_err: Optional[Exception] = None
-        for attempt in range(1, self.retries + 1):
-            try:
-                r = self.session.get(url, timeout=self.timeout)
-                r.raise_for_status()
-                return r.text
-            except requests.HTTPError as e:
-                last_err = e
-                code = getattr(e.response, "status_code", None)
-                if code in (429, 500, 502, 503, 504):
-                    time.sleep(min(8.0, 0.8 * (2 ** (attempt - 1))))
-                    continue
-                raise
-            except (requests.Timeout, requests.ConnectionError) as e:
-                last_err = e
-                time.sleep(min(8.0, 0.8 * (2 ** (attempt - 1))))
-            except Exception as e:
-                last_err = e
-                time.sleep(min(8.0, 0.8 * (2 ** (attempt - 1))))
-        raise MarketDataError(f"HTTP text request failed: {last_err}")
+    def _request_json(self, url: str, *, params: dict) -> dict:
+        r = self.session.get(url, params=params, timeout=self.timeout)
+        # AlphaVantage sometimes returns 200 with error JSON
+        r.raise_for_status()
+        return r.json()
+
+    def _request_text(self, url: str) -> str:
+        r = self.session.get(url, timeout=self.timeout)
+        r.raise_for_status()
+        return r.text
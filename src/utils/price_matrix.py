@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Sequence
+
+import numpy as np
+
+from src.utils.logging import get_logger
+
+logger = get_logger("price_matrix")
+
+
+@dataclass(frozen=True)
+class CloseMatrix:
+    """Closes of several symbols on one shared date axis (rows = dates, columns = symbols)."""
+    symbols: List[str]
+    dates: np.ndarray  # datetime64[D], ascending
+    close: np.ndarray  # float64, shape (len(dates), len(symbols)), no NaN
+
+    def returns(self, *, log: bool = False) -> np.ndarray:
+        """Period-over-period returns, shape (len(dates) - 1, len(symbols))."""
+        if log:
+            return np.diff(np.log(self.close), axis=0)
+        return self.close[1:] / self.close[:-1] - 1.0
+
+
+def align_closes(series: Sequence[Any], *, max_ffill_gap: int = 3) -> CloseMatrix:
+    """
+    Put (Array)PriceSeries on the union of their dates.
+    A symbol missing a date (holiday on its exchange, a gap in the feed) carries its last close forward
+    for up to `max_ffill_gap` rows. Dates that are still incomplete are dropped: the leading rows before
+    every symbol has started, and any longer gaps.
+    """
+    if not series:
+        return CloseMatrix(symbols=[], dates=np.empty(0, dtype="datetime64[D]"), close=np.empty((0, 0)))
+    cols = []
+    for s in series:
+        d = np.asarray(s.dates, dtype="datetime64[D]")
+        c = np.asarray(s.close, dtype=np.float64)
+        ok = np.isfinite(c) & (c > 0)
+        cols.append((d[ok], c[ok]))
+    dates = np.unique(np.concatenate([d for d, _ in cols]))
+    mat = np.full((dates.shape[0], len(cols)), np.nan)
+    for j, (d, c) in enumerate(cols):
+        mat[np.searchsorted(dates, d), j] = c
+
+    # forward fill with a gap limit: index of the last valid row at or before each row
+    valid = ~np.isnan(mat)
+    rows = np.arange(dates.shape[0])[:, None]
+    last = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    fill = (last >= 0) & (rows - last <= max_ffill_gap)
+    filled = np.where(fill, mat[np.maximum(last, 0), np.arange(len(cols))], np.nan)
+
+    keep = ~np.isnan(filled).any(axis=1)
+    dropped = int(dates.shape[0] - keep.sum())
+    if dropped:
+        logger.info(f"align_closes_dropped rows={dropped} kept={int(keep.sum())} symbols={len(cols)}")
+    return CloseMatrix(symbols=[s.symbol for s in series], dates=dates[keep], close=filled[keep])
+
+
+def load_close_matrix(market_data: Any, symbols: Sequence[str], *, period: str = "1y", interval: str = "1d",
+                      max_ffill_gap: int = 3, max_workers: int = 8,
+                      force_refresh: bool = False) -> CloseMatrix:
+    """Fetch `symbols` through MarketDataService.get_history_close (concurrently) and align them."""
+    syms: List[str] = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+    if not syms:
+        raise ValueError("no symbols given")
+
+    def one(sym: str) -> Any:
+        return market_data.get_history_close(sym, period=period, interval=interval, force_refresh=force_refresh)
+
+    workers = max(1, min(max_workers, len(syms)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        series = list(ex.map(one, syms))
+    return align_closes(series, max_ffill_gap=max_ffill_gap)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from src.core.config import SETTINGS
+from src.utils.logging import get_logger
+
+logger = get_logger("provider_health")
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker for one provider.
+    - closed: calls flow; `failure_threshold` consecutive failures open it
+    - open: calls are rejected until `reset_timeout_seconds` has passed
+    - half_open: a single trial call is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, *, failure_threshold: int = 5, reset_timeout_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout_seconds = float(reset_timeout_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.reset_timeout_seconds:
+                return CircuitState.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (claims the half-open trial slot if so)."""
+        with self._lock:
+            if self._state == CircuitState.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout_seconds:
+                    return False
+                self._transition(CircuitState.HALF_OPEN)
+            if self._state == CircuitState.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != CircuitState.CLOSED:
+                self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+            self._failures += 1
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                if self._state != CircuitState.OPEN:
+                    self._transition(CircuitState.OPEN)
+
+    def release(self) -> None:
+        """Give back a claimed trial slot without a verdict (the call was cancelled, not answered)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _transition(self, new: CircuitState) -> None:
+        logger.warning(f"circuit_state provider={self.name} from={self._state.value} to={new.value} failures={self._failures}")
+        self._state = new
+
+
+class ProviderHealth:
+    """Rolling window of (latency, ok) samples for one provider."""
+
+    def __init__(self, window: int = 100) -> None:
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=max(1, int(window)))
+        self._lock = threading.Lock()
+
+    def record(self, latency_seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((float(latency_seconds), bool(ok)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return {"calls": 0, "error_rate": 0.0, "latency_p50_ms": None, "latency_p95_ms": None}
+        lat = sorted(s[0] for s in samples)
+        errors = sum(1 for s in samples if not s[1])
+        return {
+            "calls": len(samples),
+            "error_rate": round(errors / len(samples), 4),
+            "latency_p50_ms": round(_percentile(lat, 0.50) * 1000.0, 1),
+            "latency_p95_ms": round(_percentile(lat, 0.95) * 1000.0, 1),
+        }
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    # nearest-rank on an already sorted list
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+_STATE_RANK = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+class ProviderScoreboard:
+    """
+    Breakers + rolling health per provider, shared by every MarketDataService in the process.
+    `rank` orders providers healthy-first; ties keep the configured primary/fallback order.
+    """
+
+    def __init__(self, *, window: int = 100, failure_threshold: int = 5, reset_timeout_seconds: float = 60.0,
+                 slow_p95_seconds: float = 10.0) -> None:
+        self.window = int(window)
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout_seconds = float(reset_timeout_seconds)
+        self.slow_p95_seconds = float(slow_p95_seconds)
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._health: Dict[str, ProviderHealth] = {}
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            b = self._breakers.get(provider)
+            if b is None:
+                b = CircuitBreaker(provider, failure_threshold=self.failure_threshold,
+                                   reset_timeout_seconds=self.reset_timeout_seconds)
+                self._breakers[provider] = b
+                self._health[provider] = ProviderHealth(self.window)
+            return b
+
+    def health(self, provider: str) -> ProviderHealth:
+        self.breaker(provider)
+        return self._health[provider]
+
+    def allow(self, provider: str) -> bool:
+        return self.breaker(provider).allow()
+
+    def record(self, provider: str, latency_seconds: float, ok: bool) -> None:
+        self.health(provider).record(latency_seconds, ok)
+        if ok:
+            self.breaker(provider).record_success()
+        else:
+            self.breaker(provider).record_failure()
+
+    def release(self, provider: str) -> None:
+        self.breaker(provider).release()
+
+    def rank(self, providers: Iterable[str]) -> List[str]:
+        ordered = list(dict.fromkeys(providers))
+
+        def key(item: Tuple[int, str]) -> Tuple[int, float, bool, int]:
+            pos, p = item
+            st = self.health(p).stats()
+            p95 = st["latency_p95_ms"]
+            slow = p95 is not None and p95 / 1000.0 > self.slow_p95_seconds
+            return _STATE_RANK[self.breaker(p).state], round(st["error_rate"], 1), slow, pos
+
+        return [p for _, p in sorted(enumerate(ordered), key=key)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            names = list(self._breakers)
+        out: Dict[str, Dict[str, Any]] = {}
+        for p in names:
+            st = self.health(p).stats()
+            st["state"] = self.breaker(p).state.value
+            out[p] = st
+        return out
+
+
+_SCOREBOARD: Optional[ProviderScoreboard] = None
+_SCOREBOARD_LOCK = threading.Lock()
+
+
+def get_scoreboard() -> ProviderScoreboard:
+    """Process-wide scoreboard (services are short-lived; provider health is not)."""
+    global _SCOREBOARD
+    with _SCOREBOARD_LOCK:
+        if _SCOREBOARD is None:
+            _SCOREBOARD = ProviderScoreboard(
+                window=SETTINGS.market_health_window,
+                failure_threshold=SETTINGS.market_breaker_failure_threshold,
+                reset_timeout_seconds=SETTINGS.market_breaker_reset_seconds,
+                slow_p95_seconds=float(SETTINGS.market_timeout_seconds),
+            )
+        return _SCOREBOARD
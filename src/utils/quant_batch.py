@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.quant_engine import (
+    EQUITY_LIKE, _contribution_factor_array, _d, _risk_bucket, _safe_float, allocation_summary,
+    compute_goal_projection, compute_portfolio_metrics,
+)
+from src.utils.quant_models import GoalInput, Holding, PortfolioInput
+
+# Batch (columnar) versions of compute_goal_projection / compute_portfolio_metrics.
+# Rows come back as the same dicts the single-item tools return (`.model_dump()`), built directly
+# rather than through per-row models. The float64 kernels flag rows whose cent rounding (or a
+# comparison) sits too close to a boundary to trust; those rows go through the Decimal reference.
+
+# relative error budget of the float64 kernels vs the 28-digit Decimal reference (measured <= 1e-14)
+_REL_TOL = 1e-12
+_SCENARIO_SHIFT = Decimal("0.03")
+
+_GOAL_DEFAULTS = {k: f.default for k, f in GoalInput.model_fields.items() if not f.is_required()}
+
+def _columns(data: Any) -> Dict[str, Any]:
+    """DataFrame / mapping of equal-length columns -> {name: column}."""
+    if hasattr(data, "to_dict") and hasattr(data, "columns"):
+        return {str(c): data[c].to_numpy() for c in data.columns}
+    if isinstance(data, Mapping):
+        return dict(data)
+    raise TypeError("expected a DataFrame or a mapping of column name -> array")
+
+def _num(cols: Dict[str, Any], name: str, n: int, *, positive: bool = False) -> np.ndarray:
+    if name in cols:
+        arr = np.asarray(cols[name], dtype=np.float64)
+        if arr.shape != (n,):
+            raise ValueError(f"column {name} has shape {arr.shape}, expected ({n},)")
+    elif name in _GOAL_DEFAULTS:
+        arr = np.full(n, float(_GOAL_DEFAULTS[name]))
+    else:
+        raise ValueError(f"missing required column: {name}")
+    bad = ~np.isfinite(arr) | ((arr <= 0) if positive else (arr < 0))
+    if bad.any():
+        rows = np.flatnonzero(bad)[:5].tolist()
+        raise ValueError(f"column {name} must be {'> 0' if positive else '>= 0'} and finite (rows {rows})")
+    return arr
+
+def _text(cols: Dict[str, Any], name: str, n: int, default: str) -> List[str]:
+    if name not in cols:
+        return [default] * n
+    return [str(x) for x in np.asarray(cols[name], dtype=object).tolist()]
+
+def _cents(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(_safe_float(x) for each x, mask of values too close to a half cent to round in float)."""
+    y = x * 100.0
+    near = np.abs(y - np.floor(y) - 0.5) <= _REL_TOL * np.maximum(np.abs(y), 1.0)
+    return np.rint(y) / 100.0, near
+
+def _shifted_rates(r: np.ndarray, sign: int) -> Dict[float, float]:
+    """float(max(0, Decimal(r) +/- 0.03)) per distinct rate (Decimal keeps e.g. 0.07 - 0.03 == 0.04 exact)."""
+    out = {}
+    for v in np.unique(r).tolist():
+        s = _d(v) + sign * _SCENARIO_SHIFT
+        out[v] = float(max(Decimal(0), s))
+    return out
+
+def _fan_out(fn: Callable[..., List[Any]], chunks: Sequence[Any], workers: Optional[int]) -> List[Any]:
+    if not workers or workers <= 1 or len(chunks) <= 1:
+        return [row for c in chunks for row in fn(*c)]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return [row for part in ex.map(fn, *zip(*chunks)) for row in part]
+
+# -----------------------------
+# Goals
+# -----------------------------
+
+_GOAL_NUMERIC = ("target_amount", "years", "current_savings", "monthly_contribution",
+                 "expected_return_annual", "inflation_annual", "stepup_annual_pct")
+
+def compute_goal_projections_batch(
+    goals: Any,
+    *,
+    workers: Optional[int] = None,
+    chunk_size: int = 50_000,
+) -> List[Dict[str, Any]]:
+    """
+    compute_goal_projection(...).model_dump() for many goals at once.
+    `goals` is a DataFrame or mapping of equal-length numeric columns named like GoalInput fields
+    (target_amount and years required; `currency` may be a string column). `workers` > 1 splits the
+    rows into `chunk_size` slices computed in a process pool. Output order follows the input rows.
+    """
+    cols = _columns(goals)
+    n = len(np.asarray(cols.get("target_amount", ())))
+    arrays = {k: _num(cols, k, n, positive=k in ("target_amount", "years")) for k in _GOAL_NUMERIC}
+    currency = _text(cols, "currency", n, _GOAL_DEFAULTS["currency"])
+    step = max(1, int(chunk_size))
+    chunks = [
+        ({k: v[i:i + step] for k, v in arrays.items()}, currency[i:i + step])
+        for i in range(0, n, step)
+    ]
+    return _fan_out(_goal_rows, chunks, workers)
+
+def _goal_fv(current: np.ndarray, monthly: np.ndarray, n: np.ndarray, r: np.ndarray,
+             stepup: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    log_g = np.log1p(r) / 12.0
+    fv0 = current * np.exp(n * log_g)
+    factor = _contribution_factor_array(n, np.expm1(log_g), stepup)
+    return fv0, factor, fv0 + monthly * factor
+
+def _goal_rows(a: Dict[str, np.ndarray], currency: List[str]) -> List[Dict[str, Any]]:
+    target, years, current, monthly = a["target_amount"], a["years"], a["current_savings"], a["monthly_contribution"]
+    r, inf, stepup = a["expected_return_annual"], a["inflation_annual"], a["stepup_annual_pct"]
+
+    # n_months = years*12 rounded half-up (a decimal .5 may land either side in binary: flag it)
+    ym = years * 12.0
+    n = np.floor(ym + 0.5).astype(np.int64)
+    exact = np.abs(ym - np.floor(ym) - 0.5) <= _REL_TOL * np.maximum(ym, 1.0)
+
+    deflate = np.where(inf > 0, np.power(1.0 + inf, years), 1.0)
+    fv0, factor, fv = _goal_fv(current, monthly, n, r, stepup)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        req = np.where(fv0 >= target, 0.0, np.where(factor > 0, (target - fv0) / np.where(factor > 0, factor, 1.0), 0.0))
+    exact |= np.abs(fv0 - target) <= _REL_TOL * target
+
+    r_low = np.maximum(r - 0.03, 0.0)
+    r_high = r + 0.03
+    scen = []
+    for rs in (r_low, r, r_high):
+        fv_s = _goal_fv(current, monthly, n, rs, stepup)[2]
+        scen.append((fv_s, fv_s / deflate))
+
+    rounded = []
+    for x in (target, fv, fv / deflate, req) + tuple(v for pair in scen for v in pair):
+        c, near = _cents(x)
+        rounded.append(c.tolist())
+        exact |= near
+    t_c, fv_c, real_c, req_c = rounded[:4]
+    scen_c = rounded[4:]
+    low_rate, high_rate = _shifted_rates(r, -1), _shifted_rates(r, +1)
+
+    cols = {k: v.tolist() for k, v in a.items()}
+    n_l, exact_l = n.tolist(), exact.tolist()
+    out: List[Dict[str, Any]] = []
+    for i in range(len(n_l)):
+        if exact_l[i]:
+            out.append(compute_goal_projection(GoalInput(currency=currency[i], **{k: v[i] for k, v in cols.items()})).model_dump())
+            continue
+        ri = cols["expected_return_annual"][i]
+        rates = (low_rate[ri], ri, high_rate[ri])
+        warnings: List[str] = []
+        data_quality: Dict[str, str] = {}
+        if n_l[i] <= 0 and req_c[i] == 0.0 and fv0[i] < target[i]:
+            warnings.append("Horizon is under one month; monthly contributions cannot close the gap.")
+            data_quality["horizon_months"] = "0"
+        out.append(dict(
+            currency=currency[i],
+            target_amount=t_c[i],
+            years=cols["years"][i],
+            assumptions={
+                "expected_return_annual": ri,
+                "inflation_annual": cols["inflation_annual"][i],
+                "stepup_annual_pct": cols["stepup_annual_pct"][i],
+            },
+            projected_amount=fv_c[i],
+            real_value_today=real_c[i],
+            required_monthly_for_target=req_c[i],
+            scenarios=[
+                dict(
+                    label=label,
+                    expected_return_annual=rates[j],
+                    projected_amount=scen_c[2 * j][i],
+                    real_value_today=scen_c[2 * j + 1][i],
+                )
+                for j, label in enumerate(("low", "base", "high"))
+            ],
+            monte_carlo=None,
+            schedule=None,
+            warnings=warnings,
+            data_quality=data_quality,
+        ))
+    return out
+
+# -----------------------------
+# Portfolios
+# -----------------------------
+
+def compute_portfolio_metrics_batch(
+    holdings: Any,
+    prices: Optional[Dict[str, float]] = None,
+    *,
+    portfolios: Any = None,
+    include_cash_row: bool = True,
+    workers: Optional[int] = None,
+    chunk_size: int = 5_000,
+    audit: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    compute_portfolio_metrics(..., audit=audit).model_dump() for many portfolios sharing one price map.
+    - `holdings`: long table, one row per position: portfolio_id, symbol, quantity, asset_type (optional)
+    - `portfolios`: one row per portfolio: portfolio_id, cash and currency (both optional); defaults to the
+      ids found in `holdings`, in order of first appearance, with no cash
+    Output follows the `portfolios` order. `workers` > 1 fans `chunk_size` portfolios out to a process pool.
+    """
+    h = _columns(holdings)
+    pid_h = np.asarray(h.get("portfolio_id", ()), dtype=object)
+    m = pid_h.shape[0]
+    sym = _text(h, "symbol", m, "")
+    qty = np.asarray(h["quantity"], dtype=np.float64) if "quantity" in h else np.zeros(m)
+    if qty.shape != (m,) or (~np.isfinite(qty) | (qty < 0)).any():
+        raise ValueError("column quantity must be >= 0, finite and as long as portfolio_id")
+    atype = _text(h, "asset_type", m, "other")
+    allowed = set(Holding.model_fields["asset_type"].annotation.__args__)
+    unknown = sorted(set(atype) - allowed)
+    if unknown:
+        raise ValueError(f"unknown asset_type values: {unknown}")
+
+    if portfolios is None:
+        ids = list(dict.fromkeys(pid_h.tolist()))
+        cash = np.zeros(len(ids))
+        currency = ["USD"] * len(ids)
+    else:
+        p = _columns(portfolios)
+        ids = np.asarray(p["portfolio_id"], dtype=object).tolist()
+        cash = np.asarray(p["cash"], dtype=np.float64) if "cash" in p else np.zeros(len(ids))
+        if (~np.isfinite(cash) | (cash < 0)).any():
+            raise ValueError("column cash must be >= 0 and finite")
+        currency = _text(p, "currency", len(ids), "USD")
+    index = {pid: i for i, pid in enumerate(ids)}
+    if len(index) != len(ids):
+        raise ValueError("portfolio_id values must be unique")
+    try:
+        owner = np.fromiter((index[x] for x in pid_h.tolist()), dtype=np.int64, count=m)
+    except KeyError as e:
+        raise ValueError(f"holding references unknown portfolio_id {e.args[0]!r}") from None
+
+    # group holdings by portfolio (stable, so each portfolio keeps its input order)
+    order = np.argsort(owner, kind="stable")
+    bounds = np.searchsorted(owner[order], np.arange(len(ids) + 1))
+    qty_l = qty[order].tolist()
+    sym_l = [sym[j] for j in order.tolist()]
+    type_l = [atype[j] for j in order.tolist()]
+    cash_l = cash.tolist()
+    bounds_l = bounds.tolist()
+    step = max(1, int(chunk_size))
+    chunks = []
+    for s in range(0, len(ids), step):
+        e = min(s + step, len(ids))
+        lo, hi = bounds_l[s], bounds_l[e]
+        chunks.append((
+            sym_l[lo:hi], qty_l[lo:hi], type_l[lo:hi], [b - lo for b in bounds_l[s:e + 1]],
+            cash_l[s:e], currency[s:e], dict(prices or {}), include_cash_row, audit,
+        ))
+    return _fan_out(_portfolio_rows, chunks, workers)
+
+def _portfolio_rows(sym: List[str], qty: List[float], atype: List[str], bounds: List[int], cash: List[float],
+                    currency: List[str], prices: Dict[str, float], include_cash_row: bool,
+                    audit: bool) -> List[Dict[str, Any]]:
+    # Values come from one vectorized quantity * price over the chunk and go through the same float64 summary
+    # as compute_portfolio_metrics (or its Decimal audit path). Portfolios with warnings (missing prices,
+    # empty symbols, zero total) go through the reference as-is.
+    sym = [s.strip() for s in sym]
+    px = np.array([prices.get(s, np.nan) if s else np.nan for s in sym], dtype=np.float64)
+    priced = ~np.isnan(px)
+    q, p = np.asarray(qty, dtype=np.float64), np.where(priced, px, 0.0)
+    values = np.where(p >= 0, q * p, 0.0)
+    value_dec = [_d(a) * _d(b) if b >= 0 else Decimal(0) for a, b in zip(qty, p.tolist())] if audit else None
+    out: List[Dict[str, Any]] = []
+    for k in range(len(cash)):
+        lo, hi = bounds[k], bounds[k + 1]
+        if not priced[lo:hi].all():
+            summary = None
+        elif audit:
+            summary = _decimal_summary(sym[lo:hi], atype[lo:hi], value_dec[lo:hi], cash[k], include_cash_row)
+        else:
+            summary = allocation_summary(sym[lo:hi], atype[lo:hi], values[lo:hi], cash[k],
+                                         include_cash_row=include_cash_row)
+        if summary is None:
+            out.append(compute_portfolio_metrics(_portfolio_input(sym, qty, atype, lo, hi, cash[k], currency[k]),
+                                                 prices=prices, include_cash_row=include_cash_row,
+                                                 audit=audit).model_dump())
+            continue
+        out.append(dict(currency=currency[k], **summary, risk=None, warnings=[], data_quality={}))
+    return out
+
+def _decimal_summary(sym: List[str], atype: List[str], value_dec: List[Decimal], cash: float,
+                     include_cash_row: bool) -> Optional[Dict[str, Any]]:
+    """allocation_summary with the audit path's Decimal values and weights."""
+    cash_dec = _d(cash)
+    total = cash_dec + sum(value_dec, Decimal(0))
+    if total <= 0:
+        return None
+    rows_sym, rows_type = sym, atype
+    rows_val = [float(v) for v in value_dec]
+    if include_cash_row and cash > 0:
+        rows_sym, rows_type = rows_sym + ["CASH"], rows_type + ["cash"]
+        rows_val.append(float(cash_dec))
+    w_l = [float(Decimal(str(v)) / total) for v in rows_val]
+    ranked = np.argsort(-np.asarray(w_l), kind="stable").tolist()
+    allocs = [dict(symbol=rows_sym[j], asset_type=rows_type[j], value=rows_val[j], weight=w_l[j]) for j in ranked]
+    top = [dict(a) for a in allocs if a["symbol"] != "CASH"][:10]
+    top_w = [a["weight"] for a in top]
+    c1, c3, c5 = (float(sum(top_w[:n])) if top else 0.0 for n in (1, 3, 5))
+    hhi = sum([x ** 2 for x in w_l])
+    eff_n = (1.0 / hhi) if hhi > 0 else 0.0
+    equity_like = sum([w_l[j] for j in range(len(w_l)) if rows_type[j] in EQUITY_LIKE])
+    return dict(
+        total_value=_safe_float(total),
+        allocations=allocs,
+        top_holdings=top,
+        concentration_top1=round(c1, 4),
+        concentration_top3=round(c3, 4),
+        concentration_top5=round(c5, 4),
+        diversification_effective_n=round(eff_n, 4),
+        risk_bucket=_risk_bucket(equity_like),
+    )
+
+def _portfolio_input(sym: List[str], qty: List[float], atype: List[str], lo: int, hi: int,
+                     cash: float, currency: str) -> PortfolioInput:
+    return PortfolioInput(
+        currency=currency,
+        cash=cash,
+        holdings=[{"symbol": sym[j], "quantity": qty[j], "asset_type": atype[j]} for j in range(lo, hi)],
+    )
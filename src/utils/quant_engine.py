@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import math
+import threading
 from decimal import Decimal, getcontext
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from src.utils.quant_models import (
     PortfolioInput, PortfolioMetrics, AllocationRow,
-    GoalInput, GoalProjection, ScenarioRow
+    GoalInput, GoalProjection, ScenarioRow, GoalMonteCarlo, MonteCarloBand, ScheduleRow
 )
 
 getcontext().prec = 28
@@ -23,25 +28,281 @@ def _monthly_rate(r_annual: Decimal) -> Decimal:
         raise ValueError("expected_return_annual cannot be negative")
     return (Decimal(1) + r_annual) ** (Decimal(1) / Decimal(12)) - Decimal(1)
 
+def _contribution_factor(n_months: int, mr: Decimal, stepup_annual_pct: Decimal) -> Decimal:
+    """
+    FV of contributing 1/month for n months (end of month), stepped up by `stepup` every 12 months.
+    With g = 1+mr, G = g^12, S = 1+stepup, n = 12K + r and a_k = (g^k - 1)/(g - 1):
+        C(n) = a_12 * g^r * (G^K - S^K) / (G - S) + S^K * a_r
+    (full years as a geometric series in G/S, plus the partial final year).
+    """
+    if n_months <= 0:
+        return Decimal(0)
+    g = Decimal(1) + mr
+    S = Decimal(1) + stepup_annual_pct if stepup_annual_pct > 0 else Decimal(1)
+    K, r = divmod(n_months, 12)
+
+    def a(k: int) -> Decimal:
+        return Decimal(k) if mr == 0 else (g ** k - Decimal(1)) / mr
+
+    G = g ** 12
+    d = S / G - Decimal(1)
+    if abs(d) < Decimal("1e-14"):
+        # G ~ S: the difference form cancels catastrophically; use the limit K*G^(K-1) with its first-order term
+        years = Decimal(K) * G ** (K - 1) * (Decimal(1) + d * Decimal(K - 1) / Decimal(2))
+    else:
+        years = (G ** K - S ** K) / (G - S)
+    return a(12) * g ** r * years + S ** K * a(r)
+
 def _future_value(current: Decimal, monthly: Decimal, n_months: int, mr: Decimal, stepup_annual_pct: Decimal) -> Decimal:
     if n_months <= 0:
         return current
+    return current * ((Decimal(1) + mr) ** n_months) + monthly * _contribution_factor(n_months, mr, stepup_annual_pct)
+
+# -----------------------------
+# NumPy fast path (bulk / UI use; the Decimal functions above stay the reference for display)
+# -----------------------------
+
+def _contribution_factor_array(n_months: np.ndarray, mr: np.ndarray, stepup: np.ndarray) -> np.ndarray:
+    """Float64 C(n) from _contribution_factor, broadcast over arrays."""
+    n = np.asarray(n_months, dtype=np.int64)
+    mr = np.asarray(mr, dtype=np.float64)
+    S = 1.0 + np.maximum(np.asarray(stepup, dtype=np.float64), 0.0)
+    K, r = np.divmod(np.maximum(n, 0), 12)
+    log_g = np.log1p(mr)
+    flat = np.abs(mr) < 1e-15
+    safe_mr = np.where(flat, 1.0, mr)
+    a12 = np.where(flat, 12.0, np.expm1(12.0 * log_g) / safe_mr)
+    ar = np.where(flat, r, np.expm1(r * log_g) / safe_mr)
+    # sum_{k<K} S^k G^(K-1-k) = G^(K-1) * (q^K - 1)/(q - 1), q = S/G. Taken as expm1(K*log q)/expm1(log q)
+    # with log q formed from the logs (never q - 1), so the ratio stays accurate as q -> 1; limit K at q == 1
+    log_q = np.log(S) - 12.0 * log_g
+    flat_q = log_q == 0.0
+    G_km1 = np.exp((K - 1) * 12.0 * log_g)
+    years = G_km1 * np.where(flat_q, K, np.expm1(K * log_q) / np.expm1(np.where(flat_q, 1.0, log_q)))
+    out = a12 * np.exp(r * log_g) * years + np.exp(K * np.log(S)) * ar
+    return np.where(n > 0, out, 0.0)
+
+def monthly_rate_array(r_annual) -> np.ndarray:
+    r = np.asarray(r_annual, dtype=np.float64)
+    if np.any(r < 0):
+        raise ValueError("expected_return_annual cannot be negative")
+    return np.expm1(np.log1p(r) / 12.0)
+
+def future_value_array(current, monthly, n_months, r_annual, stepup_annual_pct=0.0) -> np.ndarray:
+    """Vectorized _future_value: every argument broadcasts (e.g. one row per goal, or a grid)."""
+    mr = monthly_rate_array(r_annual)
+    n = np.asarray(n_months, dtype=np.int64)
+    growth = np.exp(np.maximum(n, 0) * np.log1p(mr))
+    return (np.asarray(current, dtype=np.float64) * growth
+            + np.asarray(monthly, dtype=np.float64) * _contribution_factor_array(n, mr, stepup_annual_pct))
+
+def required_monthly_array(target, current, n_months, r_annual, stepup_annual_pct=0.0) -> np.ndarray:
+    """Direct solve of FV(monthly) = target; 0 where savings alone get there (or no months remain)."""
+    mr = monthly_rate_array(r_annual)
+    n = np.asarray(n_months, dtype=np.int64)
+    gap = np.asarray(target, dtype=np.float64) - np.asarray(current, dtype=np.float64) * np.exp(np.maximum(n, 0) * np.log1p(mr))
+    C = _contribution_factor_array(n, mr, stepup_annual_pct)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        req = np.where(C > 0, gap / np.where(C > 0, C, 1.0), 0.0)
+    return np.maximum(req, 0.0)
+
+# -----------------------------
+# Projection schedule (streamed in blocks)
+# -----------------------------
+
+SCHEDULE_COLUMNS = ("period", "year", "balance", "contribution", "contributed", "real_value")
+DAYS_PER_YEAR = 365
+
+def _contributed_array(monthly: float, months: np.ndarray, S: float) -> np.ndarray:
+    """Sum of the first `months` contributions: monthly * S^k for each month of year k."""
+    K, r = np.divmod(months, 12)
+    full = 12.0 * K if S == 1.0 else 12.0 * np.expm1(K * math.log(S)) / (S - 1.0)
+    return monthly * (full + r * S ** K)
+
+def iter_projection_schedule(
+    current: float,
+    monthly: float,
+    n_months: int,
+    r_annual: float,
+    stepup_annual_pct: float = 0.0,
+    inflation_annual: float = 0.0,
+    *,
+    granularity: str = "monthly",
+    block: int = 4096,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Month-by-month (or day-by-day) path of the same model as _future_value: contributions at month end,
+    stepped up every 12 months. Yields dicts of equal-length arrays (SCHEDULE_COLUMNS), at most `block`
+    rows each, so a 60-year daily schedule never exists in memory at once.
+    - balance: closed form at each point (no running sum, so blocks are independent)
+    - contribution: paid in that period; contributed: cumulative, excluding `current`
+    - real_value: balance deflated by inflation over the elapsed time
+    Daily points between month ends grow the last month-end balance at the annual rate.
+    """
+    if granularity not in ("monthly", "daily"):
+        raise ValueError("granularity must be 'monthly' or 'daily'")
+    n_months = max(0, int(n_months))
+    S = 1.0 + max(float(stepup_annual_pct), 0.0)
+    log_r = math.log1p(float(r_annual))
+    log_inf = math.log1p(float(inflation_annual))
+    per_year = 12 if granularity == "monthly" else DAYS_PER_YEAR
+    total = n_months if granularity == "monthly" else math.ceil(n_months * DAYS_PER_YEAR / 12)
+    step = max(1, int(block))
+    for lo in range(1, total + 1, step):
+        period = np.arange(lo, min(lo + step, total + 1))
+        year = np.minimum(period / per_year, n_months / 12.0)  # the last day lands on the horizon
+        if granularity == "monthly":
+            months = period
+            prev = period - 1
+        else:
+            # month ends reached by each day (the tiny offset keeps exact month ends from rounding down)
+            months = np.minimum(np.floor(year * 12 + 1e-9).astype(np.int64), n_months)
+            prev = np.floor(np.minimum((period - 1) / per_year, n_months / 12.0) * 12 + 1e-9).astype(np.int64)
+        at_month_end = future_value_array(current, monthly, months, r_annual, stepup_annual_pct)
+        balance = at_month_end * np.exp((year - months / 12.0) * log_r)
+        contributed = _contributed_array(monthly, months, S)
+        yield {
+            "period": period,
+            "year": year,
+            "balance": balance,
+            "contribution": contributed - _contributed_array(monthly, prev, S),
+            "contributed": contributed,
+            "real_value": balance * np.exp(-year * log_inf),
+        }
+
+def projection_schedule(*args: Any, **kwargs: Any) -> Dict[str, np.ndarray]:
+    """iter_projection_schedule collected into one block of columns (for charts)."""
+    blocks = list(iter_projection_schedule(*args, **kwargs))
+    if not blocks:
+        return {c: np.empty(0) for c in SCHEDULE_COLUMNS}
+    return {c: np.concatenate([b[c] for b in blocks]) for c in SCHEDULE_COLUMNS}
+
+# -----------------------------
+# Portfolio metrics
+# -----------------------------
+
+EQUITY_LIKE = ("stock", "etf", "mutual_fund", "crypto")
+
+def _risk_bucket(equity_like: float) -> str:
+    if equity_like >= 0.75:
+        return "high"
+    if equity_like >= 0.40:
+        return "medium"
+    return "low"
 
-    fv = current * ((Decimal(1) + mr) ** n_months)
-    contrib = monthly
+def _empty_metrics(currency: str, warnings: List[str], data_quality: Dict[str, str]) -> PortfolioMetrics:
+    warnings.append("Total portfolio value is 0. Check holdings/prices/cash.")
+    return PortfolioMetrics(
+        currency=currency,
+        total_value=0.0,
+        allocations=[],
+        top_holdings=[],
+        concentration_top1=0.0,
+        concentration_top3=0.0,
+        concentration_top5=0.0,
+        diversification_effective_n=0.0,
+        risk_bucket="low",
+        warnings=warnings,
+        data_quality=data_quality,
+    )
 
-    for m in range(1, n_months + 1):
-        if stepup_annual_pct > 0 and m % 12 == 1 and m != 1:
-            contrib = contrib * (Decimal(1) + stepup_annual_pct)
-        fv += contrib * ((Decimal(1) + mr) ** (n_months - m))
-    return fv
+def allocation_summary(
+    symbols: List[str],
+    asset_types: List[str],
+    values: np.ndarray,
+    cash: float,
+    *,
+    include_cash_row: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Float64 core of compute_portfolio_metrics for holdings already valued (values = quantity * price):
+    the PortfolioMetrics fields from total_value to risk_bucket, with allocation rows as plain dicts.
+    One stable argsort ranks every row (allocations must come back fully sorted), so top-N and the
+    concentrations are prefix sums of that order. None when the total is not positive.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    total = math.fsum((cash, *values.tolist()))
+    if not total > 0:
+        return None
+    if include_cash_row and cash > 0:
+        symbols, asset_types = [*symbols, "CASH"], [*asset_types, "cash"]
+        values = np.append(values, cash)
+    w = values / total
+    # sorted(..., reverse=True) is stable on ties, as is a stable argsort of -w
+    order = np.argsort(-w, kind="stable").tolist()
+    val_l, w_l = values.tolist(), w.tolist()
+    allocations = [dict(symbol=symbols[j], asset_type=asset_types[j], value=val_l[j], weight=w_l[j]) for j in order]
+    top = [dict(a) for a in islice((a for a in allocations if a["symbol"] != "CASH"), 10)]
+    cum = np.cumsum([a["weight"] for a in top]).tolist()
+    c1, c3, c5 = (cum[min(n, len(cum)) - 1] if cum else 0.0 for n in (1, 3, 5))
+    hhi = float(w @ w)
+    eff_n = (1.0 / hhi) if hhi > 0 else 0.0
+    equity_like = float(w[np.isin(np.asarray(asset_types, dtype=object), EQUITY_LIKE)].sum())
+    return dict(
+        total_value=_safe_float(_d(total)),
+        allocations=allocations,
+        top_holdings=top,
+        concentration_top1=round(c1, 4),
+        concentration_top3=round(c3, 4),
+        concentration_top5=round(c5, 4),
+        diversification_effective_n=round(eff_n, 4),
+        risk_bucket=_risk_bucket(equity_like),
+    )
 
 def compute_portfolio_metrics(
     portfolio: PortfolioInput,
     prices: Optional[Dict[str, float]] = None,
     *,
     include_cash_row: bool = True,
+    audit: bool = False,
+) -> PortfolioMetrics:
+    """
+    Values, weights, concentration and HHI in float64 (NumPy, bulk over the holdings).
+    `audit=True` recomputes everything in 28-digit Decimal instead, for reconciliation; same schema.
+    """
+    if audit:
+        return _compute_portfolio_metrics_decimal(portfolio, prices, include_cash_row=include_cash_row)
+    warnings: List[str] = []
+    data_quality: Dict[str, str] = {}
+    prices = prices or {}
+
+    holdings = portfolio.holdings
+    symbols = [(h.symbol or "").strip() for h in holdings]
+    px = [prices.get(sym) for sym in symbols]
+    keep = None
+    if "" in symbols or None in px:
+        keep = []
+        for j, sym in enumerate(symbols):
+            if not sym:
+                warnings.append("Encountered holding with empty symbol; skipped.")
+                data_quality["empty_symbol"] = "present"
+                continue
+            if px[j] is None:
+                warnings.append(f"Missing price for {sym}; valued at 0. Provide prices from MarketDataService.")
+                data_quality[f"missing_price:{sym}"] = "true"
+                px[j] = 0.0
+            keep.append(j)
+        holdings = [holdings[j] for j in keep]
+        symbols = [symbols[j] for j in keep]
+        px = [px[j] for j in keep]
+
+    q = np.fromiter((h.quantity for h in holdings), dtype=np.float64, count=len(holdings))
+    p = np.asarray(px, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        values = np.where(p >= 0, q * p, 0.0)
+    asset_types = [h.asset_type for h in holdings]
+    summary = allocation_summary(symbols, asset_types, values, float(portfolio.cash), include_cash_row=include_cash_row)
+    if summary is None:
+        return _empty_metrics(portfolio.currency, warnings, data_quality)
+    return PortfolioMetrics(currency=portfolio.currency, warnings=warnings, data_quality=data_quality, **summary)
+
+def _compute_portfolio_metrics_decimal(
+    portfolio: PortfolioInput,
+    prices: Optional[Dict[str, float]] = None,
+    *,
+    include_cash_row: bool = True,
 ) -> PortfolioMetrics:
+    """Audit path: every value and weight in Decimal, one AllocationRow at a time."""
     warnings: List[str] = []
     data_quality: Dict[str, str] = {}
 
@@ -72,20 +333,7 @@ def compute_portfolio_metrics(
         allocs.append(AllocationRow(symbol="CASH", asset_type="cash", value=float(_d(portfolio.cash)), weight=0.0))
 
     if total <= 0:
-        warnings.append("Total portfolio value is 0. Check holdings/prices/cash.")
-        return PortfolioMetrics(
-            currency=portfolio.currency,
-            total_value=0.0,
-            allocations=[],
-            top_holdings=[],
-            concentration_top1=0.0,
-            concentration_top3=0.0,
-            concentration_top5=0.0,
-            diversification_effective_n=0.0,
-            risk_bucket="low",
-            warnings=warnings,
-            data_quality=data_quality,
-        )
+        return _empty_metrics(portfolio.currency, warnings, data_quality)
 
     total_dec = total
     for a in allocs:
@@ -104,14 +352,7 @@ def compute_portfolio_metrics(
     hhi = sum([x.weight ** 2 for x in allocs]) if allocs else 0.0
     eff_n = (1.0 / hhi) if hhi > 0 else 0.0
 
-    equity_like = sum([x.weight for x in allocs if x.asset_type in ("stock", "etf", "mutual_fund", "crypto")])
-
-    if equity_like >= 0.75:
-        risk = "high"
-    elif equity_like >= 0.40:
-        risk = "medium"
-    else:
-        risk = "low"
+    equity_like = sum([x.weight for x in allocs if x.asset_type in EQUITY_LIKE])
 
     return PortfolioMetrics(
         currency=portfolio.currency,
@@ -122,48 +363,156 @@ def compute_portfolio_metrics(
         concentration_top3=round(c3, 4),
         concentration_top5=round(c5, 4),
         diversification_effective_n=round(eff_n, 4),
-        risk_bucket=risk,  # type: ignore[arg-type]
+        risk_bucket=_risk_bucket(equity_like),  # type: ignore[arg-type]
         warnings=warnings,
         data_quality=data_quality,
     )
 
-def compute_goal_projection(goal: GoalInput) -> GoalProjection:
+def _horizon_months(goal: GoalInput) -> int:
+    return int((_d(goal.years) * Decimal(12)).to_integral_value(rounding="ROUND_HALF_UP"))
+
+def iter_goal_schedule(goal: GoalInput, *, granularity: str = "monthly", block: int = 4096) -> Iterator[Dict[str, np.ndarray]]:
+    """iter_projection_schedule for a goal's base assumptions."""
+    return iter_projection_schedule(
+        float(goal.current_savings), float(goal.monthly_contribution), _horizon_months(goal),
+        float(goal.expected_return_annual), float(goal.stepup_annual_pct), float(goal.inflation_annual),
+        granularity=granularity, block=block,
+    )
+
+def goal_schedule_yearly(goal: GoalInput) -> List[ScheduleRow]:
+    """Year-end rows of iter_goal_schedule (plus the final month when the horizon ends mid-year)."""
+    rows: List[ScheduleRow] = []
+    n_months = _horizon_months(goal)
+    for b in iter_goal_schedule(goal):
+        keep = np.flatnonzero((b["period"] % 12 == 0) | (b["period"] == n_months))
+        rows.extend(
+            ScheduleRow(year=round(y, 4), balance=round(v, 2), contributed=round(c, 2), real_value=round(rv, 2))
+            for y, v, c, rv in zip(b["year"][keep].tolist(), b["balance"][keep].tolist(),
+                                   b["contributed"][keep].tolist(), b["real_value"][keep].tolist())
+        )
+    return rows
+
+# -----------------------------
+# Monte Carlo (lognormal monthly returns)
+# -----------------------------
+
+RISK_VOLATILITY = {"low": 0.06, "medium": 0.15, "high": 0.22}
+MC_PERCENTILES = (10, 25, 50, 75, 90)
+_MC_MAX_BUFFER = 4_000_000  # shocks held at once (float32): ~16 MB
+
+class _MonteCarloBuffers(threading.local):
+    """Per-thread scratch arrays, grown on demand and reused across simulations."""
+
+    def __init__(self) -> None:
+        self.shocks = np.empty((0, 0), dtype=np.float32)
+        self.balance = np.empty(0, dtype=np.float64)
+        self.yearly = np.empty((0, 0), dtype=np.float64)
+
+    def get(self, months: int, paths: int, years: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.shocks.shape[0] < months or self.shocks.shape[1] != paths:
+            self.shocks = np.empty((months, paths), dtype=np.float32)
+        if self.balance.shape[0] != paths:
+            self.balance = np.empty(paths, dtype=np.float64)
+        if self.yearly.shape[0] < years or self.yearly.shape[1] != paths:
+            self.yearly = np.empty((years, paths), dtype=np.float64)
+        return self.shocks[:months], self.balance, self.yearly[:years]
+
+_MC_BUFFERS = _MonteCarloBuffers()
+
+def simulate_goal_monte_carlo(
+    goal: GoalInput,
+    *,
+    n_paths: int = 10_000,
+    seed: int = 0,
+    volatility_annual: Optional[float] = None,
+) -> GoalMonteCarlo:
+    """
+    Simulate `n_paths` balances month by month (same contribution/step-up schedule as the
+    deterministic projection) with lognormal monthly returns whose mean matches expected_return_annual.
+    Volatility defaults from goal.risk_tolerance. Seeded, so the same inputs give the same answer.
+    """
+    n_paths = int(n_paths)
+    if n_paths < 1:
+        raise ValueError("n_paths must be >= 1")
+    n_months = _horizon_months(goal)
+    r = float(goal.expected_return_annual)
+    sigma = float(volatility_annual if volatility_annual is not None else RISK_VOLATILITY[goal.risk_tolerance])
+    sigma_m = sigma / math.sqrt(12.0)
+    mu_m = math.log1p(r) / 12.0 - 0.5 * sigma_m ** 2  # E[exp(x)] = (1+r)^(1/12)
+    S = 1.0 + max(float(goal.stepup_annual_pct), 0.0)
+    monthly = float(goal.monthly_contribution)
+    target = float(goal.target_amount)
+
+    n_years = -(-n_months // 12)
+    chunk = max(1, min(n_months, _MC_MAX_BUFFER // n_paths)) if n_months else 0
+    shocks, bal, yearly = _MC_BUFFERS.get(chunk, n_paths, n_years)
+    rng = np.random.default_rng(seed)
+    bal.fill(float(goal.current_savings))
+
+    for start in range(0, n_months, chunk or 1):
+        k = min(chunk, n_months - start)
+        z = shocks[:k]
+        rng.standard_normal(out=z, dtype=np.float32)
+        z *= sigma_m
+        z += mu_m
+        np.exp(z, out=z)
+        for i in range(k):
+            m = start + i + 1
+            bal *= z[i]
+            bal += monthly * S ** ((m - 1) // 12)
+            if m % 12 == 0 or m == n_months:
+                yearly[(m - 1) // 12] = bal
+
+    final_q = np.percentile(bal, MC_PERCENTILES)
+    band_q = np.percentile(yearly, MC_PERCENTILES, axis=1) if n_years else np.empty((len(MC_PERCENTILES), 0))
+    bands = [
+        MonteCarloBand(year=min((y + 1) * 12, n_months) / 12.0, **{f"p{p}": round(float(band_q[j, y]), 2) for j, p in enumerate(MC_PERCENTILES)})
+        for y in range(n_years)
+    ]
+    return GoalMonteCarlo(
+        n_paths=n_paths,
+        seed=int(seed),
+        volatility_annual=sigma,
+        success_probability=round(float(np.count_nonzero(bal >= target)) / n_paths, 4),
+        final_percentiles={f"p{p}": round(float(v), 2) for p, v in zip(MC_PERCENTILES, final_q)},
+        bands=bands,
+    )
+
+def compute_goal_projection(
+    goal: GoalInput,
+    *,
+    monte_carlo: bool = False,
+    n_paths: int = 10_000,
+    seed: int = 0,
+    schedule: bool = False,
+) -> GoalProjection:
     warnings: List[str] = []
     data_quality: Dict[str, str] = {}
 
     target = _d(goal.target_amount)
     years = _d(goal.years)
-    n_months = int((years * Decimal(12)).to_integral_value(rounding="ROUND_HALF_UP"))
+    n_months = _horizon_months(goal)
 
     r_annual = _d(goal.expected_return_annual)
     inf = _d(goal.inflation_annual)
     stepup = _d(goal.stepup_annual_pct)
 
     mr = _monthly_rate(r_annual)
-    fv = _future_value(_d(goal.current_savings), _d(goal.monthly_contribution), n_months, mr, stepup)
+    current = _d(goal.current_savings)
+    fv0 = _future_value(current, Decimal(0), n_months, mr, stepup)
+    factor = _contribution_factor(n_months, mr, stepup)
+    fv = fv0 + _d(goal.monthly_contribution) * factor
     real = fv / ((Decimal(1) + inf) ** years) if inf > 0 else fv
 
-    def reached(monthly: Decimal) -> Decimal:
-        return _future_value(_d(goal.current_savings), monthly, n_months, mr, stepup)
-
-    fv0 = reached(Decimal(0))
+    # FV is linear in the monthly amount, so the required contribution is a direct solve
     if fv0 >= target:
         req = Decimal(0)
+    elif factor > 0:
+        req = (target - fv0) / factor
     else:
-        lo = Decimal(0)
-        hi = max(Decimal(10), target / Decimal(max(1, n_months)))
-        for _ in range(40):
-            if reached(hi) >= target:
-                break
-            hi *= Decimal(2)
-
-        for _ in range(60):
-            mid = (lo + hi) / Decimal(2)
-            if reached(mid) >= target:
-                hi = mid
-            else:
-                lo = mid
-        req = hi
+        req = Decimal(0)
+        warnings.append("Horizon is under one month; monthly contributions cannot close the gap.")
+        data_quality["horizon_months"] = "0"
 
     def scenario(label: str, r: Decimal) -> ScenarioRow:
         mr_s = _monthly_rate(r)
@@ -195,6 +544,8 @@ def compute_goal_projection(goal: GoalInput) -> GoalProjection:
         real_value_today=_safe_float(real),
         required_monthly_for_target=_safe_float(req),
         scenarios=scenarios,
+        monte_carlo=simulate_goal_monte_carlo(goal, n_paths=n_paths, seed=seed) if monte_carlo else None,
+        schedule=goal_schedule_yearly(goal) if schedule else None,
         warnings=warnings,
         data_quality=data_quality,
     )
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.schemas import DataQuality, QuantResult
+from src.utils.cache import TTLCache
+
+# -----------------------------
+# O(n) NumPy kernels (NaN where the window is not full yet)
+# -----------------------------
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean via one cumulative sum (offset by x[0] so long series don't drift)."""
+    x = np.asarray(x, dtype=np.float64)
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] < window:
+        return out
+    base = x[0]
+    c = np.concatenate(([0.0], np.cumsum(x - base)))
+    out[window - 1:] = (c[window:] - c[:-window]) / window + base
+    return out
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """Trailing standard deviation from cumulative sums of x and x^2 (centred on the mean for stability)."""
+    x = np.asarray(x, dtype=np.float64)
+    if window <= ddof:
+        raise ValueError("window must be > ddof")
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] < window:
+        return out
+    xc = x - x.mean()
+    s1 = np.concatenate(([0.0], np.cumsum(xc)))
+    s2 = np.concatenate(([0.0], np.cumsum(xc * xc)))
+    w1 = s1[window:] - s1[:-window]
+    w2 = s2[window:] - s2[:-window]
+    out[window - 1:] = np.sqrt(np.maximum(w2 - w1 * w1 / window, 0.0) / (window - ddof))
+    return out
+
+def _ewm(x: np.ndarray, alpha: float, y0: float) -> np.ndarray:
+    """
+    y[i] = (1-alpha)*y[i-1] + alpha*x[i], with y[-1] = y0.
+    Solved in closed form per block (y_j = d^(j+1)*y0 + alpha*d^j * cumsum(x_k * d^-k)); blocks are sized
+    so d^-k stays below e^20, so the Python loop runs n/B times instead of n.
+    """
+    n = x.shape[0]
+    out = np.empty(n)
+    d = 1.0 - alpha
+    if n == 0:
+        return out
+    if d <= 0.0:
+        out[:] = x
+        return out
+    block = max(1, min(n, int(20.0 / -math.log(d))))
+    k = np.arange(block)
+    inv = np.exp(k * -math.log(d))  # d^-k
+    carry = d ** (k + 1.0)
+    prev = float(y0)
+    for s in range(0, n, block):
+        xb = x[s:s + block]
+        m = xb.shape[0]
+        out[s:s + m] = carry[:m] * prev + alpha * np.cumsum(xb * inv[:m]) / inv[:m]
+        prev = out[s + m - 1]
+    return out
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average, alpha = 2/(span+1), seeded with the first value (pandas adjust=False)."""
+    x = np.asarray(x, dtype=np.float64)
+    if span < 1:
+        raise ValueError("span must be >= 1")
+    if x.shape[0] == 0:
+        return x.copy()
+    return np.concatenate(([x[0]], _ewm(x[1:], 2.0 / (span + 1.0), x[0])))
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Wilder RSI: averages seeded with the first `window` moves, then smoothed with alpha = 1/window."""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape[0], np.nan)
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    if close.shape[0] <= window:
+        return out
+    delta = np.diff(close)
+    gain = np.maximum(delta, 0.0)
+    loss = np.maximum(-delta, 0.0)
+    a = 1.0 / window
+    g0, l0 = gain[:window].mean(), loss[:window].mean()
+    avg_gain = np.concatenate(([g0], _ewm(gain[window:], a, g0)))
+    avg_loss = np.concatenate(([l0], _ewm(loss[window:], a, l0)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        val = np.where(avg_loss == 0.0, np.where(avg_gain == 0.0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + rs))
+    out[window:] = val
+    return out
+
+def drawdown(close: np.ndarray) -> np.ndarray:
+    """Fraction below the running peak (0 at a new high, negative otherwise)."""
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[0] == 0:
+        return close.copy()
+    return close / np.maximum.accumulate(close) - 1.0
+
+def simple_returns(close: np.ndarray) -> np.ndarray:
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape[0], np.nan)
+    out[1:] = close[1:] / close[:-1] - 1.0
+    return out
+
+def rolling_volatility(close: np.ndarray, window: int, periods_per_year: int = 252) -> np.ndarray:
+    """Annualised std of log returns over `window` returns, aligned to the close index."""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape[0], np.nan)
+    if close.shape[0] > 1:
+        out[1:] = rolling_std(np.diff(np.log(close)), window) * math.sqrt(periods_per_year)
+    return out
+
+# -----------------------------
+# MARKET_INDICATORS task
+# -----------------------------
+
+PERIODS_PER_YEAR = {"1d": 252, "1wk": 52, "1mo": 12}
+
+@dataclass(frozen=True)
+class IndicatorParams:
+    sma_windows: Tuple[int, ...] = (20, 50)
+    ema_spans: Tuple[int, ...] = (20,)
+    vol_window: int = 20
+    rsi_window: int = 14
+
+    def key(self) -> str:
+        sma = ",".join(map(str, self.sma_windows))
+        ema_ = ",".join(map(str, self.ema_spans))
+        return f"sma={sma}|ema={ema_}|vol={self.vol_window}|rsi={self.rsi_window}"
+
+# indicator arrays are pure functions of the series; the key pins the exact series (see _cache_key)
+_CACHE = TTLCache(default_ttl_seconds=6 * 3600, max_items=256, stripes=4)
+
+def _clean(series: Any) -> Tuple[np.ndarray, np.ndarray]:
+    dates = np.asarray(series.dates, dtype="datetime64[D]")
+    close = np.asarray(series.close, dtype=np.float64)
+    ok = np.isfinite(close) & (close > 0)
+    return (dates, close) if ok.all() else (dates[ok], close[ok])
+
+def _cache_key(symbol: str, dates: np.ndarray, close: np.ndarray, params: IndicatorParams, interval: str) -> str:
+    # last date alone is not enough: the latest daily bar moves intraday, and periods share a last date
+    if dates.shape[0] == 0:
+        return f"ind:{symbol}:empty:{interval}:{params.key()}"
+    return (f"ind:{symbol}:{dates[0]}:{dates[-1]}:{dates.shape[0]}:{close[-1]!r}:"
+            f"{interval}:{params.key()}")
+
+def _compute_arrays(dates: np.ndarray, close: np.ndarray, params: IndicatorParams, interval: str) -> Dict[str, np.ndarray]:
+    ppy = PERIODS_PER_YEAR.get(interval, 252)
+    # views, so freezing them below leaves the caller's arrays writable
+    out: Dict[str, np.ndarray] = {"date": dates.view(), "close": close.view()}
+    for w in params.sma_windows:
+        out[f"sma_{w}"] = rolling_mean(close, w)
+    for s in params.ema_spans:
+        out[f"ema_{s}"] = ema(close, s)
+    out["volatility"] = rolling_volatility(close, params.vol_window, ppy)
+    out["rsi"] = rsi(close, params.rsi_window)
+    out["drawdown"] = drawdown(close)
+    out["returns"] = simple_returns(close)
+    for v in out.values():
+        v.flags.writeable = False  # shared through the cache
+    return out
+
+def indicator_arrays(series: Any, params: Optional[IndicatorParams] = None, *, interval: str = "1d") -> Dict[str, np.ndarray]:
+    """
+    Column name -> array aligned with the series dates (date, close, sma_<w>, ema_<s>, volatility, rsi,
+    drawdown, returns). Non-positive/NaN closes are dropped first. Cached, so reruns are free.
+    """
+    params = params or IndicatorParams()
+    dates, close = _clean(series)
+    key = _cache_key(series.symbol, dates, close, params, interval)
+    value, _, _ = _CACHE.get_or_compute(key, lambda: _compute_arrays(dates, close, params, interval))
+    return value
+
+def _last(x: np.ndarray) -> Optional[float]:
+    return round(float(x[-1]), 6) if x.shape[0] and np.isfinite(x[-1]) else None
+
+def _as_list(x: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in np.round(x, 6).tolist()]  # NaN -> None (JSON friendly)
+
+def compute_market_indicators(series: Any, params: Optional[IndicatorParams] = None, *, interval: str = "1d") -> QuantResult:
+    """MARKET_INDICATORS: latest values in `metrics`, full aligned columns in `chart_data`."""
+    params = params or IndicatorParams()
+    total = len(series.close)
+    arr = indicator_arrays(series, params, interval=interval)
+    close = arr["close"]
+    dropped = total - close.shape[0]
+    warnings: List[str] = []
+    notes: List[str] = []
+    if dropped:
+        notes.append(f"dropped {dropped} rows with missing or non-positive closes")
+    longest = max((*params.sma_windows, params.vol_window + 1, params.rsi_window + 1), default=1)
+    if close.shape[0] < longest:
+        warnings.append(f"Only {close.shape[0]} points; some indicators need {longest}.")
+
+    metrics: Dict[str, Any] = {
+        "symbol": series.symbol,
+        "interval": interval,
+        "points": int(close.shape[0]),
+        "last_date": str(arr["date"][-1]) if close.shape[0] else None,
+        "last_close": _last(close),
+        "total_return": round(float(close[-1] / close[0] - 1.0), 6) if close.shape[0] > 1 else None,
+        "max_drawdown": round(float(arr["drawdown"].min()), 6) if close.shape[0] else None,
+        "volatility_annual": _last(arr["volatility"]),
+        "rsi": _last(arr["rsi"]),
+    }
+    for w in params.sma_windows:
+        metrics[f"sma_{w}"] = _last(arr[f"sma_{w}"])
+    for s in params.ema_spans:
+        metrics[f"ema_{s}"] = _last(arr[f"ema_{s}"])
+
+    chart: Dict[str, Any] = {"date": np.datetime_as_string(arr["date"], unit="D").tolist()}
+    chart.update({k: _as_list(v) for k, v in arr.items() if k != "date"})
+
+    return QuantResult(
+        metrics=metrics,
+        chart_data=chart,
+        data_quality=DataQuality(
+            missing_pct=round(dropped / total, 4) if total else 0.0,
+            dropped_dates=dropped,
+            notes=notes,
+        ),
+        warnings=warnings,
+        confidence="high" if not warnings and not dropped else "medium",
+    )
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Literal
-from pydantic import BaseModel, Field, condecimal
+from typing import Any, Dict, List, Optional, Literal
+from pydantic import BaseModel, Field, condecimal, confloat
 
 AssetType = Literal["stock", "etf", "mutual_fund", "bond", "cash", "crypto", "other"]
 
@@ -23,6 +23,28 @@ class AllocationRow(BaseModel):
     value: float
     weight: float
 
+class RiskContribution(BaseModel):
+    symbol: str
+    weight: float
+    marginal_vol: float = Field(..., description="d(portfolio vol)/d(weight), annualized")
+    contribution_vol: float = Field(..., description="weight * marginal_vol; sums to the portfolio vol")
+    pct_of_risk: float
+
+class PortfolioRisk(BaseModel):
+    observations: int = Field(..., description="Return observations in the window")
+    confidence: float
+    horizon_days: int
+    volatility_annual: float
+    benchmark: Optional[str] = None
+    beta: Optional[float] = None
+    var_historical: float = Field(..., description="Loss (fraction of value) not exceeded with `confidence`, from the window's returns")
+    cvar_historical: float
+    var_parametric: float = Field(..., description="Normal-approximation VaR from the covariance matrix")
+    cvar_parametric: float
+    contributions: List[RiskContribution] = Field(default_factory=list)
+    as_of: Optional[str] = None
+    warnings: List[str] = Field(default_factory=list)
+
 class PortfolioMetrics(BaseModel):
     currency: str
     total_value: float
@@ -33,6 +55,7 @@ class PortfolioMetrics(BaseModel):
     concentration_top5: float
     diversification_effective_n: float = Field(..., description="1/sum(w^2) (effective number of holdings)")
     risk_bucket: Literal["low", "medium", "high"]
+    risk: Optional[PortfolioRisk] = Field(None, description="History-based risk analytics (quant_risk), when requested")
     warnings: List[str] = Field(default_factory=list)
     data_quality: Dict[str, str] = Field(default_factory=dict)
 
@@ -45,6 +68,7 @@ class GoalInput(BaseModel):
     inflation_annual: condecimal(ge=0) = 0.06
     stepup_annual_pct: condecimal(ge=0) = 0
     currency: str = "USD"
+    risk_tolerance: Literal["low", "medium", "high"] = "medium"  # sets Monte Carlo volatility
 
 class ScenarioRow(BaseModel):
     label: str
@@ -52,6 +76,28 @@ class ScenarioRow(BaseModel):
     projected_amount: float
     real_value_today: float
 
+class MonteCarloBand(BaseModel):
+    year: float
+    p10: float
+    p25: float
+    p50: float
+    p75: float
+    p90: float
+
+class GoalMonteCarlo(BaseModel):
+    n_paths: int
+    seed: int
+    volatility_annual: float
+    success_probability: float = Field(..., description="Share of paths ending at or above the target (nominal)")
+    final_percentiles: Dict[str, float]
+    bands: List[MonteCarloBand] = Field(default_factory=list, description="Balance percentiles at each year end")
+
+class ScheduleRow(BaseModel):
+    year: float
+    balance: float
+    contributed: float = Field(..., description="Cumulative contributions so far (excluding starting savings)")
+    real_value: float
+
 class GoalProjection(BaseModel):
     currency: str
     target_amount: float
@@ -61,5 +107,60 @@ class GoalProjection(BaseModel):
     real_value_today: float
     required_monthly_for_target: float
     scenarios: List[ScenarioRow]
+    monte_carlo: Optional[GoalMonteCarlo] = None
+    schedule: Optional[List[ScheduleRow]] = Field(None, description="Year-end rows of the base projection path")
     warnings: List[str] = Field(default_factory=list)
     data_quality: Dict[str, str] = Field(default_factory=dict)
+
+
+RebalanceFrequency = Literal["never", "daily", "weekly", "monthly", "quarterly", "annual"]
+
+class RebalancePolicy(BaseModel):
+    frequency: RebalanceFrequency = "monthly"
+    drift_band: confloat(ge=0, lt=1) = Field(0.0, description="Rebalance at a check date only if some weight is off target by more than this (0 = always)")
+    cost_bps: confloat(ge=0) = Field(0.0, description="Trading cost per unit of traded value, in basis points")
+    targets: Optional[Dict[str, float]] = Field(None, description="Per-policy target weights; defaults to the simulation's targets")
+    label: Optional[str] = None
+
+class RebalancePolicyResult(BaseModel):
+    label: str
+    frequency: RebalanceFrequency
+    drift_band: float
+    cost_bps: float
+    final_value: float
+    total_return: float
+    cagr: float
+    volatility_annual: float
+    max_drawdown: float
+    turnover: float = Field(..., description="Sum over rebalances of one-sided traded fraction (0.5 * sum |dw|)")
+    turnover_annual: float
+    rebalances: int
+    costs_paid: float
+    targets: Dict[str, float] = Field(default_factory=dict, description="Normalized target weights used")
+
+
+OptimizationObjective = Literal["min_variance", "mean_variance", "risk_parity"]
+
+class OptimizationSpec(BaseModel):
+    objective: OptimizationObjective = "min_variance"
+    risk_aversion: confloat(gt=0) = Field(3.0, description="mean_variance: maximize mu'w - risk_aversion/2 * w'Cw (annualized)")
+    min_weight: confloat(ge=0, le=1) = 0.0
+    max_weight: confloat(ge=0, le=1) = 1.0
+    bounds: Dict[str, List[float]] = Field(default_factory=dict, description="Per-symbol [min, max], overriding min/max_weight")
+    sectors: Dict[str, str] = Field(default_factory=dict, description="symbol -> sector (unlisted symbols are in no sector)")
+    sector_bounds: Dict[str, List[float]] = Field(default_factory=dict, description="sector -> [min, max] total weight")
+    risk_budgets: Dict[str, float] = Field(default_factory=dict, description="risk_parity: symbol -> budget (default equal)")
+
+class OptimizationResult(BaseModel):
+    objective: OptimizationObjective
+    weights: Dict[str, float]
+    expected_return_annual: float
+    volatility_annual: float
+    risk_contributions: Dict[str, float] = Field(default_factory=dict, description="Share of portfolio variance per symbol")
+    current_weights: Optional[Dict[str, float]] = Field(None, description="Weights of the input portfolio, when one was given")
+    observations: int = 0
+    iterations: int = 0
+    converged: bool = True
+    warm_started: bool = False
+    frontier: Optional[List[Dict[str, Any]]] = Field(None, description="Mean-variance frontier points, when requested")
+    warnings: List[str] = Field(default_factory=list)
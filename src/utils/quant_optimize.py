@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.cache import TTLCache
+from src.utils.logging import get_logger
+from src.utils.price_matrix import load_close_matrix
+from src.utils.quant_indicators import PERIODS_PER_YEAR
+from src.utils.quant_models import OptimizationResult, OptimizationSpec, PortfolioInput
+from src.utils.quant_rebalance import targets_from_portfolio
+from src.utils.quant_risk import _period_for, covariance_snapshot
+
+logger = get_logger("quant_optimize")
+
+# -----------------------------
+# Constraints: l <= A w <= u
+# -----------------------------
+
+def constraint_matrix(symbols: Sequence[str], spec: OptimizationSpec) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rows: the budget (sum w = 1), one box row per symbol, one row per bounded sector.
+    Raises ValueError when the bounds cannot hold together.
+    """
+    syms = [s.strip().upper() for s in symbols]
+    n = len(syms)
+    col = {s: j for j, s in enumerate(syms)}
+    lo = np.full(n, float(spec.min_weight))
+    hi = np.full(n, float(spec.max_weight))
+    for sym, b in spec.bounds.items():
+        j = col.get(sym.strip().upper())
+        if j is None:
+            raise ValueError(f"bounds given for unknown symbol {sym}")
+        if len(b) != 2:
+            raise ValueError(f"bounds for {sym} must be [min, max]")
+        lo[j], hi[j] = float(b[0]), float(b[1])
+    if (lo < 0).any() or (lo > hi).any():
+        raise ValueError("per-symbol bounds must satisfy 0 <= min <= max")
+    if lo.sum() > 1 + 1e-12 or hi.sum() < 1 - 1e-12:
+        raise ValueError(f"weight bounds cannot sum to 1 (min total {lo.sum():.4f}, max total {hi.sum():.4f})")
+
+    rows = [np.ones(n), *np.eye(n)]
+    l, u = [1.0, *lo], [1.0, *hi]
+    member: Dict[str, List[int]] = {}
+    for sym, sector in spec.sectors.items():
+        j = col.get(sym.strip().upper())
+        if j is not None:
+            member.setdefault(sector, []).append(j)
+    for sector, b in spec.sector_bounds.items():
+        idx = member.get(sector)
+        if not idx:
+            raise ValueError(f"sector {sector} has no symbols in the universe")
+        s_lo, s_hi = float(b[0]), float(b[1])
+        if s_lo > s_hi or s_lo > hi[idx].sum() + 1e-12 or s_hi < lo[idx].sum() - 1e-12:
+            raise ValueError(f"sector bounds for {sector} conflict with the symbol bounds")
+        row = np.zeros(n)
+        row[idx] = 1.0
+        rows.append(row)
+        l.append(s_lo)
+        u.append(s_hi)
+    return np.vstack(rows), np.asarray(l), np.asarray(u)
+
+# -----------------------------
+# ADMM (OSQP-style) solver, NumPy only
+# -----------------------------
+
+@dataclass
+class SolverState:
+    """Primal/dual iterates kept between solves of the same problem shape (the warm start)."""
+    x: np.ndarray
+    z: np.ndarray
+    y: np.ndarray
+    rho: float = 0.1
+    kappa: float = 0.0  # risk parity: weight of the log barrier
+
+_SIGMA = 1e-6
+_ALPHA = 1.6
+_EPS = 1e-7
+_CHECK_EVERY = 10
+_ADAPT_EVERY = 50
+
+def _admm(P: np.ndarray, q: np.ndarray, A: np.ndarray, l: np.ndarray, u: np.ndarray, state: SolverState, *,
+          budgets: Optional[np.ndarray] = None, max_iter: int = 20_000) -> Tuple[int, bool]:
+    """
+    min 1/2 x'Px + q'x [- kappa * sum(b log x)] s.t. l <= Ax <= u, iterating `state` in place.
+    The x-update is one matvec with the inverse of the KKT matrix; the z-update projects onto [l, u]
+    (for risk parity the box rows also take the log term's prox, which has a closed form). rho is
+    rebalanced against the residuals as in OSQP, which re-inverts the n x n matrix.
+    """
+    n = P.shape[0]
+    eq = np.abs(u - l) < 1e-12
+    box = slice(1, n + 1)
+    x, z, y = state.x, state.z, state.y
+
+    def factor(r: float) -> Tuple[np.ndarray, np.ndarray]:
+        rho = np.where(eq, 1e3 * r, r)
+        return rho, np.linalg.inv(P + _SIGMA * np.eye(n) + (A.T * rho) @ A)
+
+    rho, K_inv = factor(state.rho)
+    for it in range(1, max_iter + 1):
+        x_t = K_inv @ (_SIGMA * x - q + A.T @ (rho * z - y))
+        z_t = A @ x_t
+        x = _ALPHA * x_t + (1 - _ALPHA) * x
+        v = _ALPHA * z_t + (1 - _ALPHA) * z
+        z = v + y / rho
+        if budgets is not None:
+            # argmin -kappa*b*log(z) + rho/2 (z - v)^2
+            zb = z[box]
+            z[box] = 0.5 * (zb + np.sqrt(zb * zb + 4.0 * state.kappa * budgets / rho[box]))
+        z = np.clip(z, l, u)
+        y = y + rho * (v - z)
+        if it % _CHECK_EVERY:
+            continue
+        Ax, Px, Aty = A @ x, P @ x, A.T @ y
+        prim = np.max(np.abs(Ax - z))
+        dual = np.max(np.abs(Px + q + Aty))
+        if prim < _EPS and dual < _EPS:
+            state.x, state.z, state.y = x, z, y
+            return it, True
+        if it % _ADAPT_EVERY == 0:
+            p_rel = prim / max(np.max(np.abs(Ax)), np.max(np.abs(z)), 1e-12)
+            d_rel = dual / max(np.max(np.abs(Px)), np.max(np.abs(Aty)), np.max(np.abs(q)), 1e-12)
+            ratio = math.sqrt(p_rel / max(d_rel, 1e-12))
+            if ratio > 5.0 or ratio < 0.2:
+                state.rho = float(np.clip(state.rho * ratio, 1e-6, 1e6))
+                rho, K_inv = factor(state.rho)
+    state.x, state.z, state.y = x, z, y
+    return max_iter, False
+
+def _cold_state(A: np.ndarray, l: np.ndarray, u: np.ndarray) -> SolverState:
+    n = A.shape[1]
+    x = np.full(n, 1.0 / n)
+    return SolverState(x=x, z=np.clip(A @ x, l, u), y=np.zeros(A.shape[0]))
+
+def solve_weights(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    symbols: Sequence[str],
+    spec: OptimizationSpec,
+    *,
+    state: Optional[SolverState] = None,
+) -> Tuple[np.ndarray, SolverState, int, bool]:
+    """
+    Weights for annualized `mu` / `cov`. Returns (weights, solver state, iterations, converged); pass the
+    state back in to warm-start the next solve (new data, another risk aversion, ...).
+    """
+    A, l, u = constraint_matrix(symbols, spec)
+    n = len(symbols)
+    if state is None or state.x.shape[0] != n or state.z.shape[0] != A.shape[0]:
+        state = _cold_state(A, l, u)
+    cov = np.asarray(cov, dtype=np.float64)
+    # scale so the covariance is O(1): same minimizer, and one rho suits every universe
+    scale = float(np.mean(np.diag(cov))) or 1.0
+    if spec.objective == "min_variance":
+        it, ok = _admm(cov / scale, np.zeros(n), A, l, u, state)
+    elif spec.objective == "mean_variance":
+        it, ok = _admm(spec.risk_aversion * cov / scale, -np.asarray(mu, dtype=np.float64) / scale, A, l, u, state)
+    else:
+        b = _budgets(symbols, spec)
+        P = cov / scale
+        if state.kappa <= 0:
+            state.kappa = float(state.x @ P @ state.x)
+        # 1/2 w'Pw - kappa * sum(b log w) under sum(w) = 1 gives w_i (Pw)_i proportional to b_i exactly when
+        # kappa equals the portfolio variance, so kappa is iterated to that fixed point
+        it, ok = 0, False
+        for _ in range(50):
+            k, ok = _admm(P, np.zeros(n), A, l, u, state, budgets=b)
+            it += k
+            var = float(state.x @ P @ state.x)
+            done = abs(var - state.kappa) <= 1e-9 * var
+            state.kappa = var
+            if done:
+                break
+    w = np.clip(state.x, l[1:n + 1], u[1:n + 1])
+    return w / w.sum(), state, it, ok
+
+def _budgets(symbols: Sequence[str], spec: OptimizationSpec) -> np.ndarray:
+    if not spec.risk_budgets:
+        return np.full(len(symbols), 1.0 / len(symbols))
+    given = {s.strip().upper(): float(v) for s, v in spec.risk_budgets.items()}
+    b = np.array([given.get(s.strip().upper(), 0.0) for s in symbols])
+    if (b <= 0).any():
+        raise ValueError("risk_budgets must give every symbol a positive budget")
+    return b / b.sum()
+
+# warm starts, one per (objective, universe, constraints); a day of new data starts from yesterday's answer
+_WARM = TTLCache(default_ttl_seconds=7 * 24 * 3600, max_items=128, stripes=4)
+
+def _warm_key(symbols: Sequence[str], spec: OptimizationSpec) -> str:
+    s = spec.model_dump(exclude={"risk_aversion"})
+    return f"opt:{','.join(symbols)}:{sorted(s.items())!r}"
+
+def optimize_weights(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    symbols: Sequence[str],
+    spec: OptimizationSpec,
+    *,
+    warm_start: bool = True,
+) -> Tuple[np.ndarray, int, bool, bool]:
+    """solve_weights with the warm start kept in a cache. Returns (weights, iterations, converged, warm_started)."""
+    key = _warm_key(symbols, spec)
+    hit = _WARM.get(key) if warm_start else None
+    prev: Optional[SolverState] = hit[0] if hit else None
+    if prev is not None:
+        prev = replace(prev, x=prev.x.copy(), z=prev.z.copy(), y=prev.y.copy())
+    w, state, it, ok = solve_weights(mu, cov, symbols, spec, state=prev)
+    if ok:
+        _WARM.set(key, state)
+    return w, it, ok, prev is not None
+
+def efficient_frontier(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    symbols: Sequence[str],
+    spec: Optional[OptimizationSpec] = None,
+    *,
+    n_points: int = 20,
+    risk_aversions: Optional[Sequence[float]] = None,
+) -> List[Dict[str, Any]]:
+    """Mean-variance solutions from high to low risk aversion, each solve warm-started from the previous one."""
+    spec = spec or OptimizationSpec()
+    gammas = list(risk_aversions) if risk_aversions is not None else np.geomspace(100.0, 0.5, n_points).tolist()
+    state: Optional[SolverState] = None
+    out = []
+    for g in gammas:
+        s = spec.model_copy(update={"objective": "mean_variance", "risk_aversion": g})
+        w, state, it, ok = solve_weights(mu, cov, symbols, s, state=state)
+        out.append({
+            "risk_aversion": round(g, 6),
+            "expected_return_annual": round(float(w @ mu), 6),
+            "volatility_annual": round(math.sqrt(max(float(w @ cov @ w), 0.0)), 6),
+            "weights": _weights_dict(symbols, w),
+            "iterations": it,
+            "converged": ok,
+        })
+    return out
+
+def _weights_dict(symbols: Sequence[str], w: np.ndarray) -> Dict[str, float]:
+    return {s: round(float(v), 6) for s, v in zip(symbols, w.tolist()) if v > 5e-7}
+
+# -----------------------------
+# MarketDataService entry point
+# -----------------------------
+
+def optimize_portfolio(
+    market_data: Any,
+    spec: OptimizationSpec,
+    *,
+    symbols: Optional[Sequence[str]] = None,
+    portfolio: Optional[PortfolioInput] = None,
+    prices: Optional[Dict[str, float]] = None,
+    window: int = 252,
+    interval: str = "1d",
+    warm_start: bool = True,
+    frontier_points: int = 0,
+) -> OptimizationResult:
+    """
+    Target weights over `symbols` (or the portfolio's holdings), from the cached rolling mean/covariance of
+    the last `window` returns (see quant_risk.covariance_snapshot). CASH is left out of the optimization.
+    `frontier_points` > 0 also traces the mean-variance frontier under the same constraints.
+    """
+    if symbols is None and portfolio is None:
+        raise ValueError("give symbols or a portfolio")
+    wanted = list(symbols or []) + [h.symbol for h in (portfolio.holdings if portfolio else [])]
+    universe = sorted({s.strip().upper() for s in wanted if s and s.strip()} - {"CASH"})
+    if len(universe) < 2:
+        raise ValueError("need at least two symbols to optimize")
+    matrix = load_close_matrix(market_data, universe, period=_period_for(window, interval), interval=interval)
+    snap = covariance_snapshot(matrix, window=window, interval=interval)
+    ppy = PERIODS_PER_YEAR.get(interval, 252)
+    mu, cov = snap.mean * ppy, snap.cov * ppy
+    warnings: List[str] = []
+    if snap.count < window:
+        warnings.append(f"Only {snap.count} return observations (window {window}).")
+
+    w, it, ok, warm = optimize_weights(mu, cov, matrix.symbols, spec, warm_start=warm_start)
+    if not ok:
+        warnings.append(f"Solver stopped after {it} iterations before reaching tolerance.")
+    var = float(w @ cov @ w)
+    rc = w * (cov @ w) / var if var > 0 else np.zeros_like(w)
+    current = None
+    if portfolio is not None:
+        last = dict(zip(matrix.symbols, matrix.close[-1].tolist()))
+        current = {s: round(v, 6) for s, v in targets_from_portfolio(portfolio, {**last, **(prices or {})}).items()}
+    logger.info(f"optimize objective={spec.objective} n={len(matrix.symbols)} iters={it} warm={warm} ok={ok}")
+    return OptimizationResult(
+        objective=spec.objective,
+        weights=_weights_dict(matrix.symbols, w),
+        expected_return_annual=round(float(w @ mu), 6),
+        volatility_annual=round(math.sqrt(max(var, 0.0)), 6),
+        risk_contributions={s: round(float(v), 6) for s, v in zip(matrix.symbols, rc.tolist()) if abs(v) > 5e-7},
+        current_weights=current,
+        observations=snap.count,
+        iterations=it,
+        converged=ok,
+        warm_started=warm,
+        frontier=efficient_frontier(mu, cov, matrix.symbols, spec, n_points=frontier_points) if frontier_points else None,
+        warnings=warnings,
+    )
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.core.schemas import DataQuality, QuantResult
+from src.utils.price_matrix import CloseMatrix, load_close_matrix
+from src.utils.quant_engine import compute_portfolio_metrics
+from src.utils.quant_indicators import PERIODS_PER_YEAR
+from src.utils.quant_models import PortfolioInput, RebalancePolicy, RebalancePolicyResult
+
+CASH = "CASH"
+
+# -----------------------------
+# Calendar
+# -----------------------------
+
+def check_days(dates: np.ndarray, frequency: str) -> np.ndarray:
+    """True on the first trading day of each new period (the day a calendar rebalance is considered)."""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    out = np.zeros(dates.shape[0], dtype=bool)
+    if dates.shape[0] < 2 or frequency == "never":
+        return out
+    if frequency == "daily":
+        out[1:] = True
+        return out
+    if frequency == "weekly":
+        days = dates.astype("int64")
+        key = days - (days + 3) % 7  # Monday of the week (1970-01-01 was a Thursday)
+    elif frequency == "monthly":
+        key = dates.astype("datetime64[M]").astype("int64")
+    elif frequency == "quarterly":
+        key = dates.astype("datetime64[M]").astype("int64") // 3
+    elif frequency == "annual":
+        key = dates.astype("datetime64[Y]").astype("int64")
+    else:
+        raise ValueError(f"unknown rebalance frequency: {frequency}")
+    out[1:] = key[1:] != key[:-1]
+    return out
+
+# -----------------------------
+# Simulation (all policies at once)
+# -----------------------------
+
+@dataclass
+class RebalanceSimResult:
+    symbols: List[str]
+    dates: np.ndarray  # datetime64[D]
+    policies: List[RebalancePolicy]
+    labels: List[str]
+    equity: np.ndarray  # (policies, dates), starts at initial_value
+    results: List[RebalancePolicyResult]
+
+    def to_quant_result(self, *, max_curves: int = 20) -> QuantResult:
+        """REBALANCE_SIM result: one table row per policy, equity curves for the first `max_curves` policies."""
+        best = max(self.results, key=lambda r: r.final_value) if self.results else None
+        return QuantResult(
+            metrics={
+                "symbols": self.symbols,
+                "policies": len(self.policies),
+                "start": str(self.dates[0]) if self.dates.size else None,
+                "end": str(self.dates[-1]) if self.dates.size else None,
+                "best_policy": best.label if best else None,
+            },
+            tables={"policies": [r.model_dump() for r in self.results]},
+            chart_data={
+                "date": np.datetime_as_string(self.dates, unit="D").tolist(),
+                "equity": {self.labels[k]: np.round(self.equity[k], 6).tolist()
+                           for k in range(min(max_curves, len(self.labels)))},
+            },
+            data_quality=DataQuality(),
+            confidence="high",
+        )
+
+def _policy_label(p: RebalancePolicy) -> str:
+    if p.label:
+        return p.label
+    band = f" band {p.drift_band:.0%}" if p.drift_band else ""
+    cost = f" {p.cost_bps:g}bps" if p.cost_bps else ""
+    return f"{p.frequency}{band}{cost}"
+
+def _target_matrix(symbols: List[str], policies: Sequence[RebalancePolicy],
+                   targets: Optional[Dict[str, float]]) -> np.ndarray:
+    col = {s: j for j, s in enumerate(symbols)}
+    W = np.zeros((len(policies), len(symbols)))
+    for k, p in enumerate(policies):
+        t = p.targets if p.targets is not None else targets
+        if not t:
+            raise ValueError(f"policy {k} has no target weights")
+        for sym, w in t.items():
+            key = sym.strip().upper()
+            if key not in col:
+                raise ValueError(f"target symbol {sym} has no price history")
+            if not w >= 0:
+                raise ValueError(f"target weight for {sym} must be >= 0")
+            W[k, col[key]] += float(w)
+        total = W[k].sum()
+        if total <= 0:
+            raise ValueError(f"policy {k} target weights sum to 0")
+        W[k] /= total
+    return W
+
+def simulate_rebalance(
+    prices: CloseMatrix,
+    policies: Sequence[RebalancePolicy],
+    *,
+    targets: Optional[Dict[str, float]] = None,
+    initial_value: float = 1.0,
+    periods_per_year: int = 252,
+) -> RebalanceSimResult:
+    """
+    Backtest every policy over the same aligned closes.
+    Holdings start at the targets. On a policy's check day its weights are compared with the targets, and
+    it trades back to them when any weight is off by more than drift_band (or always when drift_band is 0).
+    Costs are charged on the traded value. Between check days nothing trades, so the equity curves of all
+    policies for a whole stretch of dates are one matrix product (closes x holdings); Python only steps
+    through the days on which some policy checks.
+    """
+    if not policies:
+        raise ValueError("no policies given")
+    P = np.asarray(prices.close, dtype=np.float64)
+    T = P.shape[0]
+    if T < 2:
+        raise ValueError("need at least two aligned dates")
+    K = len(policies)
+    W = _target_matrix(prices.symbols, policies, targets)
+    band = np.array([p.drift_band for p in policies])
+    cost = np.array([p.cost_bps for p in policies]) / 1e4
+
+    calendars = {f: check_days(prices.dates, f) for f in {p.frequency for p in policies}}
+    C = np.stack([calendars[p.frequency] for p in policies])  # (K, T)
+    events = np.flatnonzero(C.any(axis=0))
+
+    H = initial_value * W / P[0]  # units held, per policy
+    E = np.empty((K, T))
+    turnover = np.zeros(K)
+    costs = np.zeros(K)
+    rebalances = np.zeros(K, dtype=np.int64)
+    start = 0
+    for e in events.tolist():
+        E[:, start:e + 1] = H @ P[start:e + 1].T
+        v = E[:, e]
+        w = H * P[e] / v[:, None]
+        drift = np.abs(w - W)
+        do = C[:, e] & (drift.max(axis=1) > band)
+        if do.any():
+            traded = drift[do].sum(axis=1)  # two-sided fraction of the portfolio
+            after = v[do] * (1.0 - cost[do] * traded)
+            costs[do] += v[do] - after
+            turnover[do] += 0.5 * traded
+            rebalances[do] += 1
+            H[do] = after[:, None] * W[do] / P[e]
+            E[do, e] = after
+        start = e + 1
+    if start < T:
+        E[:, start:] = H @ P[start:].T
+
+    years = (T - 1) / periods_per_year
+    final = E[:, -1]
+    growth = final / initial_value
+    log_r = np.diff(np.log(E), axis=1)
+    vol = log_r.std(axis=1, ddof=1) * math.sqrt(periods_per_year) if T > 2 else np.zeros(K)
+    mdd = (E / np.maximum.accumulate(E, axis=1) - 1.0).min(axis=1)
+    cagr = growth ** (1.0 / years) - 1.0 if years > 0 else growth - 1.0
+
+    labels = [_policy_label(p) for p in policies]
+    results = [
+        RebalancePolicyResult(
+            label=labels[k],
+            frequency=policies[k].frequency,
+            drift_band=float(band[k]),
+            cost_bps=float(policies[k].cost_bps),
+            final_value=round(float(final[k]), 6),
+            total_return=round(float(growth[k] - 1.0), 6),
+            cagr=round(float(cagr[k]), 6),
+            volatility_annual=round(float(vol[k]), 6),
+            max_drawdown=round(float(mdd[k]), 6),
+            turnover=round(float(turnover[k]), 6),
+            turnover_annual=round(float(turnover[k] / years), 6) if years > 0 else 0.0,
+            rebalances=int(rebalances[k]),
+            costs_paid=round(float(costs[k]), 6),
+            targets={prices.symbols[j]: round(float(W[k, j]), 6) for j in np.flatnonzero(W[k]).tolist()},
+        )
+        for k in range(K)
+    ]
+    return RebalanceSimResult(symbols=list(prices.symbols), dates=prices.dates, policies=list(policies),
+                              labels=labels, equity=E, results=results)
+
+# -----------------------------
+# MarketDataService entry point
+# -----------------------------
+
+def targets_from_portfolio(portfolio: PortfolioInput, prices: Dict[str, float]) -> Dict[str, float]:
+    """Current weights of a portfolio (as compute_portfolio_metrics sees them), usable as rebalance targets."""
+    holdings = [h.model_copy(update={"symbol": h.symbol.strip().upper()}) for h in portfolio.holdings]
+    m = compute_portfolio_metrics(portfolio.model_copy(update={"holdings": holdings}), prices=prices)
+    return {a.symbol: a.weight for a in m.allocations if a.weight > 0}
+
+def _with_cash(prices: CloseMatrix) -> CloseMatrix:
+    return CloseMatrix(
+        symbols=[*prices.symbols, CASH],
+        dates=prices.dates,
+        close=np.hstack([prices.close, np.ones((prices.close.shape[0], 1))]),
+    )
+
+def run_rebalance_sim(
+    market_data: Any,
+    policies: Sequence[RebalancePolicy],
+    *,
+    targets: Optional[Dict[str, float]] = None,
+    portfolio: Optional[PortfolioInput] = None,
+    period: str = "10y",
+    interval: str = "1d",
+    initial_value: float = 1.0,
+) -> RebalanceSimResult:
+    """
+    Load history for every symbol the policies need and simulate them together.
+    Targets come from `targets`, or from `portfolio` weighted at the latest closes. "CASH" is held at a
+    constant price of 1.
+    """
+    if targets is None and portfolio is None and any(p.targets is None for p in policies):
+        raise ValueError("give targets, a portfolio, or per-policy targets")
+    wanted = set()
+    for t in [targets, *(p.targets for p in policies)]:
+        wanted.update(s.strip().upper() for s in (t or {}))
+    if portfolio is not None:
+        wanted.update(h.symbol.strip().upper() for h in portfolio.holdings if h.symbol.strip())
+    symbols = sorted(wanted - {CASH})
+    if not symbols:
+        raise ValueError("no symbols with price history to simulate")
+    prices = _with_cash(load_close_matrix(market_data, symbols, period=period, interval=interval))
+    if portfolio is not None and targets is None:
+        last = dict(zip(prices.symbols, prices.close[-1].tolist()))
+        targets = targets_from_portfolio(portfolio, last)
+    return simulate_rebalance(prices, policies, targets=targets, initial_value=initial_value,
+                              periods_per_year=PERIODS_PER_YEAR.get(interval, 252))
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.config import SETTINGS
+from src.utils.cache import TTLCache
+from src.utils.logging import get_logger
+from src.utils.price_matrix import CloseMatrix, load_close_matrix
+from src.utils.quant_engine import compute_portfolio_metrics
+from src.utils.quant_indicators import PERIODS_PER_YEAR
+from src.utils.quant_models import PortfolioInput, PortfolioRisk, RiskContribution
+
+logger = get_logger("quant_risk")
+
+# -----------------------------
+# Rolling covariance with incremental updates
+# -----------------------------
+
+class RollingCovariance:
+    """
+    Mean/covariance of the last `window` return rows of a fixed symbol set.
+    - keeps the window's rows plus running sums of y and y*y^T (y = returns minus a fixed shift, which keeps
+      the sums well conditioned)
+    - update() with a longer history adds only the rows after the last one seen and subtracts the rows that
+      fall out of the window: O(k*N^2) for k new days instead of O(window*N^2)
+    - a revised last row (intraday bar moved) is swapped out; anything it can't line up triggers a rebuild,
+      and so does every `window` incremental rows, to stop rounding from accumulating
+    """
+
+    def __init__(self, symbols: Sequence[str], window: int) -> None:
+        if window < 2:
+            raise ValueError("window must be >= 2")
+        self.symbols = tuple(symbols)
+        self.window = int(window)
+        self.lock = threading.Lock()
+        n = len(self.symbols)
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.rows = np.empty((0, n))
+        self.shift = np.zeros(n)
+        self.s1 = np.zeros(n)
+        self.s2 = np.zeros((n, n))
+        self.rebuilds = 0
+        self.incremental_rows = 0
+        self._since_rebuild = 0
+
+    @property
+    def count(self) -> int:
+        return int(self.rows.shape[0])
+
+    def update(self, dates: np.ndarray, returns: np.ndarray) -> None:
+        """`dates`/`returns`: full aligned history (ascending); only what is new since the last call is applied."""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        returns = np.asarray(returns, dtype=np.float64)
+        if self.count == 0:
+            self._rebuild(dates, returns)
+            return
+        last = self.dates[-1]
+        i = int(np.searchsorted(dates, last))
+        if i >= dates.shape[0] or dates[i] != last:
+            self._rebuild(dates, returns)
+            return
+        start = i + 1
+        if not np.array_equal(returns[i], self.rows[-1]):
+            self._drop_last()
+            start = i
+        new = returns[start:]
+        if new.shape[0] == 0:
+            return
+        if new.shape[0] >= self.window or self._since_rebuild + new.shape[0] > self.window:
+            self._rebuild(dates, returns)
+            return
+        y = new - self.shift
+        self.s1 += y.sum(axis=0)
+        self.s2 += y.T @ y
+        rows = np.vstack([self.rows, new])
+        kept_dates = np.concatenate([self.dates, dates[start:]])
+        extra = rows.shape[0] - self.window
+        if extra > 0:
+            old = rows[:extra] - self.shift
+            self.s1 -= old.sum(axis=0)
+            self.s2 -= old.T @ old
+            rows, kept_dates = rows[extra:], kept_dates[extra:]
+        self.rows, self.dates = rows, kept_dates
+        self.incremental_rows += new.shape[0]
+        self._since_rebuild += new.shape[0]
+
+    def _drop_last(self) -> None:
+        y = self.rows[-1] - self.shift
+        self.s1 -= y
+        self.s2 -= np.outer(y, y)
+        self.rows, self.dates = self.rows[:-1], self.dates[:-1]
+
+    def _rebuild(self, dates: np.ndarray, returns: np.ndarray) -> None:
+        rows = returns[-self.window:]
+        self.rows, self.dates = rows.copy(), dates[-self.window:].copy()
+        self.shift = rows.mean(axis=0) if rows.shape[0] else np.zeros(len(self.symbols))
+        y = rows - self.shift
+        self.s1 = y.sum(axis=0)
+        self.s2 = y.T @ y
+        self.rebuilds += 1
+        self._since_rebuild = 0
+
+    def mean(self) -> np.ndarray:
+        return self.s1 / max(self.count, 1) + self.shift
+
+    def cov(self) -> np.ndarray:
+        n = self.count
+        if n < 2:
+            return np.full((len(self.symbols), len(self.symbols)), np.nan)
+        c = (self.s2 - np.outer(self.s1, self.s1) / n) / (n - 1)
+        return (c + c.T) / 2.0
+
+# one state per (symbol set, window, interval): a day of new data only costs its own rows
+_COV_CACHE = TTLCache(default_ttl_seconds=24 * 3600, max_items=64, stripes=4)
+
+@dataclass(frozen=True)
+class CovarianceSnapshot:
+    """Mean/covariance/rows of a RollingCovariance as of one update; safe to read without its lock."""
+    mean: np.ndarray
+    cov: np.ndarray
+    rows: np.ndarray
+    dates: np.ndarray
+    count: int
+
+def _cov_state(prices: CloseMatrix, window: int, interval: str) -> RollingCovariance:
+    key = f"cov:{','.join(prices.symbols)}:{int(window)}:{interval}"
+    state, _, _ = _COV_CACHE.get_or_compute(key, lambda: RollingCovariance(prices.symbols, window))
+    return state
+
+def cached_covariance(prices: CloseMatrix, *, window: int = 252, interval: str = "1d") -> RollingCovariance:
+    """
+    Bring the cached RollingCovariance for this symbol set up to date with `prices` and return it.
+    The state is shared: read it under `state.lock`, or use covariance_snapshot.
+    """
+    state = _cov_state(prices, window, interval)
+    with state.lock:
+        state.update(prices.dates[1:], prices.returns())
+    return state
+
+def covariance_snapshot(prices: CloseMatrix, *, window: int = 252, interval: str = "1d") -> CovarianceSnapshot:
+    """Like cached_covariance, but returns the figures for `prices` taken under the same lock as the update."""
+    state = _cov_state(prices, window, interval)
+    with state.lock:
+        state.update(prices.dates[1:], prices.returns())
+        # update() replaces rows/dates rather than writing into them, so the references stay valid
+        return CovarianceSnapshot(mean=state.mean(), cov=state.cov(), rows=state.rows, dates=state.dates,
+                                  count=state.count)
+
+# -----------------------------
+# Portfolio risk
+# -----------------------------
+
+def _historical_var(r: np.ndarray, confidence: float) -> Tuple[float, float]:
+    if r.shape[0] == 0:
+        return 0.0, 0.0
+    q = float(np.quantile(r, 1.0 - confidence))
+    tail = r[r <= q]
+    return max(0.0, -q), max(0.0, -float(tail.mean()) if tail.size else -q)
+
+def compute_portfolio_risk(
+    weights: Dict[str, float],
+    prices: CloseMatrix,
+    *,
+    benchmark: Optional[str] = None,
+    window: int = 252,
+    confidence: float = 0.95,
+    horizon_days: int = 1,
+    interval: str = "1d",
+) -> PortfolioRisk:
+    """
+    Risk of fixed `weights` (fractions of total value; anything not in `prices`, e.g. CASH, is riskless)
+    over the last `window` returns. VaR/CVaR are losses as positive fractions over `horizon_days`
+    (historical figures scale one-period returns by sqrt(horizon)).
+    """
+    if not 0.5 < confidence < 1.0:
+        raise ValueError("confidence must be in (0.5, 1)")
+    snap = covariance_snapshot(prices, window=window, interval=interval)
+    warnings: List[str] = []
+    col = {s: j for j, s in enumerate(prices.symbols)}
+    w = np.zeros(len(prices.symbols))
+    for sym, wt in weights.items():
+        j = col.get(sym.strip().upper())
+        if j is not None:
+            w[j] += float(wt)
+        elif sym.strip().upper() != "CASH" and wt > 0:
+            warnings.append(f"No price history for {sym}; treated as riskless.")
+    if snap.count < window:
+        warnings.append(f"Only {snap.count} return observations (window {window}).")
+
+    ppy = PERIODS_PER_YEAR.get(interval, 252)
+    cov, mu = snap.cov, snap.mean
+    var_p = float(w @ cov @ w)
+    sigma = math.sqrt(max(var_p, 0.0))
+    mu_p = float(w @ mu)
+    h = max(1, int(horizon_days))
+
+    z = NormalDist().inv_cdf(confidence)
+    pdf = math.exp(-0.5 * z * z) / math.sqrt(2 * math.pi)
+    var_param = max(0.0, -(mu_p * h - z * sigma * math.sqrt(h)))
+    cvar_param = max(0.0, -(mu_p * h - sigma * math.sqrt(h) * pdf / (1.0 - confidence)))
+    var_hist, cvar_hist = _historical_var(snap.rows @ w, confidence)
+    var_hist, cvar_hist = var_hist * math.sqrt(h), cvar_hist * math.sqrt(h)
+
+    beta = None
+    bench = benchmark.strip().upper() if benchmark else None
+    if bench and bench in col:
+        b = col[bench]
+        if cov[b, b] > 0:
+            beta = round(float((w @ cov[:, b]) / cov[b, b]), 6)
+
+    contributions: List[RiskContribution] = []
+    if sigma > 0:
+        marginal = cov @ w / sigma
+        ann = math.sqrt(ppy)
+        for j in np.flatnonzero(w).tolist():
+            contributions.append(RiskContribution(
+                symbol=prices.symbols[j],
+                weight=round(float(w[j]), 6),
+                marginal_vol=round(float(marginal[j] * ann), 6),
+                contribution_vol=round(float(w[j] * marginal[j] * ann), 6),
+                pct_of_risk=round(float(w[j] * marginal[j] / sigma), 6),
+            ))
+        contributions.sort(key=lambda c: c.contribution_vol, reverse=True)
+
+    return PortfolioRisk(
+        observations=snap.count,
+        confidence=confidence,
+        horizon_days=h,
+        volatility_annual=round(sigma * math.sqrt(ppy), 6),
+        benchmark=bench,
+        beta=beta,
+        var_historical=round(var_hist, 6),
+        cvar_historical=round(cvar_hist, 6),
+        var_parametric=round(var_param, 6),
+        cvar_parametric=round(cvar_param, 6),
+        contributions=contributions,
+        as_of=str(snap.dates[-1]) if snap.count else None,
+        warnings=warnings,
+    )
+
+def _period_for(window: int, interval: str) -> str:
+    years = window / PERIODS_PER_YEAR.get(interval, 252)
+    return f"{max(1, math.ceil(years * 1.1 + 0.1))}y"
+
+def portfolio_risk(
+    portfolio: PortfolioInput,
+    prices: Dict[str, float],
+    market_data: Any,
+    *,
+    benchmark: Optional[str] = None,
+    window: Optional[int] = None,
+    confidence: Optional[float] = None,
+    horizon_days: int = 1,
+    interval: str = "1d",
+) -> PortfolioRisk:
+    """Weights from compute_portfolio_metrics (today's prices), history from MarketDataService."""
+    benchmark = SETTINGS.quant_risk_benchmark if benchmark is None else benchmark
+    window = int(window or SETTINGS.quant_risk_window_days)
+    confidence = float(confidence or SETTINGS.quant_risk_confidence)
+    metrics = compute_portfolio_metrics(portfolio, prices=prices)
+    weights = {a.symbol.upper(): a.weight for a in metrics.allocations if a.symbol != "CASH" and a.weight > 0}
+    if not weights:
+        raise ValueError("portfolio has no priced holdings")
+    symbols = sorted(set(weights) | ({benchmark.strip().upper()} if benchmark else set()))
+    matrix = load_close_matrix(market_data, symbols, period=_period_for(window, interval), interval=interval)
+    logger.info(f"portfolio_risk symbols={len(symbols)} rows={matrix.dates.shape[0]} window={window}")
+    return compute_portfolio_risk(weights, matrix, benchmark=benchmark, window=window, confidence=confidence,
+                                  horizon_days=horizon_days, interval=interval)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def parse_retry_after(value: Optional[str], *, now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Parse an HTTP Retry-After header into seconds.
+    Accepts delta-seconds ("120") or an HTTP-date; returns None if absent or unparseable.
+    """
+    if value is None:
+        return None
+    v = str(value).strip()
+    if not v:
+        return None
+    try:
+        return max(0.0, float(v))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(v)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+def retry_after_from_error(exc: BaseException) -> Optional[float]:
+    """Retry-After hint carried by an HTTP error (requests.HTTPError and friends), if any."""
+    resp = getattr(exc, "response", None)
+    headers = getattr(resp, "headers", None)
+    if not headers:
+        return None
+    return parse_retry_after(headers.get("Retry-After"))
+
+
+def _always(_: BaseException) -> bool:
+    return True
+
+
+@dataclass
+class RetryStats:
+    """Filled in by RetryPolicy.call/acall: attempts made and total time spent backing off."""
+    attempts: int = 0
+    backoff_seconds: float = 0.0
+    last_error: Optional[BaseException] = None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff with jitter, shared by all providers.
+    - `retry_on` decides which errors are transient
+    - a server Retry-After hint overrides the computed delay
+    - `budget_seconds` caps total backoff per request; an optional monotonic deadline caps wall time
+    - `call` sleeps the current thread, `acall` awaits (no thread held while waiting)
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.8
+    max_delay: float = 8.0
+    jitter: float = 0.5  # fraction of each delay that is randomized
+    budget_seconds: float = 10.0
+    retry_on: Callable[[BaseException], bool] = field(default=_always)
+
+    def backoff(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        j = min(1.0, max(0.0, self.jitter))
+        delay = delay * (1.0 - j) + delay * j * random.random()
+        hint = retry_after_from_error(exc) if exc is not None else None
+        if hint is not None:
+            delay = max(delay, hint)
+        return delay
+
+    def call(self, fn: Callable[[], T], *, stats: Optional[RetryStats] = None,
+             deadline: Optional[float] = None) -> T:
+        stats = stats if stats is not None else RetryStats()
+        attempt = 0
+        while True:
+            attempt += 1
+            stats.attempts = attempt
+            try:
+                return fn()
+            except Exception as e:
+                stats.last_error = e
+                delay = self._next_delay(attempt, e, stats, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                stats.backoff_seconds += delay
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], *, stats: Optional[RetryStats] = None,
+                    deadline: Optional[float] = None) -> T:
+        stats = stats if stats is not None else RetryStats()
+        attempt = 0
+        while True:
+            attempt += 1
+            stats.attempts = attempt
+            try:
+                return await fn()
+            except Exception as e:
+                stats.last_error = e
+                delay = self._next_delay(attempt, e, stats, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                stats.backoff_seconds += delay
+
+    def _next_delay(self, attempt: int, exc: BaseException, stats: RetryStats,
+                    deadline: Optional[float]) -> Optional[float]:
+        """Delay before the next attempt, or None to give up and re-raise."""
+        if attempt >= self.max_attempts or not self.retry_on(exc):
+            return None
+        delay = self.backoff(attempt, exc)
+        if stats.backoff_seconds + delay > self.budget_seconds:
+            return None
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
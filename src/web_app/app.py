@@ -1,6 +1,7 @@
 import streamlit as st
 import uuid
 from src.core.config import SETTINGS
+from src.core.services import get_services
 from src.utils.logging import setup_logging
 from src.core.schemas import UserProfile
 from src.pages import chat, portfolio, market, goals, tax, news
@@ -10,6 +11,9 @@ setup_logging(SETTINGS.log_level)
 
 st.set_page_config(page_title="AI Finance Assistant", layout="wide")
 
+# Shared services (market data, retriever) are built once per process; reruns are no-ops
+get_services().warmup()
+
 # Session initialization
 def _init_session() -> None:
     st.session_state.setdefault("session_id", str(uuid.uuid4()))
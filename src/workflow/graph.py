@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from functools import partial
 from typing import Any, Dict, Optional
 from uuid import uuid4
 
@@ -11,6 +12,7 @@ from src.agents.goal_agent import GoalAgent
 from src.agents.tax_agent import TaxAgent
 from src.agents.news_agent import NewsAgent
 from src.core.router import Router
+from src.core.services import ServiceRegistry, get_services
 from src.core.schemas import (
     AgentRequest,
     AgentResponse,
@@ -21,9 +23,7 @@ from src.core.schemas import (
     ToolResult,
     UserProfile,
 )
-from src.rag.retriever import Retriever
 from src.tools.quant_tools import tool_compute_goal_projection
-from src.utils.market_data import MarketDataService
 
 
 # -----------------------------
@@ -110,13 +110,13 @@ def router_node(state: Dict[str, Any]) -> Dict[str, Any]:
     return state
 
 
-def rag_retrieve_node(state: Dict[str, Any]) -> Dict[str, Any]:
+def rag_retrieve_node(state: Dict[str, Any], services: Optional[ServiceRegistry] = None) -> Dict[str, Any]:
     _append_trace(state, "RAGRetrieveNode")
     tool_name = "RAG_RETRIEVE"
     call_id = _tool_start(state, tool_name)
     try:
         q = (state.get("user_text") or "").strip()
-        rag = Retriever().retrieve(query=q, top_k=5, use_mmr=True, mmr_lambda=0.5, min_score=0.0)
+        rag = (services or get_services()).retriever.retrieve(query=q, top_k=5, use_mmr=True, mmr_lambda=0.5, min_score=0.0)
         state["rag_result"] = rag
         _tool_end_ok(state, call_id, tool_name, {"query": q, "chunks": len(rag.chunks)})
     except Exception as e:
@@ -125,7 +125,7 @@ def rag_retrieve_node(state: Dict[str, Any]) -> Dict[str, Any]:
     return state
 
 
-def financeqa_node(state: Dict[str, Any]) -> Dict[str, Any]:
+def financeqa_node(state: Dict[str, Any], services: Optional[ServiceRegistry] = None) -> Dict[str, Any]:
     _append_trace(state, "FinanceQANode")
     req = AgentRequest(
         user_text=state.get("user_text") or "",
@@ -135,15 +135,15 @@ def financeqa_node(state: Dict[str, Any]) -> Dict[str, Any]:
         turn_id=state.get("turn_id", 0),
         request_id=state.get("request_id"),
     )
-    resp = FinanceQAAgent().run(req)
+    resp = FinanceQAAgent(retriever=(services or get_services()).retriever).run(req)
     state["final"] = resp
     return state
 
 
-def market_data_node(state: Dict[str, Any]) -> Dict[str, Any]:
+def market_data_node(state: Dict[str, Any], services: Optional[ServiceRegistry] = None) -> Dict[str, Any]:
     _append_trace(state, "MarketDataNode")
     tool_name = "MARKET_QUOTE"
-    svc = MarketDataService()
+    svc = (services or get_services()).market_data
 
     # If portfolio provided, fetch for each holding; else single symbol from text
     symbols = []
@@ -154,15 +154,25 @@ def market_data_node(state: Dict[str, Any]) -> Dict[str, Any]:
     else:
         symbols = [_extract_symbol(state.get("user_text") or "")]
 
+    # One batched fetch for all symbols; per-symbol failures come back in batch.errors.
     quotes = {}
-    for sym in [s for s in symbols if s]:
-        call_id = _tool_start(state, tool_name)
-        try:
-            q = svc.get_quote(sym)
-            quotes[sym] = q
-            _tool_end_ok(state, call_id, tool_name, {"symbol": sym, "price": float(q.price)})
-        except Exception as e:
-            _tool_end_error(state, call_id, tool_name, "MARKET_QUOTE_FAILED", str(e))
+    call_id = _tool_start(state, tool_name)
+    try:
+        batch = svc.get_quotes([s for s in symbols if s])
+        quotes = batch.quotes
+        data = {
+            "symbols": list(quotes),
+            "prices": {sym: float(q.price) for sym, q in quotes.items()},
+            "errors": batch.errors,
+            "partial": batch.partial,
+        }
+        if quotes or not batch.errors:
+            _tool_end_ok(state, call_id, tool_name, data)
+        else:
+            msg = "; ".join(f"{sym}: {err}" for sym, err in batch.errors.items())
+            _tool_end_error(state, call_id, tool_name, "MARKET_QUOTE_FAILED", msg)
+    except Exception as e:
+        _tool_end_error(state, call_id, tool_name, "MARKET_QUOTE_FAILED", str(e))
 
     state["market_quotes"] = quotes
     return state
@@ -252,7 +262,7 @@ def goal_node(state: Dict[str, Any]) -> Dict[str, Any]:
 # -----------------------------
 
 
-def tax_node(state: Dict[str, Any]) -> Dict[str, Any]:
+def tax_node(state: Dict[str, Any], services: Optional[ServiceRegistry] = None) -> Dict[str, Any]:
     _append_trace(state, "TaxNode")
     req = AgentRequest(
         user_text=state.get("user_text") or "",
@@ -261,7 +271,7 @@ def tax_node(state: Dict[str, Any]) -> Dict[str, Any]:
         turn_id=state.get("turn_id", 0),
         request_id=state.get("request_id"),
     )
-    resp = TaxAgent().run(req)
+    resp = TaxAgent(retriever=(services or get_services()).retriever).run(req)
     state["final"] = resp
     return state
 
@@ -279,18 +289,24 @@ def news_node(state: Dict[str, Any]) -> Dict[str, Any]:
     state["final"] = resp
     return state
 
-def build_graph():
+def build_graph(services: Optional[ServiceRegistry] = None):
+    """
+    Compile the agent graph.
+    Nodes that need the market data service or the retriever get them from `services`
+    (default: the process-wide registry) instead of constructing their own.
+    """
+    services = services if services is not None else get_services()
     g = StateGraph(dict)
 
     g.add_node("router", router_node)
 
-    g.add_node("rag", rag_retrieve_node)
-    g.add_node("financeqa", financeqa_node)
+    g.add_node("rag", partial(rag_retrieve_node, services=services))
+    g.add_node("financeqa", partial(financeqa_node, services=services))
 
-    g.add_node("market_data", market_data_node)
+    g.add_node("market_data", partial(market_data_node, services=services))
     g.add_node("market_resp", market_response_node)
 
-    g.add_node("tax", tax_node)
+    g.add_node("tax", partial(tax_node, services=services))
     g.add_node("news", news_node)
 
     g.add_node("quant", quant_compute_node)
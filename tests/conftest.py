@@ -4,3 +4,40 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]   # project root
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pytest
+
+from src.core.schemas import ArrayPriceSeries
+from src.utils.price_matrix import CloseMatrix
+
+
+def _close_matrix(symbols=("AAA", "BBB", "SPY"), T: int = 400, seed: int = 1) -> CloseMatrix:
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64("2022-01-03"), np.arange(T), roll="forward")
+    common = rng.normal(0.0004, 0.01, (T, 1))
+    close = 100 * np.exp(np.cumsum(common + rng.normal(0, 0.008, (T, len(symbols))), axis=0))
+    return CloseMatrix(symbols=list(symbols), dates=dates, close=close)
+
+
+class FakeMarket:
+    """get_history_close served from a CloseMatrix (stands in for MarketDataService)."""
+
+    def __init__(self, m: CloseMatrix):
+        self.m = m
+
+    def get_history_close(self, symbol, *, period, interval, force_refresh=False):
+        j = self.m.symbols.index(symbol)
+        return ArrayPriceSeries(symbol=symbol, dates=self.m.dates, close=self.m.close[:, j])
+
+
+@pytest.fixture
+def make_close_matrix():
+    """Factory for synthetic daily closes: one market factor plus per-symbol noise, business-day dates."""
+    return _close_matrix
+
+
+@pytest.fixture
+def fake_market():
+    """Factory: fake_market(close_matrix) -> object with MarketDataService.get_history_close."""
+    return FakeMarket
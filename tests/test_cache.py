@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.cache import TTLCache
+
+
+def test_get_or_compute_single_flight_threads():
+    cache = TTLCache(default_ttl_seconds=60)
+    calls = {"n": 0}
+    gate = threading.Event()
+
+    def loader():
+        calls["n"] += 1
+        gate.wait(2)
+        return 42
+
+    results = []
+
+    def worker():
+        results.append(cache.get_or_compute("k", loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join(2)
+
+    assert calls["n"] == 1
+    assert len(results) == 10
+    assert all(v == 42 for v, _, _ in results)
+    assert sum(1 for _, _, from_cache in results if not from_cache) == 1
+
+
+def test_get_or_compute_error_reaches_waiters_and_is_not_cached():
+    cache = TTLCache(default_ttl_seconds=60)
+    gate = threading.Event()
+
+    def boom():
+        gate.wait(2)
+        raise RuntimeError("provider down")
+
+    errors = []
+
+    def worker():
+        try:
+            cache.get_or_compute("k", boom)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join(2)
+
+    assert len(errors) == 4
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: "ok")[0] == "ok"
+
+
+def test_aget_or_compute_single_flight():
+    cache = TTLCache(default_ttl_seconds=60)
+    calls = {"n": 0}
+
+    async def loader():
+        calls["n"] += 1
+        await asyncio.sleep(0.05)
+        return "v"
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_compute("k", loader) for _ in range(8)))
+
+    results = asyncio.run(main())
+    assert calls["n"] == 1
+    assert [v for v, _, _ in results] == ["v"] * 8
+
+
+def test_waiters_stop_waiting_on_a_stuck_loader():
+    cache = TTLCache(default_ttl_seconds=60, wait_timeout_seconds=0.1)
+    stuck = threading.Event()
+    leader = threading.Thread(target=lambda: cache.get_or_compute("k", lambda: stuck.wait(5) and "late"))
+    leader.start()
+    time.sleep(0.05)
+
+    t0 = time.monotonic()
+    value, _, from_cache = cache.get_or_compute("k", lambda: "own")
+    assert (value, from_cache) == ("own", False) and time.monotonic() - t0 < 2
+
+    async def main():
+        return await cache.aget_or_compute("k2", _async_const("own2"))
+
+    t = threading.Thread(target=lambda: cache.get_or_compute("k2", lambda: stuck.wait(5) and "late"))
+    t.start()
+    time.sleep(0.05)
+    assert asyncio.run(main())[0] == "own2"
+
+    stuck.set()
+    leader.join(2)
+    t.join(2)
+    assert cache.get("k")[0] == "late"  # the leader still publishes, and nothing was cancelled under it
+
+
+def _async_const(v):
+    async def loader():
+        return v
+    return loader
+
+
+def test_refresh_bypasses_cached_value():
+    cache = TTLCache(default_ttl_seconds=60)
+    cache.set("k", 1)
+    assert cache.get_or_compute("k", lambda: 2) == (1, pytest.approx(60, abs=1), True)
+    value, _, from_cache = cache.get_or_compute("k", lambda: 2, refresh=True)
+    assert (value, from_cache) == (2, False)
+    assert cache.get("k")[0] == 2
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache(default_ttl_seconds=60, max_items=3, stripes=1)
+    for k in ("a", "b", "c"):
+        cache.set(k, k)
+    assert cache.get("a")[0] == "a"  # touch: "b" is now least recently used
+    cache.set("d", "d")
+
+    assert cache.get("b") is None
+    assert {k for k in "acd" if cache.get(k)} == {"a", "c", "d"}
+    st = cache.stats()
+    assert st["size"] == 3
+    assert st["evictions"] == 1
+    assert st["hits"] == 4 and st["misses"] == 1
+
+
+def test_expired_entries_are_purged_before_evicting_live_ones():
+    now = {"t": 1000.0}
+    cache = TTLCache(default_ttl_seconds=60, max_items=2, stripes=1, clock=lambda: now["t"])
+    cache.set("short", 1, ttl_seconds=5)
+    cache.set("long", 2, ttl_seconds=600)
+    now["t"] += 10
+    cache.set("new", 3)
+
+    assert cache.get("long") == (2, 590)
+    assert cache.get("new") == (3, 60)
+    st = cache.stats()
+    assert st["expirations"] == 1
+    assert st["evictions"] == 0
+
+
+def test_striped_cache_keeps_every_key_under_capacity():
+    cache = TTLCache(default_ttl_seconds=60, max_items=4096, stripes=8)
+    for i in range(1000):
+        cache.set(f"quote:S{i}", i)
+    assert len(cache) == 1000
+    assert all(cache.get(f"quote:S{i}")[0] == i for i in range(1000))
+
+
+def test_small_caches_hold_max_items_keys():
+    for max_items in (1, 8, 16, 63):
+        cache = TTLCache(default_ttl_seconds=60, max_items=max_items)
+        for i in range(max_items):
+            cache.set(f"k{i}", i)
+        assert len(cache) == max_items
+        assert all(cache.get(f"k{i}")[0] == i for i in range(max_items))
+        cache.set("extra", -1)
+        assert len(cache) == max_items and cache.get("k0") is None  # least recently used goes first
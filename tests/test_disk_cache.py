@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from src.core.schemas import MarketQuote
+from src.utils.cache import TTLCache
+from src.utils.disk_cache import DiskCache
+
+
+def test_values_survive_a_new_process_instance(tmp_path):
+    path = str(tmp_path / "market.sqlite")
+    DiskCache(path).set("quote:AAPL", MarketQuote(symbol="AAPL", price=190.5, provider="stooq"), ttl_seconds=60)
+
+    hit = DiskCache(path).get("quote:AAPL")
+    assert hit is not None
+    q, remaining = hit
+    assert q.price == 190.5 and 0 < remaining <= 60
+
+
+def test_expired_rows_are_misses(tmp_path):
+    now = {"t": 1000.0}
+    dc = DiskCache(str(tmp_path / "c.sqlite"), clock=lambda: now["t"])
+    dc.set("k", 1, ttl_seconds=5)
+    now["t"] += 6
+    assert dc.get("k") is None
+    assert dc.stats()["rows"] == 0
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    now = {"t": 1000.0}
+    dc = DiskCache(str(tmp_path / "c.sqlite"), max_bytes=20_000, clock=lambda: now["t"])
+    for i in range(10):
+        now["t"] += 1
+        dc.set(f"k{i}", b"x" * 3000, ttl_seconds=600)
+        if i >= 1:
+            now["t"] += 1
+            dc.get("k0")  # keep k0 hot
+
+    st = dc.stats()
+    assert st["bytes"] <= 20_000
+    assert dc.get("k0") is not None
+    assert dc.get("k1") is None
+
+
+def test_ttlcache_reads_through_and_writes_through_l2(tmp_path):
+    l2 = DiskCache(str(tmp_path / "c.sqlite"))
+    TTLCache(default_ttl_seconds=60, l2=l2).set("history:AAPL:1mo:1d", [1.0, 2.0], ttl_seconds=60, l2_ttl_seconds=3600)
+
+    fresh = TTLCache(default_ttl_seconds=60, l2=l2)
+    calls = []
+    value, remaining, from_cache = fresh.get_or_compute("history:AAPL:1mo:1d", lambda: calls.append(1) or [9.0])
+    assert value == [1.0, 2.0] and from_cache is True
+    assert remaining <= 60  # memory copy never outlives the in-memory default
+    assert calls == []
+    assert fresh.stats()["l2_hits"] == 1
+
+
+def test_l2_ttl_can_depend_on_the_loaded_value(tmp_path):
+    now = {"t": 1000.0}
+    l2 = DiskCache(str(tmp_path / "c.sqlite"), clock=lambda: now["t"])
+    cache = TTLCache(default_ttl_seconds=60, l2=l2, clock=lambda: now["t"])
+    cache.get_or_compute("a", lambda: [1.0], 60, l2_ttl_seconds=lambda v: 3600 if v == [1.0] else 60)
+    cache.get_or_compute("b", lambda: [2.0], 60, l2_ttl_seconds=lambda v: 3600 if v == [1.0] else 60)
+
+    now["t"] += 120
+    assert l2.get("a") is not None
+    assert l2.get("b") is None
@@ -51,10 +51,13 @@ def test_graph_market(monkeypatch, graph):
 
     monkeypatch.setattr(
         md.MarketDataService,
-        "get_quote",
-        lambda self, symbol: MarketQuote(
-            symbol=symbol, price=123.45, currency="USD", provider="yfinance", as_of="2025-01-01T00:00:00Z", from_cache=True
-        ),
+        "get_quotes",
+        lambda self, symbols, **kw: md.QuoteBatch(quotes={
+            s.upper(): MarketQuote(
+                symbol=s, price=123.45, currency="USD", provider="yfinance", as_of="2025-01-01T00:00:00Z", from_cache=True
+            )
+            for s in symbols
+        }),
     )
     out = graph.invoke({"user_text": "AAPL price", "user_profile": UserProfile()})
     assert "Market snapshot" in out["final"].answer_md
@@ -66,10 +69,13 @@ def test_graph_portfolio(monkeypatch, graph):
     from src.utils import market_data as md
     monkeypatch.setattr(
         md.MarketDataService,
-        "get_quote",
-        lambda self, symbol: MarketQuote(
-            symbol=symbol, price=100.0, currency="USD", provider="yfinance", as_of="2025-01-01T00:00:00Z", from_cache=True
-        ),
+        "get_quotes",
+        lambda self, symbols, **kw: md.QuoteBatch(quotes={
+            s.upper(): MarketQuote(
+                symbol=s, price=100.0, currency="USD", provider="yfinance", as_of="2025-01-01T00:00:00Z", from_cache=True
+            )
+            for s in symbols
+        }),
     )
 
     pf = PortfolioInput(
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from src.core.schemas import PriceSeries
+from src.utils.cache import TTLCache
+from src.utils.history_store import HistoryStore, period_start, resample_last
+from src.utils.market_data import MarketDataService, SymbolNotFound
+from src.utils.provider_health import ProviderScoreboard
+
+
+def _business_days(start: date, end: date):
+    d, out = start, []
+    while d <= end:
+        if d.weekday() < 5:
+            out.append(d.isoformat())
+        d += timedelta(days=1)
+    return out
+
+
+def test_period_start_calendar_math():
+    today = date(2024, 3, 31)
+    assert period_start("1mo", today) == date(2024, 2, 29)
+    assert period_start("2y", today) == date(2022, 3, 31)
+    assert period_start("ytd", today) == date(2024, 1, 1)
+    assert period_start("max", today) is None
+    with pytest.raises(ValueError):
+        period_start("forever", today)
+
+
+def test_weekly_resample_takes_last_close_of_each_monday_week():
+    dates = np.array(["2024-01-04", "2024-01-05", "2024-01-08", "2024-01-10", "2024-01-15"], dtype="datetime64[D]")
+    close = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    wd, wc = resample_last(dates, close, "1wk")
+    assert [str(d) for d in wd] == ["2024-01-01", "2024-01-08", "2024-01-15"]
+    assert wc.tolist() == [2.0, 4.0, 5.0]
+
+
+def test_merge_upserts_by_date_and_plans_only_the_tail(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    today = date(2024, 6, 14)
+    assert store.plan("AAPL", "1mo", today).start is None  # empty store: full download
+
+    store.merge("AAPL", ["2024-06-10", "2024-06-11"], [10.0, 11.0], provider="stooq", covers_from="2024-05-14")
+    store.merge("AAPL", ["2024-06-11", "2024-06-12"], [11.5, 12.0], provider="stooq", covers_from="2024-05-14")
+
+    h = store.load("AAPL")
+    assert [str(d) for d in h.dates] == ["2024-06-10", "2024-06-11", "2024-06-12"]
+    assert h.close.tolist() == [10.0, 11.5, 12.0]
+    assert len(list((tmp_path / "AAPL").glob("*.npy"))) == 2  # old generations cleaned up
+
+    plan = store.plan("AAPL", "1mo", today)
+    assert plan.start == date(2024, 6, 12)
+    assert store.plan("AAPL", "1y", today).start is None  # further back than stored: backfill
+
+
+
+def test_nan_refetch_keeps_the_stored_close(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    today = date(2024, 6, 14)
+    store.merge("AAPL", ["2024-06-10", "2024-06-11"], [10.0, 11.0], provider="stooq", covers_from="2024-05-14")
+    store.merge("AAPL", ["2024-06-11", "2024-06-12", "2024-06-13"], [np.nan, 12.0, np.inf],
+                provider="stooq", covers_from="2024-05-14")
+
+    h = store.load("AAPL")
+    assert [str(d) for d in h.dates] == ["2024-06-10", "2024-06-11", "2024-06-12"]
+    assert h.close.tolist() == [10.0, 11.0, 12.0]
+    assert store.plan("AAPL", "1mo", today).start == date(2024, 6, 12)
+
+
+def test_concurrent_writers_never_delete_the_live_generation(tmp_path, monkeypatch):
+    import os
+    import time
+
+    from src.utils import history_store
+
+    a, b = HistoryStore(str(tmp_path)), HistoryStore(str(tmp_path))  # separate locks, like two processes
+    a.merge("MSFT", ["2024-06-10"], [10.0], provider="stooq", covers_from="2024-06-10")
+    real_replace = os.replace
+    fired = []
+
+    def replace_then_other_writer(src, dst):
+        real_replace(src, dst)
+        if not fired:
+            fired.append(1)
+            # the other process commits between our meta.json swap and our cleanup
+            b.merge("MSFT", ["2024-06-12"], [12.0], provider="stooq", covers_from="2024-06-10")
+
+    monkeypatch.setattr(history_store.os, "replace", replace_then_other_writer)
+    a.merge("MSFT", ["2024-06-11"], [11.0], provider="stooq", covers_from="2024-06-10")
+    monkeypatch.setattr(history_store.os, "replace", real_replace)
+
+    h = HistoryStore(str(tmp_path)).load("MSFT")
+    assert h is not None and [str(d) for d in h.dates] == ["2024-06-10", "2024-06-11", "2024-06-12"]
+
+    # generations nobody points at are swept once they are old enough
+    orphan = tmp_path / "MSFT" / "dates-orphan.npy"
+    orphan.write_bytes(b"")
+    a.merge("MSFT", ["2024-06-13"], [13.0], provider="stooq", covers_from="2024-06-10")
+    assert orphan.exists()
+    old = time.time() - history_store._ORPHAN_AGE_SECONDS - 60
+    os.utime(orphan, (old, old))
+    a.merge("MSFT", ["2024-06-14"], [14.0], provider="stooq", covers_from="2024-06-10")
+    assert not orphan.exists()
+    assert len(list((tmp_path / "MSFT").glob("*.npy"))) == 2
+
+class _FakeProvider:
+    def __init__(self, today: date) -> None:
+        self.today = today
+        self.calls = []
+
+    def __call__(self, provider, symbol, period, interval, start=None):
+        self.calls.append((period, interval, start))
+        first = start or period_start(period, self.today) or date(2000, 1, 3)
+        dates = _business_days(first, self.today)
+        if not dates:
+            raise SymbolNotFound("no rows")
+        return PriceSeries(symbol=symbol, dates=dates, close=[float(i) for i in range(len(dates))], provider=provider)
+
+
+def test_service_serves_shorter_periods_and_weekly_from_one_download(tmp_path, monkeypatch):
+    today = date.today()
+    store = HistoryStore(str(tmp_path))
+    svc = MarketDataService(cache=TTLCache(default_ttl_seconds=60), scoreboard=ProviderScoreboard(), history_store=store)
+    fake = _FakeProvider(today)
+    monkeypatch.setattr(svc, "_history_via", fake)
+
+    long = svc.get_history_close("AAPL", period="2y", interval="1d")
+    short = svc.get_history_close("AAPL", period="1mo", interval="1d")
+    weekly = svc.get_history_close("AAPL", period="6mo", interval="1wk")
+
+    assert fake.calls[0] == ("2y", "1d", None)
+    # later queries only re-check the tail since the last stored day, never the whole window
+    assert all(start is not None for _, _, start in fake.calls[1:])
+    assert np.array_equal(short.dates, long.dates[-len(short):])
+    assert short.dates[0] >= np.datetime64(period_start("1mo", today), "D")
+    assert 20 <= len(weekly) <= 28
+    assert all(d.astype(object).weekday() == 0 for d in weekly.dates)
+    assert weekly.model_dump()["dates"][0] == str(weekly.dates[0])  # lists only at the edge
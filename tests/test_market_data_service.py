@@ -6,7 +6,14 @@ import pytest
 
 from src.core.schemas import MarketQuote
 from src.utils.cache import TTLCache
-from src.utils.market_data import MarketDataService, MarketDataError, ProviderUnavailable
+from src.utils.market_data import MarketDataService, MarketDataError, ProviderUnavailable, SymbolNotFound
+from src.utils.provider_health import CircuitBreaker, CircuitState, ProviderScoreboard
+
+
+@pytest.fixture(autouse=True)
+def fresh_scoreboard(monkeypatch):
+    # provider health is process-wide; isolate tests from each other
+    monkeypatch.setattr("src.utils.market_data.get_scoreboard", lambda: ProviderScoreboard())
 
 
 def test_quote_cache_hit(monkeypatch):
@@ -25,9 +32,11 @@ def test_quote_cache_hit(monkeypatch):
     assert q1.price == 123.0
     assert q1.from_cache is False
     assert calls["n"] == 1
+    q1.price = 0.0  # callers get their own copy, never the cached object
 
     q2 = svc.get_quote("AAPL")
     assert q2.from_cache is True
+    assert q2.price == 123.0
     assert calls["n"] == 1  # no extra call
 
 
@@ -62,3 +71,193 @@ def test_all_providers_fail(monkeypatch):
 
     with pytest.raises(MarketDataError):
         svc.get_quote("TSLA", force_refresh=True)
+
+
+def test_get_quotes_batches_misses_and_falls_back(monkeypatch):
+    cache = TTLCache(default_ttl_seconds=60)
+    svc = MarketDataService(cache=cache)
+    svc.primary = "yfinance"
+    svc.fallback = "stooq"
+    cache.set("quote:AAPL", MarketQuote(symbol="AAPL", price=1.0, provider="yfinance"), ttl_seconds=60)
+
+    calls = []
+
+    def fake_quotes_via(provider, symbols, ttl, **kw):
+        calls.append((provider, list(symbols)))
+        results, errors = {}, {}
+        for s in symbols:
+            if provider == "yfinance" and s == "MSFT":
+                results[s] = type("R", (), {"quote": MarketQuote(symbol=s, price=2.0, provider=provider), "ttl_seconds": ttl})
+            elif s == "ZZZZ":
+                errors[s] = SymbolNotFound("unknown")
+            elif provider == "stooq":
+                results[s] = type("R", (), {"quote": MarketQuote(symbol=s, price=3.0, provider=provider), "ttl_seconds": ttl})
+            else:
+                errors[s] = ProviderUnavailable("down")
+        return results, errors
+
+    monkeypatch.setattr(svc, "_quotes_via", fake_quotes_via)
+
+    batch = svc.get_quotes(["aapl", "MSFT", "TSLA", "ZZZZ", "msft"])
+    assert calls == [("yfinance", ["MSFT", "TSLA", "ZZZZ"]), ("stooq", ["TSLA"])]
+    assert batch.quotes["AAPL"].from_cache is True
+    assert batch.quotes["MSFT"].price == 2.0
+    assert batch.quotes["TSLA"].provider == "stooq"
+    assert set(batch.errors) == {"ZZZZ"}
+    assert svc.get_quote("TSLA").from_cache is True
+
+
+def test_get_quotes_fan_out_honours_deadline(monkeypatch):
+    import time
+
+    svc = MarketDataService(cache=TTLCache(default_ttl_seconds=60))
+    svc.primary = "alphavantage"
+    svc.fallback = "alphavantage"
+    svc.max_workers = 4
+
+    def fake_quote_via(provider, symbol, ttl):
+        time.sleep(1.0 if symbol == "SLOW" else 0.05)
+        return type("R", (), {"quote": MarketQuote(symbol=symbol, price=10.0, provider=provider), "ttl_seconds": ttl})
+
+    monkeypatch.setattr(svc, "_quote_via", fake_quote_via)
+
+    t0 = time.monotonic()
+    batch = svc.get_quotes(["A", "B", "C", "SLOW"], deadline_seconds=0.3)
+    elapsed = time.monotonic() - t0
+    svc.close()
+
+    assert elapsed < 0.6  # concurrent, and not waiting for the straggler
+    assert set(batch.quotes) == {"A", "B", "C"}
+    assert batch.partial is True
+    assert batch.errors["SLOW"].startswith("DeadlineExceeded")
+
+
+def test_open_circuit_skips_dead_primary(monkeypatch):
+    board = ProviderScoreboard(failure_threshold=1, reset_timeout_seconds=60)
+    svc = MarketDataService(cache=TTLCache(default_ttl_seconds=60), scoreboard=board)
+    svc.primary = "alphavantage"
+    svc.fallback = "yfinance"
+
+    calls = []
+
+    def fake_quote_via(provider, symbol, ttl):
+        calls.append(provider)
+        if provider == "alphavantage":
+            raise MarketDataError("timeout")
+        return type("R", (), {"quote": MarketQuote(symbol=symbol, price=5.0, provider=provider), "ttl_seconds": ttl})
+
+    monkeypatch.setattr(svc, "_quote_via", fake_quote_via)
+
+    for sym in ("A", "B", "C"):
+        assert svc.get_quote(sym, force_refresh=True).provider == "yfinance"
+
+    # primary failed once, its circuit opened and later calls skipped it
+    assert calls == ["alphavantage", "yfinance", "yfinance", "yfinance"]
+    health = svc.provider_health()
+    assert health["alphavantage"]["state"] == "open"
+    assert health["alphavantage"]["error_rate"] == 1.0
+    assert health["yfinance"]["calls"] == 3
+
+
+def test_circuit_half_open_trial_closes_on_success():
+    now = {"t": 0.0}
+    b = CircuitBreaker("p", failure_threshold=1, reset_timeout_seconds=10, clock=lambda: now["t"])
+    b.record_failure()
+    assert b.state == CircuitState.OPEN and not b.allow()
+
+    now["t"] = 11.0
+    assert b.allow() is True       # the single half-open trial
+    assert b.allow() is False      # no second trial while one is in flight
+    b.record_success()
+    assert b.state == CircuitState.CLOSED
+
+
+def test_interrupted_half_open_trial_releases_the_slot(monkeypatch):
+    import asyncio
+
+    board = ProviderScoreboard(failure_threshold=1, reset_timeout_seconds=0)
+    svc = MarketDataService(cache=TTLCache(default_ttl_seconds=60), scoreboard=board)
+    svc.primary = svc.fallback = "alphavantage"
+    board.record("alphavantage", 0.1, ok=False)  # open; the next call is the half-open trial
+
+    def interrupted(provider, symbol, ttl):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(svc, "_quote_via", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        svc.get_quote("AAPL")
+    assert board.allow("alphavantage") is True  # trial slot was given back, no verdict recorded
+    board.release("alphavantage")
+
+    class CancelledPolicy:
+        async def acall(self, fn, *, stats=None):
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(svc, "retry_policy", CancelledPolicy())
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(svc.aget_quote("MSFT"))
+    assert board.allow("alphavantage") is True
+    assert board.breaker("alphavantage").state == CircuitState.HALF_OPEN
+
+
+def test_concurrent_quote_misses_are_coalesced(monkeypatch):
+    import threading
+    import time
+
+    svc = MarketDataService(cache=TTLCache(default_ttl_seconds=60))
+    calls = {"n": 0}
+
+    def slow_quote(provider, symbol, ttl):
+        calls["n"] += 1
+        time.sleep(0.1)
+        return type("R", (), {"quote": MarketQuote(symbol=symbol, price=10.0, as_of=datetime.now(UTC), provider=provider), "ttl_seconds": ttl})
+
+    monkeypatch.setattr(svc, "_quote_via", slow_quote)
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(svc.get_quote("AAPL"))) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(2)
+
+    assert calls["n"] == 1
+    assert len(out) == 6 and all(q.price == 10.0 for q in out)
+    assert sum(1 for q in out if not q.from_cache) == 1
+
+
+def test_array_price_series_wraps_frames_without_copying_closes():
+    import numpy as np
+    import pandas as pd
+
+    from src.core.schemas import ArrayPriceSeries
+
+    idx = pd.DatetimeIndex(["2024-01-02 00:00", "2024-01-03 00:00"], tz="America/New_York")
+    frame = pd.DataFrame({"Close": np.array([185.6, 184.3])}, index=idx)
+    s = ArrayPriceSeries.from_frame("AAPL", frame, provider="yfinance")
+
+    assert np.shares_memory(s.close, frame["Close"].to_numpy())
+    assert s.dates.dtype == np.dtype("datetime64[D]")
+    assert s.to_price_series().dates == ["2024-01-02", "2024-01-03"]
+    assert s.to_frame()["close"].tolist() == [185.6, 184.3]
+
+
+def test_history_l2_ttl_extends_only_completed_daily_or_longer_bars():
+    import numpy as np
+
+    from src.core.schemas import ArrayPriceSeries
+    from src.utils.market_data import _history_l2_ttl
+
+    now = datetime(2024, 3, 13, 18, 0, tzinfo=UTC)  # Wednesday, 6h before UTC midnight
+
+    def series(*dates):
+        return ArrayPriceSeries(symbol="AAPL", dates=list(dates), close=[1.0] * len(dates))
+
+    assert _history_l2_ttl(series("2024-03-11", "2024-03-12"), "1d", 60, now) == 6 * 3600
+    assert _history_l2_ttl(series("2024-03-12", "2024-03-13"), "1d", 60, now) == 60  # today's bar still moves
+    assert _history_l2_ttl(series("2024-03-12"), "5m", 60, now) == 60  # intraday
+    assert _history_l2_ttl(series("2024-03-11"), "1wk", 60, now) == 60  # week in progress, dated Monday
+    assert _history_l2_ttl(series("2024-03-08"), "1wk", 60, now) == 6 * 3600
+    assert _history_l2_ttl(series("2024-03-01"), "1mo", 60, now) == 60
+    assert _history_l2_ttl(series("2024-02-01"), "1mo", 60, now) == 6 * 3600
+    assert _history_l2_ttl(ArrayPriceSeries(symbol="AAPL", dates=np.array([], dtype="datetime64[D]"), close=[]), "1d", 60, now) == 60
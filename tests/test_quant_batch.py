@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.quant_tools import tool_compute_goal_projections_batch, tool_compute_portfolio_metrics_batch
+from src.utils.quant_engine import compute_goal_projection, compute_portfolio_metrics
+from src.utils.quant_models import GoalInput, PortfolioInput
+
+
+def _goals(n: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "target_amount": np.round(rng.uniform(1e3, 2e6, n), 2),
+        "years": rng.choice([0.02, 0.125, 1, 2.5, 10, 30], n),
+        "current_savings": np.round(rng.uniform(0, 5e4, n), 2) * (rng.random(n) < 0.7),
+        "monthly_contribution": np.round(rng.uniform(0, 3000, n), 0),
+        "expected_return_annual": rng.choice([0.0, 0.02, 0.07, 0.1], n),
+        "inflation_annual": rng.choice([0.0, 0.03, 0.06], n),
+        # 0.1 against returns of 0.07 (+0.03 in the high scenario) and 0.1 hits the G == S limit
+        "stepup_annual_pct": rng.choice([0.0, 0.05, 0.1], n),
+    })
+
+
+def test_goal_batch_matches_single_item_rows():
+    df = _goals()
+    out = tool_compute_goal_projections_batch(df)
+    ref = [compute_goal_projection(GoalInput(**row)).model_dump() for row in df.to_dict("records")]
+    assert out == ref
+    # a dict of arrays works the same
+    assert tool_compute_goal_projections_batch({k: df[k].to_numpy() for k in df.columns}) == ref
+
+
+def test_goal_batch_process_pool_keeps_row_order():
+    from src.utils.quant_batch import compute_goal_projections_batch
+
+    df = _goals(90)
+    assert compute_goal_projections_batch(df, workers=2, chunk_size=25) == compute_goal_projections_batch(df)
+
+
+def test_goal_batch_validates_columns():
+    with pytest.raises(ValueError, match="years"):
+        tool_compute_goal_projections_batch({"target_amount": [1000.0, 2000.0], "years": [5.0, 0.0]})
+    with pytest.raises(ValueError, match="missing required column"):
+        tool_compute_goal_projections_batch({"target_amount": [1000.0]})
+
+
+def test_portfolio_batch_matches_single_item_rows():
+    prices = {"AAA": 50.0, "BBB": 100.0, "CCC": 0.3, "DDD": -1.0}
+    holdings = pd.DataFrame([
+        ("p1", "AAA", 2, "stock"), ("p1", "BBB", 1, "bond"),
+        ("p2", "CCC", 0.1, "crypto"), ("p2", " AAA ", 3, "etf"), ("p2", "DDD", 5, "other"),
+        ("p3", "ZZZ", 1, "stock"),  # missing price -> warnings
+        ("p1", "CCC", 7, "mutual_fund"),
+    ], columns=["portfolio_id", "symbol", "quantity", "asset_type"])
+    portfolios = pd.DataFrame({"portfolio_id": ["p1", "p2", "p3", "p4", "p5"],
+                               "cash": [100.0, 0.0, 0.0, 250.5, 0.0], "currency": ["USD", "EUR", "USD", "USD", "USD"]})
+    out = tool_compute_portfolio_metrics_batch(holdings, prices, portfolios=portfolios)
+
+    inputs = []
+    for pid, cash, cur in portfolios.itertuples(index=False):
+        rows = holdings[holdings.portfolio_id == pid].drop(columns="portfolio_id").to_dict("records")
+        inputs.append(dict(currency=cur, cash=cash, holdings=rows))
+    ref = [compute_portfolio_metrics(PortfolioInput(**r), prices=prices).model_dump() for r in inputs]
+    assert out == ref
+    assert [o["total_value"] for o in out] == [302.1, 150.03, 0.0, 250.5, 0.0]
+
+    audit = tool_compute_portfolio_metrics_batch(holdings, prices, portfolios=portfolios, audit=True)
+    assert audit == [compute_portfolio_metrics(PortfolioInput(**r), prices=prices, audit=True).model_dump()
+                     for r in inputs]
+
+
+def test_portfolio_batch_rejects_unknown_portfolio():
+    with pytest.raises(ValueError, match="unknown portfolio_id"):
+        tool_compute_portfolio_metrics_batch(
+            {"portfolio_id": ["x"], "symbol": ["AAA"], "quantity": [1.0]},
+            {"AAA": 1.0},
+            portfolios={"portfolio_id": ["y"]},
+        )
@@ -1,3 +1,5 @@
+import numpy as np
+
 from src.utils.quant_engine import compute_goal_projection
 from src.utils.quant_models import GoalInput
 
@@ -16,3 +18,128 @@ def test_goal_projection_basic():
     assert out.projected_amount > 0
     assert out.required_monthly_for_target >= 0
     assert len(out.scenarios) == 3
+
+
+def _loop_future_value(current, monthly, n_months, mr, stepup):
+    # the original month-by-month reference implementation
+    from decimal import Decimal
+
+    fv = current * ((Decimal(1) + mr) ** n_months)
+    contrib = monthly
+    for m in range(1, n_months + 1):
+        if stepup > 0 and m % 12 == 1 and m != 1:
+            contrib = contrib * (Decimal(1) + stepup)
+        fv += contrib * ((Decimal(1) + mr) ** (n_months - m))
+    return fv
+
+
+def test_closed_form_matches_monthly_loop():
+    from decimal import Decimal
+
+    import numpy as np
+
+    from src.utils.quant_engine import _future_value, _monthly_rate, future_value_array
+
+    for n in (1, 11, 12, 13, 60, 121, 360):
+        for r in ("0", "0.07", "0.12"):
+            for step in ("0", "0.05", "0.0713", r):  # step == r is the G == S limit
+                mr = _monthly_rate(Decimal(r))
+                ref = _loop_future_value(Decimal("2500"), Decimal("300"), n, mr, Decimal(step))
+                got = _future_value(Decimal("2500"), Decimal("300"), n, mr, Decimal(step))
+                assert abs(got - ref) < Decimal("1e-12") * max(Decimal(1), ref)
+                fast = future_value_array(2500.0, 300.0, n, float(r), float(step))
+                assert np.isclose(float(fast), float(ref), rtol=1e-10)
+
+
+def test_return_equal_to_stepup_matches_monthly_loop():
+    # G ~ S (growth factor equal to the step-up) used to cancel catastrophically in (G^K - S^K)/(G - S)
+    from decimal import Decimal
+
+    import numpy as np
+
+    from src.utils.quant_engine import _monthly_rate, future_value_array
+
+    for r in ("0.10", "0.07", "0.1000001"):
+        g = GoalInput(target_amount="1000000", years="30", current_savings="0", monthly_contribution="500",
+                      expected_return_annual=r, inflation_annual="0.03", stepup_annual_pct="0.10")
+        ref = _loop_future_value(Decimal(0), Decimal(500), 360, _monthly_rate(Decimal(r)), Decimal("0.10"))
+        assert abs(Decimal(str(compute_goal_projection(g).projected_amount)) - ref) < Decimal("0.01")
+        assert np.isclose(float(future_value_array(0.0, 500.0, 360, float(r), 0.10)), float(ref), rtol=1e-10)
+
+
+def test_required_monthly_hits_target_exactly():
+    g = GoalInput(target_amount="250000", years="15", current_savings="10000", monthly_contribution="500",
+                  expected_return_annual="0.08", inflation_annual="0.03", stepup_annual_pct="0.05")
+    out = compute_goal_projection(g)
+    again = compute_goal_projection(g.model_copy(update={"monthly_contribution": out.required_monthly_for_target}))
+    # only the cent rounding of the monthly amount (compounded over 15 years) separates them
+    assert abs(again.projected_amount - 250000) / 250000 < 1e-5
+
+
+def test_monte_carlo_is_seeded_and_consistent_with_risk():
+    from src.utils.quant_engine import simulate_goal_monte_carlo
+
+    g = GoalInput(target_amount="300000", years="20", current_savings="5000", monthly_contribution="600",
+                  expected_return_annual="0.07", risk_tolerance="high")
+    a = simulate_goal_monte_carlo(g, n_paths=4000, seed=7)
+    b = simulate_goal_monte_carlo(g, n_paths=4000, seed=7)
+    assert a == b
+    assert 0.0 < a.success_probability < 1.0
+    assert len(a.bands) == 20 and a.bands[-1].p50 == a.final_percentiles["p50"]
+    assert a.final_percentiles["p10"] < a.final_percentiles["p50"] < a.final_percentiles["p90"]
+
+    low = simulate_goal_monte_carlo(g.model_copy(update={"risk_tolerance": "low"}), n_paths=4000, seed=7)
+    spread = lambda mc: mc.final_percentiles["p90"] - mc.final_percentiles["p10"]
+    assert spread(low) < spread(a)
+
+
+def test_goal_tool_exposes_monte_carlo():
+    from src.tools.quant_tools import tool_compute_goal_projection
+
+    out = tool_compute_goal_projection(
+        {"target_amount": 50000, "years": 10, "monthly_contribution": 300, "risk_profile": "low"},
+        monte_carlo=True, n_paths=2000, seed=1,
+    )
+    assert out["monte_carlo"]["volatility_annual"] == 0.06
+    assert tool_compute_goal_projection({"target_amount": 50000, "years": 10})["monte_carlo"] is None
+
+
+def test_schedule_matches_month_by_month_loop():
+    from src.utils.quant_engine import iter_projection_schedule, projection_schedule
+
+    cols = projection_schedule(1000.0, 100.0, 30, 0.07, 0.1, 0.03)
+    g = 1.07 ** (1 / 12)
+    bal, paid = 1000.0, 0.0
+    for m in range(1, 31):
+        c = 100.0 * 1.1 ** ((m - 1) // 12)
+        bal, paid = bal * g + c, paid + c
+        assert abs(cols["balance"][m - 1] - bal) < 1e-9 * bal
+        assert abs(cols["contribution"][m - 1] - c) < 1e-9
+        assert abs(cols["contributed"][m - 1] - paid) < 1e-9
+    assert abs(cols["real_value"][-1] - bal / 1.03 ** 2.5) < 1e-6
+
+    # daily: same month-end values, contributions land once per month, blocks are independent
+    blocks = list(iter_projection_schedule(1000.0, 100.0, 30, 0.07, 0.1, 0.03, granularity="daily", block=100))
+    assert max(b["period"].shape[0] for b in blocks) == 100
+    daily = {k: np.concatenate([b[k] for b in blocks]) for k in blocks[0]}
+    assert daily["year"][-1] == 2.5
+    assert abs(daily["balance"][-1] - bal) < 1e-9 * bal
+    assert np.count_nonzero(daily["contribution"]) == 30
+    assert abs(daily["contribution"].sum() - paid) < 1e-9
+
+
+def test_schedule_feeds_projection_and_csv():
+    from src.tools.quant_tools import tool_compute_goal_projection, tool_goal_schedule_csv
+
+    payload = {"target_amount": "100000", "years": "12.5", "current_savings": "1000", "monthly_contribution": "300",
+               "expected_return_annual": "0.07", "stepup_annual_pct": "0.05", "inflation_annual": "0.03"}
+    proj = tool_compute_goal_projection(payload, schedule=True)
+    assert [r["year"] for r in proj["schedule"]] == [*range(1, 13), 12.5]
+    assert proj["schedule"][-1]["balance"] == proj["projected_amount"]
+    assert proj["schedule"][-1]["real_value"] == proj["real_value_today"]
+
+    text = "".join(tool_goal_schedule_csv(payload, block=40))
+    lines = text.splitlines()
+    assert lines[0] == "period,year,balance,contribution,contributed,real_value"
+    assert len(lines) == 1 + 150
+    assert float(lines[-1].split(",")[2]) == proj["projected_amount"]
@@ -21,3 +21,36 @@ def test_missing_price_warning():
     out = compute_portfolio_metrics(p, prices={})
     assert out.total_value == 0.00
     assert any("Missing price" in w for w in out.warnings)
+
+def test_float_path_matches_decimal_audit():
+    types = ["stock", "etf", "bond", "crypto", "other", "mutual_fund"]
+    holdings = [{"symbol": f"S{i}", "quantity": f"{(i * 7919) % 1000 / 7:.4f}", "asset_type": types[i % 6]}
+                for i in range(300)]
+    holdings += [{"symbol": "TIE1", "quantity": "1", "asset_type": "stock"},
+                 {"symbol": "TIE2", "quantity": "1", "asset_type": "etf"}]
+    p = PortfolioInput(currency="USD", cash="1234.56", holdings=holdings)
+    prices = {f"S{i}": round(1 + (i * 104729) % 50000 / 100, 2) for i in range(300)}
+    prices.update({"TIE1": 900.0, "TIE2": 900.0})
+
+    fast = compute_portfolio_metrics(p, prices=prices)
+    audit = compute_portfolio_metrics(p, prices=prices, audit=True)
+    assert fast.total_value == audit.total_value
+    assert [a.symbol for a in fast.allocations] == [a.symbol for a in audit.allocations]
+    assert [a.symbol for a in fast.top_holdings] == [a.symbol for a in audit.top_holdings]
+    assert max(abs(a.weight - b.weight) for a, b in zip(fast.allocations, audit.allocations)) < 1e-15
+    for f in ("concentration_top1", "concentration_top3", "concentration_top5",
+              "diversification_effective_n", "risk_bucket"):
+        assert getattr(fast, f) == getattr(audit, f)
+
+def test_float_path_keeps_warnings_in_holding_order():
+    p = PortfolioInput(cash="0", holdings=[
+        {"symbol": "AAA", "quantity": "1", "asset_type": "stock"},
+        {"symbol": " ", "quantity": "1"},
+        {"symbol": "ZZZ", "quantity": "2"},
+        {"symbol": "NEG", "quantity": "2"},
+    ])
+    out = compute_portfolio_metrics(p, prices={"AAA": 10.0, "NEG": -5.0})
+    ref = compute_portfolio_metrics(p, prices={"AAA": 10.0, "NEG": -5.0}, audit=True)
+    assert out.model_dump() == ref.model_dump()
+    assert out.warnings[0].startswith("Encountered holding with empty symbol")
+    assert [a.symbol for a in out.allocations] == ["AAA", "ZZZ", "NEG"]
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from src.core.schemas import ArrayPriceSeries
+from src.utils.quant_indicators import (
+    IndicatorParams, compute_market_indicators, drawdown, ema, indicator_arrays, rolling_mean, rolling_std,
+    rolling_volatility, rsi,
+)
+
+
+def _series(n: int = 600, seed: int = 0, symbol: str = "TEST") -> ArrayPriceSeries:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    dates = np.arange(np.datetime64("2020-01-01"), np.datetime64("2020-01-01") + n)
+    return ArrayPriceSeries(symbol=symbol, dates=dates, close=close)
+
+
+def test_kernels_match_pandas():
+    c = _series().close
+    s = pd.Series(c)
+    np.testing.assert_allclose(rolling_mean(c, 20), s.rolling(20).mean(), rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(rolling_std(c, 20), s.rolling(20).std(), rtol=1e-7, equal_nan=True)
+    for span in (5, 20, 200):
+        np.testing.assert_allclose(ema(c, span), s.ewm(span=span, adjust=False).mean(), rtol=1e-12)
+    logret = np.log(s).diff()
+    np.testing.assert_allclose(rolling_volatility(c, 20, 252), logret.rolling(20).std() * np.sqrt(252),
+                               rtol=1e-7, equal_nan=True)
+    np.testing.assert_allclose(drawdown(c), s / s.cummax() - 1, atol=1e-15)
+
+
+def test_rsi_matches_wilder_loop():
+    c = _series(300, seed=4).close
+    d = np.diff(c)
+    g, l = np.maximum(d, 0), np.maximum(-d, 0)
+    ag, al = g[:14].mean(), l[:14].mean()
+    ref = [100 - 100 / (1 + ag / al)]
+    for i in range(14, len(d)):
+        ag, al = (ag * 13 + g[i]) / 14, (al * 13 + l[i]) / 14
+        ref.append(100 - 100 / (1 + ag / al))
+    out = rsi(c, 14)
+    assert np.isnan(out[:14]).all()
+    np.testing.assert_allclose(out[14:], ref, rtol=1e-10)
+    assert rsi(np.arange(1.0, 40.0), 14)[-1] == 100.0  # only gains
+
+
+def test_indicator_arrays_are_cached_per_series():
+    s = _series(symbol="CACHE1")
+    a = indicator_arrays(s)
+    assert indicator_arrays(s) is a
+    assert not a["sma_20"].flags.writeable
+    assert s.close.flags.writeable  # the caller's array is left alone
+
+    # same last date but a moved last close (intraday bar) must not reuse the old result
+    moved = ArrayPriceSeries(symbol="CACHE1", dates=s.dates, close=np.append(s.close[:-1], s.close[-1] * 1.01))
+    assert indicator_arrays(moved) is not a
+    assert indicator_arrays(s, IndicatorParams(sma_windows=(10,))) is not a
+
+
+def test_compute_market_indicators_result():
+    s = _series(60)
+    close = s.close.copy()
+    close[5] = np.nan
+    out = compute_market_indicators(ArrayPriceSeries(symbol="Q", dates=s.dates, close=close))
+    assert out.data_quality.dropped_dates == 1
+    assert out.metrics["points"] == 59
+    assert out.metrics["sma_50"] is not None and out.metrics["max_drawdown"] <= 0
+    assert out.chart_data["sma_20"][0] is None and len(out.chart_data["date"]) == 59
+    short = compute_market_indicators(_series(10, symbol="SHORT"))
+    assert short.warnings and short.metrics["sma_50"] is None
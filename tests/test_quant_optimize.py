@@ -0,0 +1,112 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.tools.quant_tools import tool_optimize_portfolio
+from src.utils.quant_models import OptimizationSpec
+from src.utils.quant_optimize import efficient_frontier, solve_weights
+
+
+def _universe(n: int, T: int = 600, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    F, B = rng.normal(size=(T, 3)), rng.normal(size=(3, n))
+    R = 0.01 * F @ B + rng.normal(0, 0.015, (T, n)) + rng.uniform(0, 0.001, n)
+    return R.mean(axis=0) * 252, np.cov(R.T) * 252, [f"S{i:03d}" for i in range(n)]
+
+
+def test_min_variance_matches_closed_form_when_unconstrained():
+    cov = np.array([[0.04, 0.006, 0.002], [0.006, 0.09, 0.01], [0.002, 0.01, 0.0625]])
+    w, _, _, ok = solve_weights(np.zeros(3), cov, ["A", "B", "C"], OptimizationSpec(objective="min_variance"))
+    ref = np.linalg.solve(cov, np.ones(3))
+    assert ok
+    np.testing.assert_allclose(w, ref / ref.sum(), atol=1e-6)
+
+
+def test_box_and_sector_constraints_hold_and_are_optimal():
+    mu, cov, syms = _universe(6, seed=3)
+    spec = OptimizationSpec(objective="min_variance", max_weight=0.3, bounds={"S005": [0.1, 0.2]},
+                            sectors={"S000": "tech", "S001": "tech", "S002": "tech"}, sector_bounds={"tech": [0.0, 0.35]})
+    w, _, _, ok = solve_weights(mu, cov, syms, spec)
+    assert ok and w.sum() == pytest.approx(1.0, abs=1e-9)
+    assert w.max() <= 0.3 + 1e-6 and 0.1 - 1e-6 <= w[5] <= 0.2 + 1e-6 and w[:3].sum() <= 0.35 + 1e-6
+
+    # no feasible random portfolio does better
+    rng = np.random.default_rng(0)
+    cand = rng.dirichlet(np.ones(6), 200_000)
+    ok_c = (cand.max(axis=1) <= 0.3) & (cand[:, 5] >= 0.1) & (cand[:, 5] <= 0.2) & (cand[:, :3].sum(axis=1) <= 0.35)
+    best = np.einsum("ij,jk,ik->i", cand[ok_c], cov, cand[ok_c]).min()
+    assert w @ cov @ w <= best + 1e-9
+
+
+def test_risk_parity_equalizes_contributions_and_honours_budgets():
+    mu, cov, syms = _universe(25, seed=5)
+    w, _, _, ok = solve_weights(mu, cov, syms, OptimizationSpec(objective="risk_parity"))
+    rc = w * (cov @ w)
+    assert ok and np.ptp(rc / rc.sum()) < 1e-6
+
+    budgets = {s: (2.0 if i < 5 else 1.0) for i, s in enumerate(syms)}
+    w, _, _, _ = solve_weights(mu, cov, syms, OptimizationSpec(objective="risk_parity", risk_budgets=budgets))
+    share = w * (cov @ w) / (w @ cov @ w)
+    np.testing.assert_allclose(share, np.array([budgets[s] for s in syms]) / 30.0, atol=1e-6)
+
+
+def test_frontier_trades_risk_for_return():
+    mu, cov, syms = _universe(30, seed=2)
+    pts = efficient_frontier(mu, cov, syms, OptimizationSpec(max_weight=0.2), n_points=8)
+    rets = [p["expected_return_annual"] for p in pts]
+    vols = [p["volatility_annual"] for p in pts]
+    assert all(p["converged"] for p in pts)
+    assert rets == sorted(rets) and vols == sorted(vols)
+
+
+def test_warm_start_reuses_previous_solution_and_is_fast():
+    mu, cov, syms = _universe(200, seed=1)
+    spec = OptimizationSpec(objective="mean_variance", max_weight=0.05,
+                            sectors={s: f"sec{i % 10}" for i, s in enumerate(syms)}, sector_bounds={"sec0": [0.0, 0.08]})
+    t = time.perf_counter()
+    _, state, cold_iters, ok = solve_weights(mu, cov, syms, spec)
+    assert ok and time.perf_counter() - t < 1.0
+
+    mu2, cov2, _ = _universe(200, seed=1, T=601)  # one more day of data
+    w_warm, _, warm_iters, ok = solve_weights(mu2, cov2, syms, spec, state=state)
+    w_cold, _, _, _ = solve_weights(mu2, cov2, syms, spec)
+    assert ok and warm_iters <= cold_iters
+    np.testing.assert_allclose(w_warm, w_cold, atol=1e-4)
+
+
+def test_infeasible_bounds_are_rejected():
+    mu, cov, syms = _universe(4)
+    with pytest.raises(ValueError, match="cannot sum to 1"):
+        solve_weights(mu, cov, syms, OptimizationSpec(max_weight=0.2))
+    with pytest.raises(ValueError, match="sector bounds"):
+        solve_weights(mu, cov, syms, OptimizationSpec(sectors={"S000": "x"}, sector_bounds={"x": [0.5, 1.0]},
+                                                      bounds={"S000": [0.0, 0.3]}))
+
+
+def test_tool_optimizes_a_portfolio_and_warm_starts_the_next_call(make_close_matrix, fake_market):
+    mkt = fake_market(make_close_matrix(["OPA", "OPB", "OPC", "OPD"], T=300, seed=4))
+    payload = {
+        "objective": "risk_parity",
+        "max_weight": 0.4,
+        "portfolio": {"cash": "50", "holdings": [{"symbol": s, "quantity": "1", "asset_type": "stock"}
+                                                 for s in ("OPA", "OPB", "OPC", "opd")]},
+        "window": 200,
+        "frontier_points": 4,
+    }
+    out = tool_optimize_portfolio(payload, market_data=mkt)
+    assert set(out["weights"]) == {"OPA", "OPB", "OPC", "OPD"}
+    assert sum(out["weights"].values()) == pytest.approx(1.0, abs=1e-5)
+    assert set(out["current_weights"]) == {"OPA", "OPB", "OPC", "OPD", "CASH"}
+    assert len(out["frontier"]) == 4 and out["converged"] and not out["warm_started"]
+    assert tool_optimize_portfolio(payload, market_data=mkt)["warm_started"]
+
+    # warm starts keep the solver's rho/kappa: the second solve must land on the cold answer
+    for objective in ("min_variance", "mean_variance"):
+        p = {**payload, "objective": objective, "frontier_points": 0}
+        cold = tool_optimize_portfolio(p, market_data=mkt)
+        warm = tool_optimize_portfolio(p, market_data=mkt)
+        assert not cold["warm_started"] and warm["warm_started"] and warm["converged"]
+        assert all(np.isfinite(v) for v in warm["weights"].values())
+        for s in cold["weights"]:
+            assert warm["weights"][s] == pytest.approx(cold["weights"][s], abs=1e-4)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.core.schemas import ArrayPriceSeries
+from src.tools.quant_tools import tool_rebalance_sim
+from src.utils.price_matrix import CloseMatrix, align_closes
+from src.utils.quant_models import RebalancePolicy
+from src.utils.quant_rebalance import check_days, simulate_rebalance
+
+
+def _naive(m: CloseMatrix, W: np.ndarray, p: RebalancePolicy) -> np.ndarray:
+    H = W / m.close[0]
+    checks = check_days(m.dates, p.frequency)
+    out = []
+    for t in range(len(m.dates)):
+        v = H @ m.close[t]
+        if checks[t]:
+            drift = np.abs(H * m.close[t] / v - W)
+            if drift.max() > p.drift_band:
+                v *= 1 - p.cost_bps / 1e4 * drift.sum()
+                H = v * W / m.close[t]
+        out.append(v)
+    return np.array(out)
+
+
+def test_check_days_mark_first_day_of_each_period():
+    dates = np.array(["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-02", "2024-02-05", "2024-04-01"],
+                     dtype="datetime64[D]")
+    assert check_days(dates, "monthly").tolist() == [False, False, True, False, False, True]
+    assert check_days(dates, "weekly").tolist() == [False, False, False, False, True, True]
+    assert check_days(dates, "quarterly").tolist() == [False, False, False, False, False, True]
+    assert not check_days(dates, "never").any()
+
+
+def test_all_policies_match_a_day_by_day_loop(make_close_matrix):
+    m = make_close_matrix([f"S{i}" for i in range(4)], seed=0)
+    targets = {"S0": 0.4, "S1": 0.3, "S2": 0.2, "S3": 0.1}
+    W = np.array([0.4, 0.3, 0.2, 0.1])
+    policies = [RebalancePolicy(frequency=f, drift_band=b, cost_bps=c)
+                for f in ("never", "daily", "weekly", "monthly") for b in (0.0, 0.03) for c in (0.0, 10.0)]
+    sim = simulate_rebalance(m, policies, targets=targets)
+    for k, p in enumerate(policies):
+        np.testing.assert_allclose(sim.equity[k], _naive(m, W, p), rtol=1e-12)
+    never = sim.results[0]
+    assert never.rebalances == 0 and never.turnover == 0
+    # a band only removes trades
+    daily, daily_band = sim.results[4], sim.results[6]
+    assert daily_band.rebalances < daily.rebalances and daily_band.turnover < daily.turnover
+    assert all(r.max_drawdown <= 0 for r in sim.results)
+
+
+def test_per_policy_targets_and_validation(make_close_matrix):
+    m = make_close_matrix(["S0", "S1"], seed=0)
+    sim = simulate_rebalance(m, [RebalancePolicy(targets={"S0": 1}), RebalancePolicy(targets={"S1": 1})])
+    np.testing.assert_allclose(sim.equity[0], m.close[:, 0] / m.close[0, 0])
+    with pytest.raises(ValueError, match="no price history"):
+        simulate_rebalance(m, [RebalancePolicy()], targets={"ZZZ": 1})
+
+
+def test_align_closes_fills_short_gaps_only():
+    d = np.array(["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-08"],
+                 dtype="datetime64[D]")
+    a = ArrayPriceSeries(symbol="A", dates=d, close=[1, 2, 3, 4, 5, 6])
+    b = ArrayPriceSeries(symbol="B", dates=d[[1, 2, 5]], close=[10, 20, 30])  # starts late, 2-row gap
+    m = align_closes([a, b], max_ffill_gap=1)
+    assert m.dates.tolist() == d[[1, 2, 3, 5]].tolist()
+    assert m.close[:, 1].tolist() == [10, 20, 20, 30]
+
+
+def test_rebalance_tool_from_portfolio_with_cash(make_close_matrix, fake_market):
+    m = make_close_matrix(["S0", "S1"], seed=0)
+    out = tool_rebalance_sim(
+        {
+            "portfolio": {"cash": "500", "holdings": [{"symbol": "S0", "quantity": "10"}, {"symbol": "s1", "quantity": "5"}]},
+            "policies": [{"frequency": "quarterly"}, {"frequency": "never", "label": "buy and hold"}],
+        },
+        market_data=fake_market(m),
+    )
+    rows = out["tables"]["policies"]
+    assert [r["label"] for r in rows] == ["quarterly", "buy and hold"]
+    assert out["metrics"]["symbols"] == ["S0", "S1", "CASH"]
+    assert len(out["chart_data"]["equity"]["buy and hold"]) == len(m.dates)
+    # weights at the latest closes (lower-case holding symbols included)
+    last = m.close[-1]
+    total = 10 * last[0] + 5 * last[1] + 500
+    assert rows[0]["targets"] == pytest.approx({"S0": 10 * last[0] / total, "S1": 5 * last[1] / total, "CASH": 500 / total}, abs=1e-6)
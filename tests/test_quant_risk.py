@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src.tools.quant_tools import tool_compute_portfolio_metrics
+from src.utils.price_matrix import CloseMatrix
+from src.utils.quant_risk import RollingCovariance, cached_covariance, compute_portfolio_risk, covariance_snapshot
+
+
+def test_incremental_covariance_matches_full_recompute(make_close_matrix):
+    m = make_close_matrix()
+    d, r = m.dates[1:], m.returns()
+    state = RollingCovariance(m.symbols, window=60)
+    state.update(d[:100], r[:100])
+    for end in (101, 102, 110, 111, 140):  # one day at a time and in small batches
+        state.update(d[:end], r[:end])
+        np.testing.assert_allclose(state.cov(), np.cov(r[end - 60:end].T), rtol=1e-10, atol=1e-14)
+        np.testing.assert_allclose(state.mean(), r[end - 60:end].mean(axis=0), atol=1e-15)
+    assert state.incremental_rows > 0
+
+    # the latest bar moved intraday: its row is swapped, not double counted
+    revised = r[:140].copy()
+    revised[-1] *= 1.5
+    state.update(d[:140], revised)
+    np.testing.assert_allclose(state.cov(), np.cov(revised[80:140].T), rtol=1e-10, atol=1e-14)
+
+
+def test_cached_covariance_only_applies_new_days(make_close_matrix):
+    m = make_close_matrix(symbols=("X1", "X2"))
+    first = CloseMatrix(symbols=m.symbols, dates=m.dates[:300], close=m.close[:300])
+    state = cached_covariance(first, window=120)
+    again = cached_covariance(CloseMatrix(symbols=m.symbols, dates=m.dates[:301], close=m.close[:301]), window=120)
+    assert again is state and state.rebuilds == 1 and state.incremental_rows == 1
+
+
+def test_covariance_snapshot_is_not_moved_by_later_updates(make_close_matrix):
+    m = make_close_matrix(symbols=("S1", "S2"))
+    r = m.returns()
+    snap = covariance_snapshot(CloseMatrix(symbols=m.symbols, dates=m.dates[:300], close=m.close[:300]), window=120)
+    cached_covariance(m, window=120)  # another caller moves the shared state on
+
+    np.testing.assert_allclose(snap.cov, np.cov(r[179:299].T), rtol=1e-10, atol=1e-14)
+    np.testing.assert_allclose(snap.mean, r[179:299].mean(axis=0), atol=1e-15)
+    np.testing.assert_array_equal(snap.rows, r[179:299])
+    assert snap.count == 120 and snap.dates[-1] == m.dates[299]
+
+
+def test_portfolio_risk_numbers(make_close_matrix):
+    m = make_close_matrix()
+    r = m.returns()[-252:]
+    w = np.array([0.5, 0.3, 0.0])
+    risk = compute_portfolio_risk({"AAA": 0.5, "bbb": 0.3, "CASH": 0.2}, m, benchmark="SPY", window=252)
+    cov = np.cov(r.T)
+    sigma = np.sqrt(w @ cov @ w)
+    assert risk.volatility_annual == pytest.approx(sigma * np.sqrt(252), rel=1e-5)
+    assert risk.beta == pytest.approx((w @ cov[:, 2]) / cov[2, 2], rel=1e-5)
+    assert risk.var_historical == pytest.approx(-np.quantile(r @ w, 0.05), abs=1e-6)
+    assert risk.cvar_historical >= risk.var_historical > 0
+    assert risk.cvar_parametric >= risk.var_parametric > 0
+    assert sum(c.contribution_vol for c in risk.contributions) == pytest.approx(risk.volatility_annual, rel=1e-4)
+    assert [c.symbol for c in risk.contributions] == ["AAA", "BBB"]
+
+
+def test_tool_attaches_risk_and_degrades_without_history(make_close_matrix, fake_market):
+    m = make_close_matrix(symbols=("AAA", "BBB", "SPY"), seed=7)
+    payload = {"cash": "100", "holdings": [{"symbol": "AAA", "quantity": "3", "asset_type": "stock"},
+                                           {"symbol": "BBB", "quantity": "2", "asset_type": "etf"}]}
+    out = tool_compute_portfolio_metrics(payload, prices={"AAA": 100.0, "BBB": 50.0}, risk=True,
+                                         market_data=fake_market(m))
+    assert out["risk"]["benchmark"] == "SPY" and out["risk"]["observations"] == 252
+    assert out["risk"]["beta"] is not None
+
+    missing = tool_compute_portfolio_metrics(payload, prices={"AAA": 100.0, "BBB": 50.0}, risk=True,
+                                             market_data=fake_market(make_close_matrix(symbols=("ZZZ",))))
+    assert missing["risk"] is None
+    assert any("Risk analytics unavailable" in w for w in missing["warnings"])
+    assert tool_compute_portfolio_metrics(payload, prices={"AAA": 100.0})["risk"] is None
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import dataclasses
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from src.rag import index_store
+from src.rag.ann_bench import benchmark_ann
+from src.rag.index_store import build_ann, resolve_ann, write_index
+from src.rag.retriever import Retriever
+
+
+def _unit_rows(n: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, n // 500), dim))
+    m = (centers[rng.integers(0, centers.shape[0], n)] + 0.5 * rng.normal(size=(n, dim))).astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def _queries(mat: np.ndarray, n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    q = mat[rng.choice(mat.shape[0], n, replace=False)] + 0.05 * rng.normal(size=(n, mat.shape[1])).astype(np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def test_resolve_ann_by_corpus_size(monkeypatch):
+    s = dataclasses.replace(index_store.SETTINGS, rag_ann_hnsw_min_chunks=100, rag_ann_ivfpq_min_chunks=1000)
+    monkeypatch.setattr(index_store, "SETTINGS", s)
+    assert resolve_ann("auto", 99) == "flat"
+    assert resolve_ann("auto", 100) == "hnsw"
+    assert resolve_ann("auto", 5000) == "ivfpq"
+    assert resolve_ann("faiss", 5000) == "flat"
+    assert resolve_ann("simple", 5000) is None
+    assert resolve_ann("HNSW", 10) == "hnsw"
+    with pytest.raises(ValueError):
+        resolve_ann("annoy", 10)
+
+
+def test_benchmark_recall_and_tuning():
+    mat = _unit_rows(6000, 64, seed=1)
+    q = _queries(mat, 40, seed=2)
+    rows = benchmark_ann(mat, q, k=10, nprobes=(1, 32), ef_searches=(8, 128))
+    by = {(r["kind"], r["param"]): r for r in rows}
+    assert by[("numpy", None)]["recall"] == 1.0
+    assert by[("flat", None)]["recall"] == 1.0
+    assert by[("hnsw", "ef_search=128")]["recall"] >= 0.95
+    assert by[("ivfpq", "nprobe=32")]["recall"] >= 0.9
+    assert by[("ivfpq", "nprobe=32")]["recall"] >= by[("ivfpq", "nprobe=1")]["recall"]
+    assert all(r["p50_ms"] >= 0 for r in rows)
+
+
+def test_small_corpus_ivfpq_falls_back_to_hnsw():
+    _, params = build_ann("ivfpq", _unit_rows(500, 32, seed=3))
+    assert params["kind"] == "hnsw"
+
+
+@pytest.mark.parametrize("kind", ["hnsw", "ivfpq"])
+def test_retriever_uses_ann_index(tmp_path: Path, monkeypatch, kind):
+    monkeypatch.setenv("RAG_EMBEDDER", "hash")
+    n = 1500
+    mat = _unit_rows(n, 384, seed=4)
+    texts = [f"chunk {i}" for i in range(n)]
+    metas = [{"doc_id": f"kb-{i}", "chunk_id": f"kb-{i}:0", "snippet": texts[i]} for i in range(n)]
+    manifest = write_index(tmp_path, mat, texts, metas, ann=kind)
+    assert manifest["ann"] == kind and manifest["ann_params"]
+
+    r = Retriever(index_dir=str(tmp_path))
+    r.load()
+    assert r._index.ann_kind == kind
+    qv = _queries(mat, 1, seed=5)[0]
+    idx, sims = r._index.search(qv, 10, nprobe=64, ef_search=128)
+    exact = np.argsort(-(mat @ qv))[:10]
+    assert len(set(idx.tolist()) & set(exact.tolist())) >= 9
+    # scores are exact cosines (HNSW stores full vectors; ivfpq re-ranks in float32)
+    assert np.allclose(sims, mat[idx] @ qv, atol=1e-5)
+    assert r.retrieve("chunk lookup", top_k=5, min_score=-1.0).chunks
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from src.rag import ingest
+from src.rag.embeddings import HashEmbeddings
+from src.rag.index_store import data_dir, open_index, read_manifest
+from src.rag.retriever import Retriever
+
+HEADER = ("doc_id,title,category,sub_category,source_name,source_url,language,license_or_usage_notes,"
+          "created_at,updated_at,local_path,summary,tags\n")
+
+
+class CountingEmbeddings(HashEmbeddings):
+    embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        CountingEmbeddings.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def _doc(topic: str, n: int) -> str:
+    return "\n\n".join(f"{topic} paragraph {i}: " + " ".join([topic] * 25) for i in range(n))
+
+
+def _write_kb(tmp_path: Path, docs: dict) -> Path:
+    d = tmp_path / "docs"
+    d.mkdir(exist_ok=True)
+    lines = [HEADER]
+    for doc_id, (text, updated) in docs.items():
+        (d / f"{doc_id}.md").write_text(text, encoding="utf-8")
+        lines.append(f"{doc_id},Title {doc_id},cat,sub,test,https://example.com/{doc_id},en,,2025-01-01,{updated},"
+                     f"{doc_id}.md,,\n")
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("".join(lines), encoding="utf-8")
+    return manifest
+
+
+def _build(tmp_path: Path, index: str = "index", **kw) -> Path:
+    CountingEmbeddings.embedded = []
+    ingest.build_index(manifest_path=str(tmp_path / "manifest.csv"), docs_dir=str(tmp_path / "docs"),
+                       index_dir=str(tmp_path / index), chunk_size_chars=kw.pop("chunk_size_chars", 300),
+                       overlap_chars=30, backend="simple", **kw)
+    return tmp_path / index
+
+
+def test_incremental_update_embeds_only_changed_chunks(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("RAG_EMBEDDER", "hash")
+    monkeypatch.setattr(ingest, "get_embeddings", lambda: CountingEmbeddings(dim=384))
+    docs = {"kb-0001": (_doc("stocks", 6), "2025-01-01"), "kb-0002": (_doc("bonds", 6), "2025-01-01"),
+            "kb-0003": (_doc("funds", 6), "2025-01-01")}
+    _write_kb(tmp_path, docs)
+    index_dir = _build(tmp_path, incremental=True)
+    first = read_manifest(index_dir)
+    total = first["count"]
+    assert len(CountingEmbeddings.embedded) == total and total > 9
+
+    r = Retriever(index_dir=str(index_dir))
+    assert r.retrieve("funds", top_k=3, min_score=-1.0).chunks
+
+    # nothing changed: no embedding, no new generation
+    _build(tmp_path, incremental=True)
+    assert CountingEmbeddings.embedded == []
+    assert read_manifest(index_dir)["generation"] == first["generation"]
+
+    # one paragraph of one doc edited, one doc removed
+    docs["kb-0002"] = (_doc("bonds", 6).replace("bonds paragraph 3", "treasury paragraph 3"), "2025-02-01")
+    del docs["kb-0003"]
+    _write_kb(tmp_path, docs)
+    _build(tmp_path, incremental=True)
+    assert 0 < len(CountingEmbeddings.embedded) <= 2
+    assert all("treasury" in t for t in CountingEmbeddings.embedded)
+    m = read_manifest(index_dir)
+    assert sorted(m["docs"]) == ["kb-0001", "kb-0002"]
+    assert m["generation"] != first["generation"]
+    assert (index_dir / first["generation"]).exists()  # kept for readers of the old INDEX.json until the next commit
+
+    # the retriever picks up the new generation; removed docs are gone
+    hits = r.retrieve("funds", top_k=20, use_mmr=False, min_score=-1.0).chunks
+    assert hits and all(c.doc_id != "kb-0003" for c in hits)
+
+    # same result as embedding the current KB from scratch
+    full = _build(tmp_path, index="full", force=True)
+    a, b = open_index(index_dir), open_index(full)
+    assert np.array_equal(np.asarray(a.mat), np.asarray(b.mat))
+    assert [a.chunks.meta(i) for i in range(a.count)] == [b.chunks.meta(i) for i in range(b.count)]
+
+
+def test_updated_at_hint_skips_reading_and_params_change_reembeds(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(ingest, "get_embeddings", lambda: CountingEmbeddings(dim=384))
+    _write_kb(tmp_path, {"kb-0001": (_doc("etf", 4), "2025-01-01")})
+    index_dir = _build(tmp_path, incremental=True)
+
+    reads: List[Path] = []
+    real = Path.read_text
+
+    def spy(self, *a, **kw):
+        reads.append(self)
+        return real(self, *a, **kw)
+
+    monkeypatch.setattr(Path, "read_text", spy)
+    _build(tmp_path, incremental=True)
+    assert not [p for p in reads if p.suffix == ".md"]
+    monkeypatch.setattr(Path, "read_text", real)
+
+    _build(tmp_path, incremental=True, chunk_size_chars=500)
+    assert len(CountingEmbeddings.embedded) == read_manifest(index_dir)["count"]
+    assert (data_dir(index_dir, read_manifest(index_dir)) / "embeddings.npy").exists()
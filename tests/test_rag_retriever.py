@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.rag.retriever import Retriever, _mmr_select
+
+
+def _loop_mmr(sims, mat, top_idx, k, lam):
+    """The original nested-loop MMR, kept as the reference."""
+    selected = []
+    cand = list(map(int, top_idx))
+    while cand and len(selected) < k:
+        if not selected:
+            selected.append(cand.pop(0))
+            continue
+        best_i, best_score = None, -1e9
+        for i in cand:
+            div = max(float(mat[i] @ mat[j]) for j in selected)
+            score = lam * float(sims[i]) - (1.0 - lam) * div
+            if score > best_score:
+                best_score, best_i = score, i
+        cand.remove(best_i)
+        selected.append(best_i)
+    return selected
+
+
+def _unit_rows(n: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # clustered rows, so diversity actually changes the picks
+    centers = rng.normal(size=(8, dim))
+    m = centers[rng.integers(0, 8, n)] + 0.3 * rng.normal(size=(n, dim))
+    m = m.astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def test_vectorized_mmr_matches_loop():
+    mat = _unit_rows(400, 32, seed=1)
+    qv = mat[3] + 0.1
+    qv = (qv / np.linalg.norm(qv)).astype(np.float32)
+    sims = mat @ qv
+    top_idx = np.argsort(-sims)[:60]
+    for lam in (0.0, 0.3, 0.5, 0.9, 1.0):
+        picks = _mmr_select(sims[top_idx], mat[top_idx], 10, lam)
+        assert [int(top_idx[p]) for p in picks] == _loop_mmr(sims, mat, top_idx, 10, lam)
+    assert _mmr_select(sims[top_idx], mat[top_idx], 100, 0.5)[:1] == [0]
+    assert sorted(_mmr_select(sims[top_idx[:5]], mat[top_idx[:5]], 10, 0.5)) == list(range(5))
+
+
+def test_simple_index_mmr_with_wide_fetch(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("RAG_EMBEDDER", "hash")
+    n = 5000
+    mat = _unit_rows(n, 384, seed=2)
+    np.save(tmp_path / "embeddings.npy", mat)
+    metas = [{"doc_id": f"kb-{i // 10:04d}", "chunk_id": f"kb-{i // 10:04d}:{i % 10}", "title": "t",
+              "url": "https://example.com", "snippet": f"chunk {i}"} for i in range(n)]
+    (tmp_path / "metas.json").write_text(json.dumps(metas), encoding="utf-8")
+    (tmp_path / "SIMPLE_INDEX").write_text("1", encoding="utf-8")
+
+    r = Retriever(index_dir=str(tmp_path))
+    r.retrieve(query="warm up", top_k=1, min_score=-1.0)
+    t = time.perf_counter()
+    out = r.retrieve(query="index funds and diversification", top_k=20, fetch_k=500, min_score=-1.0)
+    assert time.perf_counter() - t < 0.5
+    assert len(out.chunks) == 20
+    assert len({c.chunk_id for c in out.chunks}) == 20
+
+
+def test_top_indices_matches_full_sort():
+    from src.rag.index_store import _top_indices
+
+    s = np.random.default_rng(3).normal(size=1000).astype(np.float32)
+    assert _top_indices(s, 30).tolist() == np.argsort(-s)[:30].tolist()
+    assert _top_indices(s, 5000).tolist() == np.argsort(-s).tolist()
+    assert _top_indices(s, 0).size == 0
+
+
+def test_quantized_simple_index_keeps_recall(tmp_path: Path, monkeypatch):
+    from src.rag.index_store import write_index
+
+    monkeypatch.setenv("RAG_EMBEDDER", "hash")
+    n = 4000
+    mat = _unit_rows(n, 384, seed=4)
+    metas = [{"doc_id": f"kb-{i}", "chunk_id": f"kb-{i}:0", "snippet": f"chunk {i}"} for i in range(n)]
+    queries = [f"question about topic {j}" for j in range(20)]
+
+    def top_ids(dtype: str):
+        d = tmp_path / dtype
+        d.mkdir()
+        write_index(d, mat, [m["snippet"] for m in metas], metas, dtype=dtype)
+        r = Retriever(index_dir=str(d))
+        out = [[c.chunk_id for c in r.retrieve(query=q, top_k=10, use_mmr=False, min_score=-1.0).chunks]
+               for q in queries]
+        return r, out
+
+    _, exact = top_ids("float32")
+    for dtype, resident in (("float16", np.float16), ("int8", np.int8)):
+        r, got = top_ids(dtype)
+        assert r._index.qmat.dtype == resident and isinstance(r._index.mat, np.memmap)
+        hits = sum(len(set(a) & set(b)) for a, b in zip(exact, got))
+        assert hits / (10 * len(queries)) >= 0.95
+        # scores come from the float32 re-rank, not the quantized matrix
+        want = {c.chunk_id: c.score for c in Retriever(index_dir=str(tmp_path / "float32")).retrieve(
+            query=queries[0], top_k=10, use_mmr=False, min_score=-1.0).chunks}
+        for c in r.retrieve(query=queries[0], top_k=10, use_mmr=False, min_score=-1.0).chunks:
+            if c.chunk_id in want:
+                assert c.score == want[c.chunk_id]
+
+
+def test_build_numpy_index_int8(tmp_path: Path, monkeypatch):
+    from src.rag.ingest import build_index
+
+    monkeypatch.setenv("RAG_EMBEDDER", "hash")
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "kb-0001.md").write_text("# Index funds\n\nIndex funds track a market index at low cost.\n", encoding="utf-8")
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(
+        "doc_id,title,category,sub_category,source_name,source_url,language,license_or_usage_notes,created_at,updated_at,local_path,summary,tags\n"
+        "kb-0001,Index funds,funds,basics,test,https://example.com/funds,en,,2025-01-01,2025-01-01,kb-0001.md,,\n",
+        encoding="utf-8",
+    )
+    index_dir = tmp_path / "index"
+    build_index(manifest_path=str(manifest), docs_dir=str(docs), index_dir=str(index_dir), force=True,
+                backend="simple", dtype="int8")
+    assert json.loads((index_dir / "INDEX.json").read_text(encoding="utf-8"))["dtype"] == "int8"
+    out = Retriever(index_dir=str(index_dir)).retrieve(query="what is an index fund", top_k=2, min_score=0.0)
+    assert out.chunks and out.chunks[0].doc_id == "kb-0001"
+
+
+def test_index_layout_is_memory_mapped(tmp_path: Path, monkeypatch):
+    from src.rag.index_store import ChunkStore, data_dir, write_index
+
+    monkeypatch.setenv("RAG_EMBEDDER", "hash")
+    n = 300
+    mat = _unit_rows(n, 384, seed=5)
+    texts = [f"chunk text {i} – ünïcode" if i % 7 else "" for i in range(n)]
+    metas = [{"doc_id": f"kb-{i}", "chunk_id": f"kb-{i}:0", "title": f"T{i}", "snippet": texts[i][:20]}
+             for i in range(n)]
+    manifest = write_index(tmp_path, mat, texts, metas, ann="flat")
+
+    store = ChunkStore(data_dir(tmp_path, manifest))
+    assert len(store) == n
+    assert all(store.meta(i) == metas[i] and store.text(i) == texts[i] for i in range(n))
+
+    r = Retriever(index_dir=str(tmp_path))
+    r.load()
+    assert isinstance(r._index.mat, np.memmap) and r._index.ann is not None and r._vs is None
+    with_ann = r.retrieve("anything at all", top_k=8, use_mmr=False, min_score=-1.0).chunks
+
+    (data_dir(tmp_path, manifest) / "vectors.faiss").unlink()
+    (tmp_path / "INDEX.json").write_text(json.dumps({**manifest, "ann": None}), encoding="utf-8")
+    numpy_only = Retriever(index_dir=str(tmp_path)).retrieve("anything at all", top_k=8, use_mmr=False,
+                                                             min_score=-1.0).chunks
+    assert [c.chunk_id for c in with_ann] == [c.chunk_id for c in numpy_only]
+    assert np.allclose([c.score for c in with_ann], [c.score for c in numpy_only], atol=1e-5)
+
+
+def test_replaced_generation_outlives_one_commit(tmp_path: Path, monkeypatch):
+    from src.rag import index_store
+    from src.rag.index_store import open_index, read_manifest, write_index
+
+    monkeypatch.setenv("RAG_EMBEDDER", "hash")
+    mat = _unit_rows(50, 384, seed=6)
+    metas = [{"doc_id": f"kb-{i}", "chunk_id": f"kb-{i}:0", "snippet": f"chunk {i}"} for i in range(50)]
+    texts = [m["snippet"] for m in metas]
+    np.save(tmp_path / "embeddings.npy", mat)
+    (tmp_path / "metas.json").write_text(json.dumps(metas), encoding="utf-8")
+    (tmp_path / "SIMPLE_INDEX").write_text("1", encoding="utf-8")
+    r = Retriever(index_dir=str(tmp_path))
+    r.load()
+    assert r._index.manifest == {}
+
+    # a retriever opened on the legacy layout picks up the first committed INDEX.json
+    g1 = write_index(tmp_path, mat, texts, metas)
+    r.retrieve("anything", top_k=3, min_score=-1.0)
+    assert r._index.manifest["generation"] == g1["generation"]
+
+    stale = read_manifest(tmp_path)
+    g2 = write_index(tmp_path, mat, texts, metas)
+    assert (tmp_path / g1["generation"]).exists()  # a reader holding the old INDEX.json can still open it
+    g3 = write_index(tmp_path, mat, texts, metas)
+    assert not (tmp_path / g1["generation"]).exists() and (tmp_path / g2["generation"]).exists()
+
+    # a reader whose INDEX.json is two commits old re-reads the manifest instead of failing
+    manifests = iter([stale])
+    real = index_store.read_manifest
+    monkeypatch.setattr(index_store, "read_manifest", lambda p: next(manifests, None) or real(p))
+    assert open_index(tmp_path).manifest["generation"] == g3["generation"]
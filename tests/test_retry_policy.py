@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from src.utils.retry import RetryPolicy, RetryStats, parse_retry_after
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    assert parse_retry_after("7") == 7.0
+    now = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("Wed, 01 Jan 2025 12:00:30 GMT", now=now) == 30.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_call_retries_within_budget_and_reports_backoff(monkeypatch):
+    slept = []
+    monkeypatch.setattr("src.utils.retry.time.sleep", lambda s: slept.append(s))
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=8.0, jitter=0.0, budget_seconds=3.5)
+
+    calls = {"n": 0}
+
+    def flaky():
+        calls["n"] += 1
+        raise ConnectionError("boom")
+
+    stats = RetryStats()
+    with pytest.raises(ConnectionError):
+        policy.call(flaky, stats=stats)
+
+    # delays 1 + 2 fit the 3.5s budget; the next (4s) does not
+    assert slept == [1.0, 2.0]
+    assert calls["n"] == 3
+    assert stats.backoff_seconds == 3.0
+
+
+def test_non_retryable_errors_fail_fast():
+    policy = RetryPolicy(max_attempts=5, retry_on=lambda e: not isinstance(e, KeyError))
+    stats = RetryStats()
+    with pytest.raises(KeyError):
+        policy.call(lambda: {}["missing"], stats=stats)
+    assert stats.attempts == 1
+    assert stats.backoff_seconds == 0.0
+
+
+def test_acall_awaits_backoff():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, jitter=0.0)
+    calls = {"n": 0}
+
+    async def flaky():
+        calls["n"] += 1
+        if calls["n"] < 3:
+            raise TimeoutError("slow")
+        return "ok"
+
+    stats = RetryStats()
+    assert asyncio.run(policy.acall(flaky, stats=stats)) == "ok"
+    assert stats.attempts == 3
+    assert stats.backoff_seconds == pytest.approx(0.03)
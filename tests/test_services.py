@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import threading
+
+from src.core.schemas import MarketQuote, UserProfile
+from src.core.services import ServiceRegistry
+from src.utils.market_data import QuoteBatch
+from src.workflow.graph import build_graph
+
+
+class _FakeMarketData:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.closed = False
+
+    def get_quotes(self, symbols, **kw):
+        self.calls += 1
+        return QuoteBatch(quotes={s.upper(): MarketQuote(symbol=s.upper(), price=50.0, provider="fake") for s in symbols})
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_registry_builds_each_service_once_across_threads():
+    built = []
+
+    def factory():
+        built.append(1)
+        return _FakeMarketData()
+
+    reg = ServiceRegistry(market_data_factory=factory)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(reg.market_data)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(2)
+
+    assert len(built) == 1
+    assert all(s is seen[0] for s in seen)
+
+
+def test_graph_nodes_use_injected_services_and_shutdown_closes_them():
+    svc = _FakeMarketData()
+    reg = ServiceRegistry(market_data=svc)
+    graph = build_graph(services=reg)
+
+    for _ in range(2):
+        out = graph.invoke({"user_text": "AAPL price", "user_profile": UserProfile()})
+        assert out["market_quotes"]["AAPL"].price == 50.0
+
+    assert svc.calls == 2
+    assert svc.closed is False  # nodes no longer close the shared service per request
+    reg.shutdown()
+    assert svc.closed is True